@@ -1,102 +1,344 @@
-from fastapi import APIRouter, Form, File, UploadFile, HTTPException, Depends
-from fastapi.responses import StreamingResponse
-from typing import Optional
+from fastapi import APIRouter, Form, File, UploadFile, HTTPException, Depends, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import AsyncIterator, Callable, List, Optional
+import asyncio
 import io
+import json
+import math
 import re
+import zipfile
 
-from app.services.pdf_processor import read_resume_file
-from app.services.ai_service import get_resume_summary, get_similarity_score, get_missing_keywords, generate_cover_letter
+from app.core.metrics import stage_timer
+from app.core.config import settings
+from app.core.profiling import profiler, profiling_available, token_matches
+from app.services.pdf_processor import (
+    ExtractionError,
+    UnsupportedFileError,
+    read_resume_file_async,
+    read_resume_path_async,
+)
+from app.services.uploads import UploadTooLargeError, read_upload_bytes, spool_upload
+from app.services.document_store import document_store
+from app.services.admission import client_id, client_limiter
+from app.services.request_context import set_client
+from app.services.ai_service import (
+    get_resume_summary,
+    get_similarity_score,
+    get_missing_keywords,
+    get_full_analysis,
+    get_job_profile,
+    parse_missing_keywords,
+    stream_missing_keywords,
+    generate_cover_letter,
+    stream_cover_letter,
+)
+from app.services.ats_scorer import build_job_profile, score_resume, find_missing_keywords
+from app.services.text_preprocessor import compact_inputs
+from app.services.cover_letter_queue import QueueFullError, cover_letter_queue
+from app.services.batch_screening import (
+    create_batch_job,
+    extract_zip_resumes,
+    get_batch_job,
+    job_status,
+    ranked_results,
+)
 
 # Create routers
 documents_router = APIRouter()
 analysis_router = APIRouter()
 generation_router = APIRouter()
+batch_router = APIRouter()
+admin_router = APIRouter()
+
+# "llm" asks Gemini, "fast" uses the local deterministic scorer
+ANALYSIS_MODES = ("llm", "fast")
+
+def _check_mode(mode: str) -> None:
+    if mode not in ANALYSIS_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown mode '{mode}'. Use one of: {', '.join(ANALYSIS_MODES)}")
+
+async def _admit(request: Request) -> None:
+    """Per-client rate limit for the LLM-backed routes; tags the request's LLM calls with the client for fair queueing"""
+    client = client_id(request)
+    retry_after = client_limiter.take(client)
+    if retry_after:
+        raise HTTPException(status_code=429, detail="Too many requests. Please slow down and try again shortly.",
+                            headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+    set_client(client)
+
+async def _require_profiling(request: Request) -> None:
+    """Profiles can be read while profiling or slow-request capture is on, always with X-Profile-Token"""
+    if not profiling_available():
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token_matches(request.headers.get("x-profile-token")):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+async def _require_profiler_control(request: Request) -> None:
+    """Starting and stopping worker profiles also needs PROFILING_ENABLED"""
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    await _require_profiling(request)
+
+async def _read_upload(file: UploadFile, max_bytes: Optional[int] = None) -> bytes:
+    try:
+        return await read_upload_bytes(file, max_bytes)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=f"{file.filename}: {e}")
+
+async def _parse_upload(file: UploadFile) -> dict:
+    """Parse an uploaded file once and keep the text in the document store"""
+    with stage_timer("upload_read"):
+        try:
+            upload = await spool_upload(file)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+
+    with upload:
+        # The content hash was computed while spooling, so the upload is not read again for the ID
+        document = await document_store.get(upload.digest)
+        if document is None:
+            # A file that cannot be read is refused rather than stored, so its error never passes for resume text
+            with stage_timer("pdf_extraction"):
+                try:
+                    if upload.path is not None:
+                        text_content = await read_resume_path_async(upload.path, file.filename)
+                    else:
+                        text_content = await read_resume_file_async(upload.content, file.filename)
+                except UnsupportedFileError as e:
+                    raise HTTPException(status_code=415, detail=f"{file.filename}: {e}")
+                except ExtractionError as e:
+                    raise HTTPException(status_code=400, detail=f"{file.filename}: {e}")
+            document = await document_store.put(upload.digest, file.filename, text_content)
+    return document
+
+async def _get_resume_text(
+    resume: Optional[str],
+    resume_file: Optional[UploadFile],
+    resume_id: Optional[str] = None,
+) -> str:
+    """Resolve the resume text from pasted text, a stored document ID or an uploaded file"""
+    if resume:
+        return resume
+    if resume_id:
+        document = await document_store.get(resume_id)
+        if document is None:
+            raise HTTPException(status_code=404, detail="Document not found. Please upload the resume again.")
+        return document["content"]
+    if resume_file:
+        return (await _parse_upload(resume_file))["content"]
+    raise HTTPException(status_code=400, detail="No resume provided")
+
+def _cover_letter_info(
+    company_name: str,
+    full_name: str,
+    hiring_manager: Optional[str],
+    company_address: Optional[str],
+    email: Optional[str],
+    phone: Optional[str],
+    address: Optional[str],
+):
+    """Validate and package the personal and company details for a cover letter"""
+    if not company_name:
+        raise HTTPException(status_code=400, detail="Company name is required")
+    
+    if not full_name:
+        raise HTTPException(status_code=400, detail="Full name is required")
+    
+    # Prepare personal info
+    personal_info = {
+        "fullName": full_name,
+        "email": email,
+        "phone": phone,
+        "address": address
+    }
+
+    # Prepare company info
+    company_info = {
+        "companyName": company_name,
+        "hiringManager": hiring_manager,
+        "companyAddress": company_address
+    }
+
+    return personal_info, company_info
+
+def _sse(event: str, data) -> str:
+    """Format a single server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _sse_stream(chunks: AsyncIterator[str], on_complete: Optional[Callable[[str], dict]] = None):
+    """Relay text chunks as token events, then a final result or error event"""
+    parts = []
+    try:
+        async for text in chunks:
+            parts.append(text)
+            yield _sse("token", {"text": text})
+        full_text = "".join(parts)
+        yield _sse("result", on_complete(full_text) if on_complete else {"text": full_text})
+    except Exception as e:
+        print(f"Error streaming response: {e}")
+        yield _sse("error", {"detail": str(e)})
+
+def _event_stream_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # Document routes
 @documents_router.post("/upload")
 async def upload_document(
     file: UploadFile = File(...),
 ):
-    """Upload and process a document"""
+    """Upload and process a document, returning an ID later requests can reference"""
     try:
-        file_content = await file.read()
-        text_content = read_resume_file(file_content, file.filename)
-        
-        return {"filename": file.filename, "content": text_content}
+        return await _parse_upload(file)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing file: {str(e)}")
 
+@documents_router.get("/{doc_id}")
+async def get_document(doc_id: str):
+    """Fetch a previously uploaded document"""
+    document = await document_store.get(doc_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return document
+
 # Analysis routes
-@analysis_router.post("/summary")
+@analysis_router.post("/summary", dependencies=[Depends(_admit)])
 async def get_summary(
     resume: Optional[str] = Form(None),
     resume_file: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
 ):
     """Generate a summary of the resume"""
-    resume_text = ""
+    resume_text = await _get_resume_text(resume, resume_file, resume_id)
     
-    if resume:
-        resume_text = resume
-    elif resume_file:
-        resume_text = read_resume_file(await resume_file.read(), resume_file.filename)
-    else:
-        raise HTTPException(status_code=400, detail="No resume provided")
-    
-    summary = get_resume_summary(resume_text)
+    summary = await get_resume_summary(resume_text)
     return {"summary": summary}
 
-@analysis_router.post("/similarity")
+@analysis_router.post("/similarity", dependencies=[Depends(_admit)])
 async def get_similarity(
     job_description: str = Form(...),
     resume: Optional[str] = Form(None),
     resume_file: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
+    mode: str = Form("llm"),
 ):
     """Calculate similarity score between resume and job description"""
-    resume_text = ""
-    
-    if resume:
-        resume_text = resume
-    elif resume_file:
-        resume_text = read_resume_file(await resume_file.read(), resume_file.filename)
-    else:
-        raise HTTPException(status_code=400, detail="No resume provided")
+    _check_mode(mode)
+    resume_text = await _get_resume_text(resume, resume_file, resume_id)
     
     if not job_description:
         raise HTTPException(status_code=400, detail="No job description provided")
     
-    similarity_data = get_similarity_score(job_description, resume_text)
+    if mode == "fast":
+        return score_resume(job_description, resume_text)
+    
+    similarity_data = await get_similarity_score(job_description, resume_text)
     return similarity_data
 
-@analysis_router.post("/keywords")
+@analysis_router.post("/keywords", dependencies=[Depends(_admit)])
 async def get_keywords(
     job_description: str = Form(...),
     resume: Optional[str] = Form(None),
     resume_file: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
+    mode: str = Form("llm"),
 ):
     """Identify missing keywords and suggest placements"""
-    resume_text = ""
-    
-    if resume:
-        resume_text = resume
-    elif resume_file:
-        resume_text = read_resume_file(await resume_file.read(), resume_file.filename)
-    else:
-        raise HTTPException(status_code=400, detail="No resume provided")
+    _check_mode(mode)
+    resume_text = await _get_resume_text(resume, resume_file, resume_id)
     
     if not job_description:
         raise HTTPException(status_code=400, detail="No job description provided")
     
-    keywords_data = get_missing_keywords(job_description, resume_text)
+    if mode == "fast":
+        return find_missing_keywords(job_description, resume_text)
+    
+    keywords_data = await get_missing_keywords(job_description, resume_text)
     return keywords_data
 
+@analysis_router.post("/keywords/stream", dependencies=[Depends(_admit)])
+async def stream_keywords(
+    job_description: str = Form(...),
+    resume: Optional[str] = Form(None),
+    resume_file: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
+):
+    """Stream the keyword analysis as server-sent events"""
+    resume_text = await _get_resume_text(resume, resume_file, resume_id)
+    
+    if not job_description:
+        raise HTTPException(status_code=400, detail="No job description provided")
+    
+    chunks = stream_missing_keywords(job_description, resume_text)
+    return _event_stream_response(_sse_stream(chunks, on_complete=parse_missing_keywords))
+
+@analysis_router.post("/full", dependencies=[Depends(_admit)])
+async def full_analysis(
+    job_description: str = Form(...),
+    resume: Optional[str] = Form(None),
+    resume_file: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
+    combined: bool = Form(False),
+):
+    """Run summary, similarity and keyword analysis on a single upload"""
+    resume_text = await _get_resume_text(resume, resume_file, resume_id)
+    
+    if not job_description:
+        raise HTTPException(status_code=400, detail="No job description provided")
+    
+    # One structured prompt when requested, falling back to the separate analyses
+    if combined:
+        analysis = await get_full_analysis(job_description, resume_text)
+        if analysis is not None:
+            return {**analysis, "errors": {}}
+    
+    outcomes = await asyncio.gather(
+        get_resume_summary(resume_text),
+        get_similarity_score(job_description, resume_text),
+        get_missing_keywords(job_description, resume_text),
+        return_exceptions=True,
+    )
+    
+    # Return whatever succeeded and report the parts that failed
+    results = {"summary": None, "similarity": None, "keywords": None, "errors": {}}
+    for name, outcome in zip(("summary", "similarity", "keywords"), outcomes):
+        if isinstance(outcome, Exception):
+            results["errors"][name] = str(outcome)
+        else:
+            results[name] = outcome
+    return results
+
+@analysis_router.post("/job-profile", dependencies=[Depends(_admit)])
+async def job_profile(
+    job_description: str = Form(...),
+    mode: str = Form("llm"),
+):
+    """Extract the required and preferred skills, seniority and keywords of a job description"""
+    _check_mode(mode)
+    
+    if not job_description:
+        raise HTTPException(status_code=400, detail="No job description provided")
+    
+    job_description, _ = compact_inputs("jd_profile", job_description, "")
+    profile = await get_job_profile(job_description) if mode == "llm" else None
+    if profile is None:
+        return {**build_job_profile(job_description), "source": "local"}
+    return {**profile, "source": "llm"}
+
 # Generation routes
-@generation_router.post("/cover-letter")
+@generation_router.post("/cover-letter", dependencies=[Depends(_admit)])
 async def create_cover_letter(
     job_description: str = Form(...),
     company_name: str = Form(...),
     full_name: str = Form(...),
     resume: Optional[str] = Form(None),
     resume_file: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
     hiring_manager: Optional[str] = Form(None),
     company_address: Optional[str] = Form(None),
     email: Optional[str] = Form(None),
@@ -104,43 +346,104 @@ async def create_cover_letter(
     address: Optional[str] = Form(None),
 ):
     """Generate a cover letter based on resume and job description"""
-    resume_text = ""
+    resume_text = await _get_resume_text(resume, resume_file, resume_id)
     
-    if resume:
-        resume_text = resume
-    elif resume_file:
-        resume_text = read_resume_file(await resume_file.read(), resume_file.filename)
-    else:
-        raise HTTPException(status_code=400, detail="No resume provided")
+    if not job_description:
+        raise HTTPException(status_code=400, detail="No job description provided")
+    
+    personal_info, company_info = _cover_letter_info(
+        company_name, full_name, hiring_manager, company_address, email, phone, address
+    )
+
+    # Generate cover letter text
+    letter_text = await generate_cover_letter(personal_info, company_info, job_description, resume_text)
+
+    return {"coverLetter": letter_text}
+
+@generation_router.post("/cover-letter/stream", dependencies=[Depends(_admit)])
+async def stream_cover_letter_route(
+    job_description: str = Form(...),
+    company_name: str = Form(...),
+    full_name: str = Form(...),
+    resume: Optional[str] = Form(None),
+    resume_file: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
+    hiring_manager: Optional[str] = Form(None),
+    company_address: Optional[str] = Form(None),
+    email: Optional[str] = Form(None),
+    phone: Optional[str] = Form(None),
+    address: Optional[str] = Form(None),
+):
+    """Stream a cover letter as server-sent events while it is generated"""
+    resume_text = await _get_resume_text(resume, resume_file, resume_id)
     
     if not job_description:
         raise HTTPException(status_code=400, detail="No job description provided")
     
-    if not company_name:
-        raise HTTPException(status_code=400, detail="Company name is required")
+    personal_info, company_info = _cover_letter_info(
+        company_name, full_name, hiring_manager, company_address, email, phone, address
+    )
+
+    chunks = stream_cover_letter(personal_info, company_info, job_description, resume_text)
+    return _event_stream_response(
+        _sse_stream(chunks, on_complete=lambda text: {"coverLetter": text.strip()})
+    )
+
+@generation_router.post("/cover-letter/jobs", status_code=202, dependencies=[Depends(_admit)])
+async def submit_cover_letter_job(
+    job_description: str = Form(...),
+    company_name: str = Form(...),
+    full_name: str = Form(...),
+    resume: Optional[str] = Form(None),
+    resume_file: Optional[UploadFile] = File(None),
+    resume_id: Optional[str] = Form(None),
+    hiring_manager: Optional[str] = Form(None),
+    company_address: Optional[str] = Form(None),
+    email: Optional[str] = Form(None),
+    phone: Optional[str] = Form(None),
+    address: Optional[str] = Form(None),
+    priority: str = Form("normal"),
+):
+    """Queue a cover letter and return a job ID to poll instead of waiting for the letter"""
+    resume_text = await _get_resume_text(resume, resume_file, resume_id)
     
-    if not full_name:
-        raise HTTPException(status_code=400, detail="Full name is required")
+    if not job_description:
+        raise HTTPException(status_code=400, detail="No job description provided")
     
-    # Prepare personal info
-    personal_info = {
-        "fullName": full_name,
-        "email": email,
-        "phone": phone,
-        "address": address
-    }
+    personal_info, company_info = _cover_letter_info(
+        company_name, full_name, hiring_manager, company_address, email, phone, address
+    )
 
-    # Prepare company info
-    company_info = {
-        "companyName": company_name,
-        "hiringManager": hiring_manager,
-        "companyAddress": company_address
-    }
+    try:
+        return await cover_letter_queue.submit(personal_info, company_info, job_description, resume_text, priority)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(round(e.retry_after))})
 
-    # Generate cover letter text
-    letter_text = generate_cover_letter(personal_info, company_info, job_description, resume_text)
+@generation_router.get("/cover-letter/jobs/{job_id}")
+async def get_cover_letter_job(job_id: str):
+    """Report the status of a queued cover letter, including the letter once it is done"""
+    job = await cover_letter_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Cover letter job not found")
+    return job
 
-    return {"coverLetter": letter_text}
+@generation_router.get("/cover-letter/jobs/{job_id}/result")
+async def get_cover_letter_job_result(job_id: str):
+    """Return the finished cover letter, or 202 with the job status while it is pending"""
+    job = await cover_letter_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Cover letter job not found")
+    
+    if job["status"] == "completed":
+        return job["result"]
+    if job["status"] == "failed":
+        if "retryAfter" in job:
+            raise HTTPException(status_code=503, detail=job["error"],
+                                headers={"Retry-After": str(max(1, round(job["retryAfter"])))})
+        raise HTTPException(status_code=500, detail=job["error"])
+    return JSONResponse(status_code=202, content=job)
 
 @generation_router.post("/download-cover-letter")
 async def download_cover_letter(
@@ -163,4 +466,112 @@ async def download_cover_letter(
         headers={
             "Content-Disposition": f"attachment; filename=Cover_Letter_{safe_name}.txt"
         }
-    )
\ No newline at end of file
+    )
+
+# Batch screening routes
+@batch_router.post("/screen", dependencies=[Depends(_admit)])
+async def create_screening_job(
+    job_description: str = Form(...),
+    files: Optional[List[UploadFile]] = File(None),
+    archive: Optional[UploadFile] = File(None),
+    document_ids: Optional[str] = Form(None),
+    include_keywords: bool = Form(False),
+    mode: str = Form("llm"),
+    min_local_score: Optional[float] = Form(None),
+):
+    """Start scoring many resumes against one job description"""
+    _check_mode(mode)
+    
+    if not job_description:
+        raise HTTPException(status_code=400, detail="No job description provided")
+    
+    resumes = []
+    for file in files or []:
+        resumes.append({"name": file.filename, "content": await _read_upload(file)})
+    
+    if archive:
+        try:
+            archive_content = await _read_upload(archive, settings.MAX_REQUEST_BYTES)
+            max_resumes = max(0, settings.BATCH_MAX_RESUMES - len(resumes))
+            resumes.extend(await asyncio.to_thread(extract_zip_resumes, archive_content, max_resumes))
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail="Archive is not a valid zip file")
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    # Comma-separated IDs of previously uploaded documents
+    for doc_id in filter(None, (d.strip() for d in (document_ids or "").split(","))):
+        document = await document_store.get(doc_id)
+        if document is None:
+            raise HTTPException(status_code=404, detail=f"Document not found: {doc_id}")
+        resumes.append({"name": document["filename"] or doc_id, "documentId": doc_id, "text": document["content"]})
+    
+    if not resumes:
+        raise HTTPException(status_code=400, detail="No resumes provided")
+    
+    try:
+        return await create_batch_job(job_description, resumes, include_keywords, mode, min_local_score)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@batch_router.get("/{job_id}")
+async def get_screening_job(job_id: str):
+    """Report progress of a screening job along with the best matches so far"""
+    job = await get_batch_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return job_status(job)
+
+@batch_router.get("/{job_id}/results")
+async def get_screening_results(job_id: str):
+    """Stream the ranked results as newline-delimited JSON"""
+    job = await get_batch_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    
+    return StreamingResponse(
+        (json.dumps(result) + "\n" for result in ranked_results(job)),
+        media_type="application/x-ndjson",
+    )
+
+# Admin routes - profiles are kept per worker process, so with several workers ask the one that served the request
+@admin_router.get("/profiling", dependencies=[Depends(_require_profiling)])
+async def list_profiles():
+    """Profiling settings, the running worker profile and the profiles kept for download"""
+    return profiler.stats()
+
+@admin_router.post("/profiling/start", dependencies=[Depends(_require_profiler_control)])
+async def start_worker_profile(interval_ms: Optional[float] = None):
+    """Sample every thread in this worker until /profiling/stop"""
+    if interval_ms is not None and interval_ms < 1:
+        raise HTTPException(status_code=400, detail="interval_ms must be at least 1")
+    try:
+        profile = profiler.start_worker(interval_ms / 1000 if interval_ms else None)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return profile.info()
+
+@admin_router.post("/profiling/stop", dependencies=[Depends(_require_profiler_control)])
+async def stop_worker_profile():
+    """Stop the worker profile; download it from /profiling/{profile_id}"""
+    try:
+        profile = profiler.stop_worker()
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return profile.info()
+
+@admin_router.get("/profiling/{profile_id}", dependencies=[Depends(_require_profiling)])
+async def download_profile(profile_id: str, format: str = "speedscope"):
+    """A profile as a speedscope file, or as folded stacks for flamegraph tools with format=collapsed"""
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        return PlainTextResponse(profile.to_collapsed(),
+                                 headers={"Content-Disposition": f'attachment; filename="{profile_id}.folded"'})
+    if format != "speedscope":
+        raise HTTPException(status_code=400, detail="Unknown format. Use one of: speedscope, collapsed")
+    return JSONResponse(profile.to_speedscope(),
+                        headers={"Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'})
@@ -22,7 +22,7 @@ async def get_summary(
     else:
         raise HTTPException(status_code=400, detail="No resume provided")
     
-    summary = get_resume_summary(resume_text)
+    summary = await get_resume_summary(resume_text)
     return {"summary": summary}
 
 @router.post("/similarity", response_model=SimilarityResponse)
@@ -44,7 +44,7 @@ async def get_similarity(
     if not job_description:
         raise HTTPException(status_code=400, detail="No job description provided")
     
-    similarity_data = get_similarity_score(job_description, resume_text)
+    similarity_data = await get_similarity_score(job_description, resume_text)
     return similarity_data
 
 @router.post("/keywords", response_model=KeywordsResponse)
@@ -66,5 +66,5 @@ async def get_keywords(
     if not job_description:
         raise HTTPException(status_code=400, detail="No job description provided")
     
-    keywords_data = get_missing_keywords(job_description, resume_text)
+    keywords_data = await get_missing_keywords(job_description, resume_text)
     return keywords_data
\ No newline at end of file
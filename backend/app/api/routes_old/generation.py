@@ -58,7 +58,7 @@ async def create_cover_letter(
     }
 
     # Generate cover letter text
-    letter_text = generate_cover_letter(personal_info, company_info, job_description, resume_text)
+    letter_text = await generate_cover_letter(personal_info, company_info, job_description, resume_text)
 
     return {"coverLetter": letter_text}
 
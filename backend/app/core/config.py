@@ -1,4 +1,5 @@
 import os
+from typing import Any, Dict, List
 from pydantic import BaseSettings
 from dotenv import load_dotenv
 
@@ -12,6 +13,136 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: str = os.environ.get("GEMINI_API_KEY", "")
     GEMINI_MODEL: str = "gemini-2.0-flash"
     
+    # LLM calls - per-call timeout and thread pool used when the async API is unavailable
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_EXECUTOR_WORKERS: int = 32
+    
+    # LLM resilience - concurrency caps (global and per operation), quota pacing, retries and circuit breaker
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_OPERATION_CONCURRENCY: Dict[str, int] = {"cover_letter": 8}
+    LLM_REQUESTS_PER_MINUTE: int = 600
+    LLM_BURST: int = 20
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BASE_DELAY: float = 0.5
+    LLM_RETRY_MAX_DELAY: float = 8.0
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RECOVERY_SECONDS: float = 30.0
+    
+    # LLM scheduling - calls wait for one of the LLM_MAX_CONCURRENCY slots by weighted fair queueing across priority
+    # classes and clients; a class with LLM_QUEUE_MAX_DEPTH calls waiting turns new ones away with 429 (0: no limit)
+    LLM_PRIORITY_WEIGHTS: Dict[str, float] = {"interactive": 8.0, "batch": 1.0}
+    LLM_QUEUE_MAX_DEPTH: Dict[str, int] = {"interactive": 64, "batch": 0}
+    
+    # Model routing - per-operation model, output token cap, temperature and timeout; missing fields use GEMINI_MODEL
+    # and LLM_TIMEOUT_SECONDS. The "batch" entry is applied on top of the operation's route inside screening jobs.
+    # Calls move to LLM_FALLBACK_MODEL while their model's circuit is open or LLM_FALLBACK_QUEUE_DEPTH calls are waiting
+    LLM_ROUTES: Dict[str, Dict[str, Any]] = {
+        "summary": {"model": "gemini-2.0-flash-lite", "max_output_tokens": 256, "temperature": 0.3, "timeout": 20},
+        "jd_profile": {"model": "gemini-2.0-flash-lite", "max_output_tokens": 768, "temperature": 0.0, "timeout": 30},
+        "similarity": {"max_output_tokens": 512, "temperature": 0.0, "timeout": 30},
+        "keywords": {"max_output_tokens": 1024, "temperature": 0.2, "timeout": 45},
+        "full": {"max_output_tokens": 2048, "temperature": 0.2, "timeout": 60},
+        "cover_letter": {"max_output_tokens": 1200, "temperature": 0.7, "timeout": 60},
+        "batch": {"model": "gemini-2.0-flash-lite", "timeout": 90},
+    }
+    LLM_FALLBACK_MODEL: str = "gemini-2.0-flash-lite"
+    LLM_FALLBACK_QUEUE_DEPTH: int = 8
+    
+    # Hedged requests - a call still running at this percentile of its operation's recent latency gets a duplicate,
+    # and the first answer wins. Hedges are capped at LLM_HEDGE_BUDGET of calls, LLM_HEDGE_MAX_IN_FLIGHT at once,
+    # and only sent when the request quota has a token free
+    LLM_HEDGE_OPERATIONS: List[str] = ["summary", "jd_profile", "similarity", "keywords"]
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_BUDGET: float = 0.05
+    LLM_HEDGE_MAX_IN_FLIGHT: int = 4
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 0.5
+    
+    # Prompt compaction - inputs are cleaned up and trimmed to these estimated token budgets
+    PROMPT_COMPACTION_ENABLED: bool = True
+    RESUME_TOKEN_BUDGET: int = 3000
+    JD_TOKEN_BUDGET: int = 1500
+    CHARS_PER_TOKEN: int = 4
+    
+    # Client admission - requests per minute and burst per client (API key or IP) on the LLM-backed routes,
+    # or 0 to disable; X-Forwarded-For is only trusted behind a proxy that sets it
+    CLIENT_REQUESTS_PER_MINUTE: int = 60
+    CLIENT_BURST: int = 20
+    CLIENT_MAX_TRACKED: int = 10000
+    TRUST_FORWARDED_FOR: bool = False
+    
+    # Job description profiles - long JDs are reduced once to their requirements, then prompts reuse the profile
+    # "llm" extracts it with Gemini, "local" with the local scorer, "off" always sends the full JD; after a failed
+    # extraction the full JD is sent for JD_PROFILE_RETRY_SECONDS before that JD is tried again
+    JD_PROFILE_MODE: str = "llm"
+    JD_PROFILE_MIN_TOKENS: int = 400
+    JD_PROFILE_RETRY_SECONDS: int = 60
+    
+    # Request coalescing - concurrent identical LLM calls share one upstream request
+    COALESCE_ENABLED: bool = True
+    
+    # Shared state - SQLite file used by every worker process for the LLM cache, document store
+    # and request quota, unless CACHE_SQLITE_PATH or DOCUMENT_STORE_SQLITE_PATH point elsewhere
+    SHARED_STATE_PATH: str = ""
+    
+    # LLM response cache - in-memory LRU+TTL, plus an optional SQLite file that survives restarts
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    CACHE_SQLITE_PATH: str = ""
+    
+    # Parsed resume store - uploads are parsed once and referenced by document ID
+    DOCUMENT_STORE_MAX_ENTRIES: int = 256
+    DOCUMENT_STORE_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    DOCUMENT_STORE_SQLITE_PATH: str = ""
+    
+    # Uploads - largest file, largest request body (0 disables either), and size kept in memory before spooling to disk
+    MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    MAX_REQUEST_BYTES: int = 100 * 1024 * 1024
+    UPLOAD_MEMORY_BYTES: int = 1024 * 1024
+    
+    # PDF extraction - worker processes (0 parses in a thread instead) and page limit per document
+    PDF_WORKERS: int = 2
+    PDF_MAX_PAGES: int = 20
+    
+    # Batch screening - job size, LLM concurrency, shared request pacing (0 disables) and job retention
+    BATCH_MAX_RESUMES: int = 2000
+    BATCH_CONCURRENCY: int = 8
+    BATCH_REQUESTS_PER_MINUTE: int = 240
+    BATCH_MAX_JOBS: int = 100
+    BATCH_JOB_TTL_SECONDS: int = 24 * 60 * 60
+    
+    # Cover letter jobs - worker tasks, queued jobs before submissions get 429, and how long results are kept
+    COVER_LETTER_WORKERS: int = 8
+    COVER_LETTER_QUEUE_MAX_DEPTH: int = 200
+    COVER_LETTER_MAX_JOBS: int = 5000
+    COVER_LETTER_JOB_TTL_SECONDS: int = 60 * 60
+    
+    # Production server - see app/server.py; WORKERS defaults to the CPU count
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEP_ALIVE_SECONDS: int = 15
+    SERVER_LIMIT_CONCURRENCY: int = 0
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    
+    # Startup warm-up - load the Gemini SDK and start the PDF workers before accepting traffic,
+    # optionally sending one tiny Gemini request so the first user request reuses an open connection
+    STARTUP_WARMUP: bool = True
+    LLM_WARMUP_REQUEST: bool = False
+
+    # Profiling - PROFILING_ENABLED allows per-request profiles (X-Profile: 1 or ?profile=1) and worker profiles.
+    # Requests running longer than PROFILE_SLOW_REQUEST_SECONDS (0 disables) are sampled from then on; profiles
+    # stop after PROFILE_MAX_SECONDS. Nothing is profiled unless PROFILING_TOKEN is set, and the
+    # /api/admin/profiling endpoints always need it in X-Profile-Token
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str = ""
+    PROFILE_SAMPLE_INTERVAL_MS: float = 5.0
+    PROFILE_SLOW_REQUEST_SECONDS: float = 0.0
+    PROFILE_MAX_SECONDS: float = 300.0
+    PROFILE_MAX_STORED: int = 50
+    
     # CORS - Allow requests from the React development server
     BACKEND_CORS_ORIGINS: list = ["*"]
 
@@ -0,0 +1,226 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Latency buckets in seconds, from cache hits up to slow LLM generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Sample = Tuple[Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items())) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [("", self._labels(key), value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            # Per-bucket counts followed by the running sum and count
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, series in self._series.items():
+                labels = self._labels(key)
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    samples.append(("_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+                samples.append(("_bucket", {**labels, "le": "+Inf"}, series[-1]))
+                samples.append(("_sum", labels, series[-2]))
+                samples.append(("_count", labels, series[-1]))
+        return samples
+
+
+class _CallbackMetric(_Metric):
+    """Metric whose samples are read from another component at scrape time"""
+
+    def __init__(self, name: str, documentation: str, kind: str, callback: Callable[[], Iterable[Sample]]):
+        super().__init__(name, documentation)
+        self.kind = kind
+        self.callback = callback
+
+    def samples(self):
+        return [("", labels, value) for labels, value in self.callback()]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, kind: str, callback: Callable[[], Iterable[Sample]]) -> None:
+        self.register(_CallbackMetric(name, documentation, kind, callback))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                print(f"Error collecting metric {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_latency = registry.histogram("http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+http_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests currently being served")
+stage_latency = registry.histogram("stage_duration_seconds", "Time spent in each processing stage", ("stage", "operation"))
+llm_tokens = registry.counter("llm_tokens_total", "Estimated tokens sent to and received from the LLM", ("operation", "direction"))
+errors = registry.counter("errors_total", "Errors by component and exception type", ("component", "type"))
+
+
+def stage_timer(stage: str, operation: str = ""):
+    """Time a block as one processing stage: upload_read, pdf_extraction, prompt_build, llm_call, response_parse"""
+    return stage_latency.time(stage=stage, operation=operation)
+
+
+def record_error(component: str, exc: BaseException) -> None:
+    errors.inc(component=component, type=type(exc).__name__)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status codes and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: Dict[Callable, str] = {}
+
+    def _route_template(self, scope) -> str:
+        """Label by route template so /batch/{job_id} does not create a series per job"""
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if endpoint not in self._route_paths:
+            for route in getattr(scope.get("app"), "routes", []):
+                if getattr(route, "endpoint", None) is endpoint:
+                    self._route_paths[endpoint] = route.path
+                    break
+        return self._route_paths.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            record_error("http", e)
+            raise
+        finally:
+            http_in_flight.dec()
+            route_path = self._route_template(scope)
+            method = scope.get("method", "")
+            http_latency.observe(time.perf_counter() - start, method=method, route=route_path)
+            http_requests.inc(method=method, route=route_path, status=str(status["code"]))
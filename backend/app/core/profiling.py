@@ -0,0 +1,373 @@
+import asyncio
+import hmac
+import os
+import sys
+import threading
+import time
+import uuid
+import weakref
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+# (function, file, first line) - frames of the same function merge in the flamegraph
+FrameKey = Tuple[str, str, int]
+
+# Leaf added under a suspended coroutine, so time spent awaiting Gemini or a worker shows as waiting
+WAITING: FrameKey = ("(waiting)", "", 0)
+MAX_STACK_DEPTH = 128
+
+# The profile collecting the current request; tasks the request starts inherit it
+_active_profile: ContextVar[Optional["Profile"]] = ContextVar("active_profile", default=None)
+
+profiles_captured = registry.counter("profiles_captured_total", "Sampling profiles kept, by what triggered them", ("reason",))
+
+
+def _frame_key(frame) -> FrameKey:
+    code = frame.f_code
+    return (getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno)
+
+
+def _thread_stack(frame) -> List[Any]:
+    """A thread's frames, outermost first"""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def _await_chain(coro) -> List[Any]:
+    """Frames of a suspended coroutine and of the coroutines it is awaiting, outermost first"""
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return frames
+
+
+class Profile:
+    """Stack samples of one request, or of every thread in the worker when it tracks no tasks"""
+
+    def __init__(self, name: str, reason: str, interval: float, track_tasks: bool, delay: float = 0.0):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.reason = reason
+        self.interval = interval
+        self.created_at = time.time()
+        self.start = time.perf_counter()
+        self.sample_from = self.start + delay
+        self.duration: Optional[float] = None
+        self.truncated = False
+        self.samples = 0
+        # Seconds spent in each stack, weighted by the real gap between samples
+        self.stacks: Counter = Counter()
+        self._last_sample: Optional[float] = None
+        self._loop_thread = threading.get_ident()
+        self._tasks = weakref.WeakSet() if track_tasks else None
+        self._parents = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def add_task(self, task: asyncio.Task, parent: Optional[asyncio.Task] = None) -> None:
+        if self._tasks is None:
+            return
+        with self._lock:
+            self._tasks.add(task)
+            if parent is not None:
+                self._parents[task] = parent
+
+    def _task_stack(self, task: asyncio.Task, loop_frame) -> List[FrameKey]:
+        coro = task.get_coro()
+        if getattr(coro, "cr_running", False) and loop_frame is not None:
+            # Running on the loop right now: take the live stack from the coroutine down
+            stack = _thread_stack(loop_frame)
+            for index, frame in enumerate(stack):
+                if frame is coro.cr_frame:
+                    return [_frame_key(frame) for frame in stack[index:]]
+        return [_frame_key(frame) for frame in _await_chain(coro)] + [WAITING]
+
+    def sample(self, thread_frames: Dict[int, Any], now: float) -> None:
+        """Record one sample from a snapshot of every thread's current frame"""
+        weight = min(now - self._last_sample, 10 * self.interval) if self._last_sample else self.interval
+        self._last_sample = now
+        if self._tasks is None:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = [[(f"(thread {names.get(ident, ident)})", "", 0)] + [_frame_key(frame) for frame in _thread_stack(frame)]
+                      for ident, frame in thread_frames.items()]
+        else:
+            with self._lock:
+                tasks = [task for task in self._tasks if not task.done()]
+                parents = {self._parents.get(task) for task in tasks}
+            # A task waiting on the subtasks it started is covered by their samples
+            loop_frame = thread_frames.get(self._loop_thread)
+            stacks = [self._task_stack(task, loop_frame) for task in tasks
+                      if task not in parents or getattr(task.get_coro(), "cr_running", False)]
+        for stack in stacks:
+            self.stacks[tuple(stack[-MAX_STACK_DEPTH:])] += weight
+        self.samples += 1
+
+    def finish(self) -> None:
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.start
+
+    def info(self) -> Dict[str, Any]:
+        elapsed = self.duration if self.duration is not None else time.perf_counter() - self.start
+        return {
+            "id": self.id,
+            "name": self.name,
+            "reason": self.reason,
+            "createdAt": self.created_at,
+            "durationMs": round(elapsed * 1000, 1),
+            "samples": self.samples,
+            "truncated": self.truncated,
+        }
+
+    def to_speedscope(self) -> Dict[str, Any]:
+        """The samples as a speedscope file (https://www.speedscope.app)"""
+        frames: List[Dict[str, Any]] = []
+        index: Dict[FrameKey, int] = {}
+        samples, weights = [], []
+        for stack, seconds in self.stacks.items():
+            for key in stack:
+                if key not in index:
+                    index[key] = len(frames)
+                    frame = {"name": key[0]}
+                    if key[1]:
+                        frame.update(file=key[1], line=key[2])
+                    frames.append(frame)
+            samples.append([index[key] for key in stack])
+            weights.append(round(seconds, 6))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.name,
+            "exporter": settings.PROJECT_NAME,
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": self.name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 6),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+    def to_collapsed(self) -> str:
+        """Folded stacks ("a;b;c <microseconds>" per line) for flamegraph.pl and similar tools"""
+        lines = []
+        for stack, seconds in self.stacks.items():
+            names = [f"{name} ({os.path.basename(path)}:{line})" if path else name for name, path, line in stack]
+            lines.append(f"{';'.join(names)} {max(1, round(seconds * 1_000_000))}")
+        return "\n".join(lines) + "\n"
+
+
+class Sampler:
+    """Background thread that samples stacks for the active profiles; it only exists while one is active"""
+
+    def __init__(self):
+        self._profiles: set = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+                self._thread.start()
+        if profile.sample_from <= time.perf_counter():
+            self._wake.set()
+
+    def remove(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles.discard(profile)
+
+    def active(self) -> int:
+        return len(self._profiles)
+
+    def _run(self) -> None:
+        own_thread = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._profiles:
+                    self._thread = None
+                    return
+                profiles = list(self._profiles)
+
+            now = time.perf_counter()
+            due = [profile for profile in profiles if profile.sample_from <= now]
+            for profile in due:
+                if now - profile.start > settings.PROFILE_MAX_SECONDS:
+                    # Cap the cost of a profile nobody stopped or a request that never finishes
+                    profile.truncated = True
+                    self.remove(profile)
+            due = [profile for profile in due if not profile.truncated]
+            if due:
+                thread_frames = sys._current_frames()
+                thread_frames.pop(own_thread, None)
+                for profile in due:
+                    try:
+                        profile.sample(thread_frames, now)
+                    except Exception as e:
+                        print(f"Error sampling profile {profile.id}: {e}")
+                del thread_frames
+
+            # Profiles still waiting for their slow-request threshold do not need waking up for
+            waits = [profile.interval if profile.sample_from <= now else profile.sample_from - now for profile in profiles]
+            self._wake.wait(min(waits))
+            self._wake.clear()
+
+
+class Profiler:
+    """Per-request, slow-request and worker-wide sampling profiles, with the most recent ones kept for download"""
+
+    def __init__(self, max_stored: int):
+        self.max_stored = max_stored
+        self.sampler = Sampler()
+        self.worker_profile: Optional[Profile] = None
+        self._stored: "OrderedDict[str, Profile]" = OrderedDict()
+
+    @property
+    def interval(self) -> float:
+        return max(settings.PROFILE_SAMPLE_INTERVAL_MS, 1.0) / 1000
+
+    def begin_request(self, name: str, reason: str, delay: float = 0.0) -> Profile:
+        """Start profiling the current task, and every task it starts, after delay seconds"""
+        _install_task_factory(asyncio.get_running_loop())
+        profile = Profile(name, reason, self.interval, track_tasks=True, delay=delay)
+        profile.add_task(asyncio.current_task())
+        self.sampler.add(profile)
+        return profile
+
+    def end_request(self, profile: Profile) -> None:
+        self.sampler.remove(profile)
+        profile.finish()
+        # Slow-request profiles only matter once the request actually went past the threshold
+        if profile.reason == "requested" or profile.samples:
+            self._store(profile)
+
+    def start_worker(self, interval: Optional[float] = None) -> Profile:
+        """Sample every thread in this worker until stop_worker"""
+        if self.worker_profile is not None:
+            raise RuntimeError(f"Worker profile {self.worker_profile.id} is already running")
+        self.worker_profile = Profile(f"worker {os.getpid()}", "worker", interval or self.interval, track_tasks=False)
+        self.sampler.add(self.worker_profile)
+        return self.worker_profile
+
+    def stop_worker(self) -> Profile:
+        profile = self.worker_profile
+        if profile is None:
+            raise RuntimeError("No worker profile is running")
+        self.worker_profile = None
+        self.sampler.remove(profile)
+        profile.finish()
+        self._store(profile)
+        return profile
+
+    def _store(self, profile: Profile) -> None:
+        self._stored[profile.id] = profile
+        while len(self._stored) > self.max_stored:
+            self._stored.popitem(last=False)
+        profiles_captured.inc(reason=profile.reason)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        if self.worker_profile is not None and self.worker_profile.id == profile_id:
+            return self.worker_profile
+        return self._stored.get(profile_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "requestProfiling": settings.PROFILING_ENABLED,
+            "slowRequestSeconds": settings.PROFILE_SLOW_REQUEST_SECONDS,
+            "sampleIntervalMs": self.interval * 1000,
+            "activeProfiles": self.sampler.active(),
+            "worker": self.worker_profile.info() if self.worker_profile else None,
+            "profiles": [profile.info() for profile in reversed(self._stored.values())],
+        }
+
+
+profiler = Profiler(settings.PROFILE_MAX_STORED)
+
+
+def _install_task_factory(loop: asyncio.AbstractEventLoop) -> None:
+    """Make tasks started while a profile is active (gather, coalesced calls) part of that profile"""
+    previous = loop.get_task_factory()
+    if getattr(previous, "profiling", False):
+        return
+
+    def task_factory(loop, coro, **kwargs):
+        task = previous(loop, coro, **kwargs) if previous else asyncio.Task(coro, loop=loop, **kwargs)
+        profile = _active_profile.get()
+        if profile is not None:
+            profile.add_task(task, asyncio.current_task(loop))
+        return task
+
+    task_factory.profiling = True
+    loop.set_task_factory(task_factory)
+
+
+def profiling_available() -> bool:
+    """Whether profiles are captured and served: PROFILING_ENABLED or slow-request capture, with a PROFILING_TOKEN set"""
+    # Without a token the admin endpoints would be open to anyone, so nothing is captured that could not be fetched
+    return bool(settings.PROFILING_TOKEN) and (settings.PROFILING_ENABLED or settings.PROFILE_SLOW_REQUEST_SECONDS > 0)
+
+
+def token_matches(token: Optional[str]) -> bool:
+    """Whether a caller may trigger profiles and use the admin endpoints; nobody may while PROFILING_TOKEN is unset"""
+    if not settings.PROFILING_TOKEN:
+        return False
+    return hmac.compare_digest((token or "").encode(), settings.PROFILING_TOKEN.encode())
+
+
+def _wants_profile(scope, headers: Dict[bytes, bytes]) -> bool:
+    flag = headers.get(b"x-profile", b"").decode("latin-1")
+    query = scope.get("query_string") or b""
+    if not flag and b"profile" in query:
+        flag = parse_qs(query.decode("latin-1")).get("profile", [""])[0]
+    return flag.lower() in ("1", "true", "yes") and token_matches(headers.get(b"x-profile-token", b"").decode("latin-1"))
+
+
+class ProfilingMiddleware:
+    """ASGI middleware sampling a request's stacks when it asks for a profile or runs past the slow-request threshold"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        slow_after = settings.PROFILE_SLOW_REQUEST_SECONDS
+        if scope["type"] != "http" or not profiling_available():
+            await self.app(scope, receive, send)
+            return
+
+        requested = settings.PROFILING_ENABLED and _wants_profile(scope, dict(scope.get("headers") or []))
+        if not requested and slow_after <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        name = f"{scope.get('method', '')} {scope.get('path', '')}"
+        profile = profiler.begin_request(name, "requested" if requested else "slow", delay=0.0 if requested else slow_after)
+
+        async def send_wrapper(message):
+            if requested and message["type"] == "http.response.start":
+                # The profile can be downloaded from /api/admin/profiling/{id} once the response is complete
+                message = {**message, "headers": list(message.get("headers") or []) + [(b"x-profile-id", profile.id.encode())]}
+            await send(message)
+
+        token = _active_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _active_profile.reset(token)
+            profiler.end_request(profile)
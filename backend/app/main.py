@@ -1,10 +1,19 @@
-from fastapi import FastAPI
+import asyncio
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 
 from app.api.endpoints import api_router
 from app.core.config import settings
+from app.core.limits import BodySizeLimitMiddleware
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.profiling import ProfilingMiddleware
+from app.services.cover_letter_queue import cover_letter_queue
+from app.services.llm_client import LLMOverloadedError, LLMUnavailableError, llm_client
+from app.services.pdf_processor import shutdown_process_pool, warm_process_pool
+from app.services.text_preprocessor import token_savings
 
 # Create FastAPI app
 app = FastAPI(
@@ -12,6 +21,9 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json"
 )
 
+# Refuse oversized bodies before they are read into memory or spooled
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=settings.MAX_REQUEST_BYTES)
+
 # Set up CORS
 app.add_middleware(
     CORSMiddleware,
@@ -21,9 +33,55 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record per-route latency, status codes and in-flight requests
+app.add_middleware(MetricsMiddleware)
+
+# Sample stacks of requests that ask for a profile or run past PROFILE_SLOW_REQUEST_SECONDS
+app.add_middleware(ProfilingMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable_handler(request: Request, exc: LLMUnavailableError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+    )
+
+@app.exception_handler(LLMOverloadedError)
+async def llm_overloaded_handler(request: Request, exc: LLMOverloadedError):
+    # Our own queue is full rather than Gemini being down, so tell the client to slow down
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+    )
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "llm": llm_client.stats(), "promptTokens": dict(token_savings)}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of the service metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("startup")
+async def startup():
+    # Runs before the worker accepts connections, so the first requests skip the cold start
+    if settings.STARTUP_WARMUP:
+        await asyncio.gather(
+            asyncio.get_running_loop().run_in_executor(None, warm_process_pool),
+            llm_client.warm_up(send_request=settings.LLM_WARMUP_REQUEST),
+        )
+
+@app.on_event("shutdown")
+async def shutdown():
+    cover_letter_queue.shutdown()
+    shutdown_process_pool()
+
 @app.get("/", response_class=HTMLResponse)
 async def root():
     return """
@@ -54,7 +112,12 @@ async def root():
             
             <div class="endpoint">
                 <h3>GET /api/documents/upload</h3>
-                <p>Upload a resume file (PDF, TXT)</p>
+                <p>Upload a resume file (PDF, DOCX, RTF, TXT). Returns a document ID that other endpoints accept as resume_id</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3>GET /api/documents/{doc_id}</h3>
+                <p>Fetch a previously uploaded document</p>
             </div>
             
             <div class="endpoint">
@@ -72,16 +135,86 @@ async def root():
                 <p>Get missing keywords and suggestions</p>
             </div>
             
+            <div class="endpoint">
+                <h3>POST /api/analysis/keywords/stream</h3>
+                <p>Stream missing keywords and suggestions as server-sent events</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3>POST /api/analysis/full</h3>
+                <p>Get the summary, similarity score and missing keywords in one request</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3>POST /api/analysis/job-profile</h3>
+                <p>Extract the required and preferred skills, seniority and keywords of a job description</p>
+            </div>
+            
             <div class="endpoint">
                 <h3>POST /api/generate/cover-letter</h3>
                 <p>Generate a cover letter based on resume and job description</p>
             </div>
             
+            <div class="endpoint">
+                <h3>POST /api/generate/cover-letter/stream</h3>
+                <p>Stream the cover letter as server-sent events while it is generated</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3>POST /api/generate/cover-letter/jobs</h3>
+                <p>Queue a cover letter with an optional priority and get a job ID back immediately</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3>GET /api/generate/cover-letter/jobs/{job_id}</h3>
+                <p>Check the status of a queued cover letter</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3>GET /api/generate/cover-letter/jobs/{job_id}/result</h3>
+                <p>Fetch the finished cover letter (202 while it is still queued or running)</p>
+            </div>
+            
             <div class="endpoint">
                 <h3>POST /api/generate/download-cover-letter</h3>
                 <p>Download the generated cover letter as a text file</p>
             </div>
             
+            <div class="endpoint">
+                <h3>POST /api/batch/screen</h3>
+                <p>Score many resumes (files, a zip archive or document IDs) against one job description</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3>GET /api/batch/{job_id}</h3>
+                <p>Check progress of a screening job and see the best matches so far</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3>GET /api/batch/{job_id}/results</h3>
+                <p>Stream the ranked screening results as newline-delimited JSON</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3>GET /api/admin/profiling</h3>
+                <p>List the captured request, slow-request and worker profiles (requires PROFILING_TOKEN)</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3>GET /api/admin/profiling/{profile_id}</h3>
+                <p>Download a profile as a speedscope file, or as folded stacks with format=collapsed</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3>POST /api/admin/profiling/start</h3>
+                <p>Start sampling every thread in the worker that handles the request (requires PROFILING_ENABLED)</p>
+            </div>
+            
+            <div class="endpoint">
+                <h3>POST /api/admin/profiling/stop</h3>
+                <p>Stop the worker profile and keep it for download</p>
+            </div>
+            
             <p>For full API documentation, visit <a href="/docs">/docs</a></p>
         </body>
     </html>
@@ -89,5 +222,6 @@ async def root():
 
 # For debugging purposes
 if __name__ == "__main__":
+    # Development server with auto-reload; use `python -m app.server` in production
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
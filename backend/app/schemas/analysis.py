@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
 from typing import Optional, List
 
 class SummaryResponse(BaseModel):
@@ -6,8 +6,52 @@ class SummaryResponse(BaseModel):
 
 class SimilarityResponse(BaseModel):
     similarityScore: str
-    similarityExplanation: str
+    similarityExplanation: str = ""
+
+    @validator("similarityScore", pre=True)
+    def format_score(cls, value):
+        # The model sometimes returns 82, 82.0 or "82" instead of "82%"
+        if value is None:
+            raise ValueError("similarityScore is missing")
+        if isinstance(value, (int, float)):
+            return f"{round(value)}%"
+        value = str(value).strip()
+        if not value.rstrip("%"):
+            raise ValueError("similarityScore is empty")
+        return value if value.endswith("%") else f"{value}%"
+
+def _as_list(value):
+    """Accept a list or a comma or newline separated string"""
+    if isinstance(value, str):
+        value = value.replace("\n", ",").split(",")
+    return [str(item).strip().lstrip("- ") for item in value if str(item).strip()]
 
 class KeywordsResponse(BaseModel):
-    missingKeywords: List[str]
-    optimizationSuggestions: str
\ No newline at end of file
+    missingKeywords: List[str] = []
+    optimizationSuggestions: str = ""
+
+    @validator("missingKeywords", pre=True)
+    def split_keywords(cls, value):
+        return _as_list(value)
+
+    @validator("optimizationSuggestions", pre=True)
+    def join_suggestions(cls, value):
+        if isinstance(value, list):
+            return "\n".join(str(suggestion) for suggestion in value)
+        return value
+
+class JobProfileResponse(BaseModel):
+    title: str = ""
+    seniority: str = ""
+    requiredSkills: List[str] = []
+    preferredSkills: List[str] = []
+    responsibilities: List[str] = []
+    keywords: List[str] = []
+
+    @validator("requiredSkills", "preferredSkills", "responsibilities", "keywords", pre=True)
+    def split_lists(cls, value):
+        return _as_list(value or [])
+
+    @validator("title", "seniority", pre=True)
+    def strip_text(cls, value):
+        return str(value or "").strip()
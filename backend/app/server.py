@@ -0,0 +1,65 @@
+"""Production entry point: python -m app.server [--workers N] [--port 8000] ..."""
+import argparse
+import os
+import tempfile
+
+import uvicorn
+
+from app.core.config import settings
+
+
+def _default_workers() -> int:
+    return settings.SERVER_WORKERS or os.cpu_count() or 1
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the API with multiple worker processes")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=_default_workers())
+    parser.add_argument("--backlog", type=int, default=settings.SERVER_BACKLOG, help="pending connections queued by the kernel")
+    parser.add_argument("--keep-alive", type=int, default=settings.SERVER_KEEP_ALIVE_SECONDS, help="idle keep-alive timeout in seconds")
+    parser.add_argument("--limit-concurrency", type=int, default=settings.SERVER_LIMIT_CONCURRENCY,
+                        help="connections per worker before new requests get 503 (0 is unlimited)")
+    parser.add_argument("--graceful-shutdown", type=int, default=settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+                        help="seconds to let in-flight requests finish on shutdown")
+    parser.add_argument("--shared-state", default=settings.SHARED_STATE_PATH,
+                        help="SQLite file for the cache, document store and quota shared by the workers")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Workers are separate processes, so without a shared file each would get its own cache and a full quota
+    shared_state = args.shared_state
+    if args.workers > 1 and not shared_state:
+        shared_state = os.path.join(tempfile.gettempdir(), "resume-optimizer-state.sqlite3")
+    if shared_state:
+        # Workers are spawned with this environment and read it through Settings
+        os.environ["SHARED_STATE_PATH"] = shared_state
+        print(f"Sharing cache, documents, jobs and LLM quota across workers via {shared_state}")
+
+    # Import once here so configuration or import errors fail before any worker is started
+    import app.main  # noqa: F401
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        limit_concurrency=args.limit_concurrency or None,
+        timeout_graceful_shutdown=args.graceful_shutdown or None,
+        log_level=args.log_level,
+        access_log=not args.no_access_log,
+        proxy_headers=True,
+        reload=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
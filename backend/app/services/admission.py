@@ -0,0 +1,48 @@
+import hashlib
+
+from cachetools import LRUCache
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.llm_client import TokenBucket
+
+client_rejections = registry.counter("client_rate_limited_total", "Requests refused by the per-client rate limit")
+
+
+def client_id(request: Request) -> str:
+    """Identify the caller by API key when one is sent, otherwise by IP address"""
+    api_key = request.headers.get("x-api-key")
+    if api_key:
+        # Keys are only used as bucket names, so keep a digest rather than the secret itself
+        return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+    forwarded = request.headers.get("x-forwarded-for") if settings.TRUST_FORWARDED_FOR else None
+    if forwarded:
+        return "ip:" + forwarded.split(",")[0].strip()
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+
+class ClientRateLimiter:
+    """One token bucket per client, so a single heavy client cannot use up the LLM-backed routes"""
+
+    def __init__(self, requests_per_minute: int, burst: int, max_clients: int):
+        self.rate = requests_per_minute / 60.0
+        self.burst = burst
+        # The least recently seen clients are forgotten first, which only ever gives them a fresh burst
+        self._buckets = LRUCache(maxsize=max_clients)
+
+    def take(self, client: str) -> float:
+        """Take a request token for the client; returns 0, or how many seconds until one is free"""
+        if self.rate <= 0:
+            return 0.0
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+        retry_after = bucket.take()
+        if retry_after:
+            client_rejections.inc()
+        return retry_after
+
+
+client_limiter = ClientRateLimiter(settings.CLIENT_REQUESTS_PER_MINUTE, settings.CLIENT_BURST, settings.CLIENT_MAX_TRACKED)
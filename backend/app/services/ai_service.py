@@ -1,16 +1,136 @@
+import functools
 import json
-import re
-import google.generativeai as genai
-from typing import Dict, Any, List
+from typing import AsyncIterator, Dict, Any, List, Optional
+
+from cachetools import TTLCache
+from pydantic import ValidationError
 
 from app.core.config import settings
+from app.core.metrics import record_error, stage_timer
+from app.schemas.analysis import JobProfileResponse, KeywordsResponse, SimilarityResponse
+from app.services.ats_scorer import build_job_profile
+from app.services.cache import make_cache_key, response_cache
+from app.services.llm_client import LLMUnavailableError, llm_client
+from app.services.model_routing import resolve_route
+from app.services.single_flight import SingleFlight
+from app.services.structured_output import json_output_config, parse_json_object, parse_structured
+from app.services.text_preprocessor import compact_inputs, estimate_tokens, token_savings
+
+# Bump whenever a prompt template changes so stale cached answers are not reused
+PROMPT_VERSION = "2"
+
+
+single_flight = SingleFlight(enabled=settings.COALESCE_ENABLED)
+
+# Job descriptions whose profile extraction just failed; they are prompted in full for a while
+_failed_profiles = TTLCache(maxsize=1024, ttl=settings.JD_PROFILE_RETRY_SECONDS)
+
+
+def _cache_key(operation: str, *texts: str) -> str:
+    # Keyed by the routed model, so batch jobs and interactive calls on different tiers do not share answers
+    return make_cache_key(operation, resolve_route(operation).model, PROMPT_VERSION, *texts)
+
+
+def _coalesced(operation: str):
+    """Concurrent calls with identical inputs share one in-flight request instead of each calling Gemini"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args):
+            parts = (arg if isinstance(arg, str) else json.dumps(arg, sort_keys=True) for arg in args)
+            return await single_flight.do(_cache_key(operation, *parts), lambda: func(*args), operation)
+        return wrapper
+    return decorator
+
 
-# Configure the Gemini API
-genai.configure(api_key=settings.GEMINI_API_KEY)
-model = genai.GenerativeModel(settings.GEMINI_MODEL)
+@_coalesced("jd_profile")
+async def get_job_profile(job_description: str) -> Optional[Dict[str, Any]]:
+    """Extract the requirements of a job description once, for every resume analyzed against it"""
+    cache_key = _cache_key("jd_profile", job_description)
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-def get_resume_summary(resume_text: str) -> str:
+    prompt = f"""
+    You are an expert technical recruiter in the fields of Data Science, Data Analysts, Software Engineering and Electrical Engineering. Extract what this job description asks for.
+
+    Return only a JSON object, with no code fences or other text, with exactly these fields:
+    - title: The job title
+    - seniority: The seniority level, e.g. "Entry-level", "Mid-level", "Senior", "Lead" or "Principal"
+    - requiredSkills: A list of the required skills, tools, degrees and certifications
+    - preferredSkills: A list of the preferred or nice-to-have skills
+    - responsibilities: A list of the main responsibilities, each a short phrase
+    - keywords: A list of other important terms an ATS would look for
+
+    Job Description:
+    {job_description}
+    """
+
+    try:
+        response = await llm_client.generate(prompt, operation="jd_profile", **json_output_config())
+        with stage_timer("response_parse", "jd_profile"):
+            profile = parse_structured(response.text, JobProfileResponse, "jd_profile")
+
+        if profile is None or not (profile.requiredSkills or profile.keywords):
+            return None
+        profile_data = profile.dict()
+        await response_cache.set(cache_key, profile_data)
+        return profile_data
+    except LLMUnavailableError:
+        raise
+    except Exception as e:
+        print(f"Error extracting job profile: {e}")
+        record_error("ai_service", e)
+        return None
+
+
+def format_job_profile(profile: Dict[str, Any]) -> str:
+    """Render a job profile as the compact text prompts use in place of the full JD"""
+    lines = [f"{label}: {profile[field]}" for label, field in (("Title", "title"), ("Seniority", "seniority"))
+             if profile.get(field)]
+    for label, field in (("Required skills", "requiredSkills"), ("Preferred skills", "preferredSkills"),
+                         ("Responsibilities", "responsibilities"), ("Keywords", "keywords")):
+        if profile.get(field):
+            lines.append(f"{label}: {'; '.join(profile[field])}")
+    return "\n".join(lines)
+
+
+async def _job_context(operation: str, job_description: str) -> str:
+    """The JD text to prompt with: its profile when long enough to be worth reducing, otherwise the JD itself"""
+    mode = settings.JD_PROFILE_MODE
+    if mode == "off" or estimate_tokens(job_description) < settings.JD_PROFILE_MIN_TOKENS:
+        return job_description
+
+    if mode == "local":
+        profile = build_job_profile(job_description)
+    else:
+        failure_key = _cache_key("jd_profile", job_description)
+        if failure_key in _failed_profiles:
+            return job_description
+        try:
+            profile = await get_job_profile(job_description)
+        except LLMUnavailableError as e:
+            # The profile only trims the prompt; an overloaded or unavailable model must not fail the request
+            print(f"Error extracting job profile, sending the full job description: {e}")
+            profile = None
+        if profile is None:
+            _failed_profiles[failure_key] = True
+    context = format_job_profile(profile) if profile else ""
+    if not context or estimate_tokens(context) >= estimate_tokens(job_description):
+        return job_description
+
+    token_savings[f"tokensSaved:{operation}"] += estimate_tokens(job_description) - estimate_tokens(context)
+    return context
+
+
+@_coalesced("summary")
+async def get_resume_summary(resume_text: str) -> str:
     """Generate a summary of the resume"""
+    _, resume_text = compact_inputs("summary", "", resume_text)
+    cache_key = _cache_key("summary", resume_text)
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     prompt = f"""
     You are an expert at generating summaries of resumes in the fields of Data Science, Data Analysts, Software Engineering and Electrical Engineering. Provide me a concise 2-3 sentence summary of this resume, highlighting:
     - Overall professional profile and experience level
@@ -22,20 +142,33 @@ def get_resume_summary(resume_text: str) -> str:
     """
 
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        response = await llm_client.generate(prompt, operation="summary")
+        summary = response.text.strip()
+        await response_cache.set(cache_key, summary)
+        return summary
+    except LLMUnavailableError:
+        raise
     except Exception as e:
         print(f"Error generating resume summary: {e}")
+        record_error("ai_service", e)
         return "Unable to generate resume summary."
 
 
-def get_similarity_score(job_description: str, resume_text: str) -> Dict[str, str]:
+@_coalesced("similarity")
+async def get_similarity_score(job_description: str, resume_text: str) -> Dict[str, str]:
     """Calculate similarity score between resume and job description"""
+    job_description, resume_text = compact_inputs("similarity", job_description, resume_text)
+    job_description = await _job_context("similarity", job_description)
+    cache_key = _cache_key("similarity", job_description, resume_text)
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     prompt = f"""
     You are an expert at analyzing resume like an ATS software in fields of Data Science, Data Analysts, Software Engineering and Electrical Engineering. Analyze seriously how well this resume matches the job description.
 
-    Return a JSON object with:
-    - similarityScore: A percentage score of how well the resume matches the job description out of 100
+    Return only a JSON object, with no code fences or other text, with exactly these fields:
+    - similarityScore: A percentage score of how well the resume matches the job description out of 100, e.g. "75%"
     - similarityExplanation: Brief explanation of weaknesses in the match
 
     Job Description:
@@ -46,32 +179,54 @@ def get_similarity_score(job_description: str, resume_text: str) -> Dict[str, st
     """
 
     try:
-        response = model.generate_content(prompt)
-        # Try to extract JSON from the response text
-        json_match = re.search(r'\{[\s\S]*\}', response.text)
-        if json_match:
-            json_str = json_match.group(0)
-            return json.loads(json_str)
+        response = await llm_client.generate(prompt, operation="similarity", **json_output_config())
+        with stage_timer("response_parse", "similarity"):
+            similarity = parse_structured(response.text, SimilarityResponse, "similarity")
+
+        if similarity is not None:
+            similarity_data = similarity.dict()
+            await response_cache.set(cache_key, similarity_data)
+            return similarity_data
         else:
             return {
                 "similarityScore": "0%",
                 "similarityExplanation": "Unable to analyze similarity."
             }
+    except LLMUnavailableError:
+        raise
     except Exception as e:
         print(f"Error calculating similarity: {e}")
+        record_error("ai_service", e)
         return {
             "similarityScore": "0%",
             "similarityExplanation": "Error analyzing similarity."
         }
 
 
-def get_missing_keywords(job_description: str, resume_text: str) -> Dict[str, Any]:
-    """Identify missing keywords and suggest placements"""
-    prompt = f"""
+_KEYWORDS_TASK = """
     Yuu are an expert at ATS Resume Analyzing in the fields of Data Science, Data Analysts, Software Engineering and Electrical Engineering. Analyze the job description and resume to:
     1. Identify important keywords from the job description missing from the resume
     2. Suggest where to naturally add these keywords. Each suggestion should be a separate line.
+"""
+
+
+def _keywords_json_prompt(job_description: str, resume_text: str) -> str:
+    return f"""{_KEYWORDS_TASK}
+    Return only a JSON object, with no code fences or other text, with exactly these fields:
+    - missingKeywords: A list of the missing keywords as strings
+    - optimizationSuggestions: Suggestions for where and how to integrate these keywords, each suggestion on a different line
 
+    Job Description:
+    {job_description}
+
+    Resume:
+    {resume_text}
+    """
+
+
+def _keywords_prompt(job_description: str, resume_text: str) -> str:
+    """Plain text variant for streaming, so the tokens are readable as they arrive"""
+    return f"""{_KEYWORDS_TASK}
     IMPORTANT: Return your response as plain text in this format:
 
     MISSING KEYWORDS:
@@ -89,44 +244,142 @@ def get_missing_keywords(job_description: str, resume_text: str) -> Dict[str, An
     {resume_text}
     """
 
-    try:
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
 
-        # Parse the plain text format instead of JSON
-        keywords = []
-        suggestions = ""
+def parse_missing_keywords(response_text: str) -> Dict[str, Any]:
+    """Parse the MISSING KEYWORDS/SUGGESTIONS plain text format"""
+    response_text = response_text.strip()
 
-        # Extract sections
-        if "MISSING KEYWORDS:" in response_text:
-            parts = response_text.split("SUGGESTIONS:")
+    # Parse the plain text format instead of JSON
+    keywords = []
+    suggestions = ""
 
-            # Extract keywords
-            keywords_section = parts[0].split("MISSING KEYWORDS:")[1].strip()
-            keywords_lines = keywords_section.split("\n")
-            for line in keywords_lines:
-                if line.strip().startswith("- "):
-                    keywords.append(line.strip()[2:])
+    # Extract sections
+    if "MISSING KEYWORDS:" in response_text:
+        parts = response_text.split("SUGGESTIONS:")
 
-            # Extract suggestions
-            if len(parts) > 1:
-                suggestions = parts[1].strip()
+        # Extract keywords
+        keywords_section = parts[0].split("MISSING KEYWORDS:")[1].strip()
+        keywords_lines = keywords_section.split("\n")
+        for line in keywords_lines:
+            if line.strip().startswith("- "):
+                keywords.append(line.strip()[2:])
 
-        return {
-            "missingKeywords": keywords,
-            "optimizationSuggestions": suggestions
-        }
+        # Extract suggestions
+        if len(parts) > 1:
+            suggestions = parts[1].strip()
+
+    return {
+        "missingKeywords": keywords,
+        "optimizationSuggestions": suggestions
+    }
+
+
+@_coalesced("keywords")
+async def get_missing_keywords(job_description: str, resume_text: str) -> Dict[str, Any]:
+    """Identify missing keywords and suggest placements"""
+    job_description, resume_text = compact_inputs("keywords", job_description, resume_text)
+    job_description = await _job_context("keywords", job_description)
+    cache_key = _cache_key("keywords", job_description, resume_text)
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    prompt = _keywords_json_prompt(job_description, resume_text)
+
+    try:
+        response = await llm_client.generate(prompt, operation="keywords", **json_output_config())
+        with stage_timer("response_parse", "keywords"):
+            keywords = parse_structured(response.text, KeywordsResponse, "keywords")
+
+        if keywords is None:
+            return {
+                "missingKeywords": [],
+                "optimizationSuggestions": "Unable to analyze keywords. Please try again."
+            }
+        keywords_data = keywords.dict()
+        await response_cache.set(cache_key, keywords_data)
+        return keywords_data
+    except LLMUnavailableError:
+        raise
     except Exception as e:
         print(f"Error analyzing keywords: {e}")
+        record_error("ai_service", e)
         return {
             "missingKeywords": [],
             "optimizationSuggestions": f"Error analyzing keywords. Please try again."
         }
 
 
-def generate_cover_letter(personal_info: Dict[str, str], company_info: Dict[str, str], 
-                         job_description: str, resume_text: str) -> str:
-    """Generate a cover letter based on resume and job description"""
+async def stream_missing_keywords(job_description: str, resume_text: str) -> AsyncIterator[str]:
+    """Stream the raw keyword analysis text as Gemini produces it"""
+    job_description, resume_text = compact_inputs("keywords", job_description, resume_text)
+    job_description = await _job_context("keywords", job_description)
+    prompt = _keywords_prompt(job_description, resume_text)
+
+    chunks = []
+    async for text in llm_client.stream(prompt, operation="keywords"):
+        chunks.append(text)
+        yield text
+
+    # Let later non-streaming calls reuse the finished analysis, but only a complete one: a garbled or cut-off
+    # stream would otherwise be served from the cache for the whole TTL
+    try:
+        keywords = KeywordsResponse.parse_obj(parse_missing_keywords("".join(chunks)))
+    except ValidationError:
+        return
+    if keywords.missingKeywords and keywords.optimizationSuggestions:
+        await response_cache.set(_cache_key("keywords", job_description, resume_text), keywords.dict())
+
+
+@_coalesced("full")
+async def get_full_analysis(job_description: str, resume_text: str) -> Optional[Dict[str, Any]]:
+    """Run summary, similarity and keyword analysis in one structured prompt"""
+    job_description, resume_text = compact_inputs("full", job_description, resume_text)
+    job_description = await _job_context("full", job_description)
+    cache_key = _cache_key("full", job_description, resume_text)
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    prompt = f"""
+    You are an expert at ATS Resume Analyzing in the fields of Data Science, Data Analysts, Software Engineering and Electrical Engineering. Analyze the resume against the job description.
+
+    Return only a single JSON object, with no code fences or other text, with exactly these fields:
+    - summary: A concise 2-3 sentence summary of the resume covering professional profile, key skills and achievements
+    - similarityScore: A percentage score of how well the resume matches the job description out of 100
+    - similarityExplanation: Brief explanation of weaknesses in the match
+    - missingKeywords: A list of important keywords from the job description missing from the resume
+    - optimizationSuggestions: Suggestions for where and how to integrate these keywords, each suggestion on a different line
+
+    Job Description:
+    {job_description}
+
+    Resume:
+    {resume_text}
+    """
+
+    try:
+        response = await llm_client.generate(prompt, operation="full", **json_output_config())
+        with stage_timer("response_parse", "full"):
+            analysis = parse_json_object(response.text, "full", lambda data: {
+                "summary": str(data.get("summary", "")).strip(),
+                "similarity": SimilarityResponse.parse_obj(data).dict(),
+                "keywords": KeywordsResponse.parse_obj(data).dict(),
+            })
+            if analysis is None:
+                return None
+        await response_cache.set(cache_key, analysis)
+        return analysis
+    except LLMUnavailableError:
+        raise
+    except Exception as e:
+        print(f"Error running combined analysis: {e}")
+        record_error("ai_service", e)
+        return None
+
+
+def _cover_letter_prompt(personal_info: Dict[str, str], company_info: Dict[str, str],
+                        job_description: str, resume_text: str) -> str:
     # Format the personal information for the prompt
     personal_info_formatted = f"""
 Full Name: {personal_info.get('fullName', '')}
@@ -152,7 +405,7 @@ Company Name: {company_info.get('companyName', '')}
     if company_info.get('companyAddress'):
         company_info_formatted += f"Company Address: {company_info.get('companyAddress')}\n"
 
-    prompt = f"""
+    return f"""
     You are an expert cover letter writer in fields of Data Science, Data Analysts, Software Engineering and Electrical Engineering. Write a professional cover letter with:
     - Include the personal information at the top left
     - Include the company information below personal info
@@ -176,9 +429,31 @@ Company Name: {company_info.get('companyName', '')}
     Please format the cover letter properly with the personal information at the top left, company info below it, then a greeting, body paragraphs, and closing.
     """
 
+
+@_coalesced("cover_letter")
+async def generate_cover_letter(personal_info: Dict[str, str], company_info: Dict[str, str], 
+                               job_description: str, resume_text: str) -> str:
+    """Generate a cover letter based on resume and job description"""
+    job_description, resume_text = compact_inputs("cover_letter", job_description, resume_text)
+    job_description = await _job_context("cover_letter", job_description)
+    prompt = _cover_letter_prompt(personal_info, company_info, job_description, resume_text)
+
     try:
-        response = model.generate_content(prompt)
+        response = await llm_client.generate(prompt, operation="cover_letter")
         return response.text.strip()
+    except LLMUnavailableError:
+        raise
     except Exception as e:
         print(f"Error generating cover letter: {e}")
-        return "Unable to generate cover letter."
\ No newline at end of file
+        record_error("ai_service", e)
+        return "Unable to generate cover letter."
+
+
+async def stream_cover_letter(personal_info: Dict[str, str], company_info: Dict[str, str],
+                              job_description: str, resume_text: str) -> AsyncIterator[str]:
+    """Stream the cover letter text as Gemini produces it"""
+    job_description, resume_text = compact_inputs("cover_letter", job_description, resume_text)
+    job_description = await _job_context("cover_letter", job_description)
+    prompt = _cover_letter_prompt(personal_info, company_info, job_description, resume_text)
+    async for text in llm_client.stream(prompt, operation="cover_letter"):
+        yield text
@@ -0,0 +1,287 @@
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+from app.core.metrics import registry
+
+# Bumped whenever the scoring formula changes so stored scores can be compared safely
+SCORER_VERSION = "1"
+
+STOP_WORDS = frozenset("""
+a about above across after again against all also an and any are as at be been before being below between both
+but by can could did do does doing during each either etc few for from further had has have having he her here
+hers him his how i if in into is it its itself just least less like may me more most must my no nor not now of
+off on once only or other our ours out over own per please plus same she should so some such than that the their
+them then there these they this those through to too under until up upon us using very via was we well were what
+when where whether which while who whom why will with within without would you your yours
+ability able across applicant applicants apply candidate candidates company environment equal experience
+excellent including job join looking new opportunity preferred required requirements responsibilities role skills
+strong team work working year years
+""".split())
+
+# Multi-word and symbol-bearing skills for the fields the prompts cover
+SKILL_TERMS = frozenset("""
+a/b testing|agile|airflow|algorithms|analog design|android|angular|ansys|api|apis|arduino|asic|aws|azure|bash
+|bigquery|c#|c++|cadence|ci/cd|circuit design|cloud|communication|computer vision|css|cuda|dashboards|data analysis
+|data engineering|data modeling|data pipelines|data visualization|data warehousing|databricks|deep learning|django
+|docker|dsp|embedded systems|etl|excel|fastapi|feature engineering|flask|fpga|gcp|git|golang|graphql|hadoop|html
+|java|javascript|jenkins|jira|kafka|keras|kubernetes|labview|linux|llm|looker|machine learning|matlab|microservices
+|mlops|mongodb|mysql|natural language processing|nlp|node.js|nosql|numpy|oop|pandas|pcb design|pcb|plc|postgresql
+|power bi|power electronics|power systems|predictive modeling|python|pytorch|react|redis|regression|rest api|rust
+|scala|scikit-learn|scrum|signal processing|simulink|snowflake|spark|spice|sql|statistics|system design|tableau
+|tensorflow|terraform|time series|typescript|unit testing|verilog|vhdl|vlsi
+""".replace("\n", "").split("|"))
+
+# Common resume section headings, matched case-insensitively on a line of their own
+SECTION_HEADINGS = frozenset("""
+summary|profile|professional summary|objective|experience|work experience|professional experience|employment
+|employment history|skills|technical skills|core competencies|education|projects|certifications|publications
+|awards|honors|leadership|activities|volunteering|volunteer experience|interests|languages|research
+""".replace("\n", "").split("|"))
+
+# Lines that mark the skills that follow as optional, and phrases that give away the level of a role
+_PREFERRED_RE = re.compile(r"prefer|nice to have|bonus|a plus|desirable|familiarity with", re.IGNORECASE)
+_SENIORITY_PATTERNS = [
+    ("Principal", re.compile(r"\b(?:principal|staff|distinguished)\b", re.IGNORECASE)),
+    ("Lead", re.compile(r"\b(?:lead|manager|head of)\b", re.IGNORECASE)),
+    ("Senior", re.compile(r"\b(?:senior|sr\.?)\b|\b(?:[5-9]|1\d)\+?\s*years", re.IGNORECASE)),
+    ("Mid-level", re.compile(r"\b(?:mid[- ]level|intermediate)\b|\b[2-4]\+?\s*years", re.IGNORECASE)),
+    ("Entry-level", re.compile(r"\b(?:junior|jr\.?|entry[- ]level|graduate|intern(?:ship)?)\b|\b[01]\+?\s*years", re.IGNORECASE)),
+]
+
+_CHUNK_RE = re.compile(r"[\n;•]+|\.\s+")
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+_SKILL_PATTERNS = [
+    (skill, re.compile(r"(?<![a-z0-9+#])" + re.escape(skill) + r"(?![a-z0-9+#])"))
+    for skill in sorted(SKILL_TERMS, key=len, reverse=True)
+]
+
+# BM25 parameters and the weights used to blend the component scores
+BM25_K1 = 1.2
+BM25_B = 0.75
+SCORE_WEIGHTS = {"skillCoverage": 0.5, "keywordCoverage": 0.3, "tfidfCosine": 0.2}
+
+
+def stem(token: str) -> str:
+    """Light suffix stripping, enough to match 'developed' with 'developing'"""
+    if len(token) <= 4 or not token.isalpha():
+        return token
+    for suffix, replacement in (("ies", "y"), ("ing", ""), ("ed", ""), ("es", ""), ("s", ""), ("ment", ""), ("ly", "")):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[: -len(suffix)] + replacement
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, drop stop words and stem"""
+    return [stem(token) for token in _TOKEN_RE.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def extract_skills(text: str) -> FrozenSet[str]:
+    """Known skill terms mentioned in the text"""
+    lowered = text.lower()
+    return frozenset(skill for skill, pattern in _SKILL_PATTERNS if pattern.search(lowered))
+
+
+def _is_heading(line: str) -> bool:
+    stripped = line.strip().rstrip(":").strip()
+    if not stripped or len(stripped) > 40:
+        return False
+    if stripped.lower() in SECTION_HEADINGS:
+        return True
+    return stripped.isupper() and len(stripped.split()) <= 4 and any(ch.isalpha() for ch in stripped)
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """Split a resume into (name, text) sections at heading lines; text before the first heading is "Header" """
+    sections = [["Header", []]]
+    for line in text.split("\n"):
+        if _is_heading(line):
+            sections.append([line.strip().rstrip(":").strip().title(), []])
+        # The heading stays in its section so the sections add up to the whole text
+        sections[-1][1].append(line)
+    return [(name, "\n".join(lines)) for name, lines in sections if any(line.strip() for line in lines)]
+
+
+@lru_cache(maxsize=16384)
+def _analyze_chunk(chunk: str) -> Tuple[Counter, FrozenSet[str]]:
+    """Term counts and skills of one bullet or sentence, cached by its text so an edit only redoes what changed"""
+    return Counter(tokenize(chunk)), extract_skills(chunk)
+
+
+@lru_cache(maxsize=256)
+def _analyze_sections(text: str) -> Tuple[Tuple[str, Counter, FrozenSet[str], Tuple[Counter, ...]], ...]:
+    """Per-section term counts, skills and per-sentence term counts, built from the cached chunks"""
+    sections = []
+    for name, section_text in split_sections(text):
+        chunks = [_analyze_chunk(chunk) for chunk in _CHUNK_RE.split(section_text) if chunk.strip()]
+        terms = Counter()
+        skills = set()
+        for chunk_terms, chunk_skills in chunks:
+            terms.update(chunk_terms)
+            skills.update(chunk_skills)
+        sections.append((name, terms, frozenset(skills), tuple(chunk_terms for chunk_terms, _ in chunks)))
+    return tuple(sections)
+
+
+@lru_cache(maxsize=256)
+def _analyze(text: str) -> Tuple[Counter, FrozenSet[str], Tuple[Counter, ...]]:
+    """Term counts, skills and per-sentence term counts, cached since one JD is scored against many resumes"""
+    terms = Counter()
+    skills = set()
+    chunks = []
+    for _, section_terms, section_skills, section_chunks in _analyze_sections(text):
+        terms.update(section_terms)
+        skills.update(section_skills)
+        chunks.extend(section_chunks)
+    return terms, frozenset(skills), tuple(chunks)
+
+
+def _idf(chunks: List[Counter]) -> Dict[str, float]:
+    """Smoothed IDF over the sentences of both documents"""
+    document_frequency = Counter()
+    for chunk in chunks:
+        document_frequency.update(chunk.keys())
+    n = len(chunks) or 1
+    return {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()}
+
+
+def _cosine(a: Counter, b: Counter, idf: Dict[str, float]) -> float:
+    weights_a = {term: count * idf.get(term, 0.0) for term, count in a.items()}
+    weights_b = {term: count * idf.get(term, 0.0) for term, count in b.items()}
+    dot = sum(weight * weights_b.get(term, 0.0) for term, weight in weights_a.items())
+    norm = math.sqrt(sum(w * w for w in weights_a.values())) * math.sqrt(sum(w * w for w in weights_b.values()))
+    return dot / norm if norm else 0.0
+
+
+def _bm25(query: Counter, document: Counter, idf: Dict[str, float], avg_length: float) -> float:
+    length = sum(document.values())
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length) if avg_length else BM25_K1
+    score = 0.0
+    for term in query:
+        tf = document.get(term, 0)
+        score += idf.get(term, 0.0) * tf * (BM25_K1 + 1) / (tf + norm)
+    return score
+
+
+def _bm25_coverage(query: Counter, document: Counter, idf: Dict[str, float], avg_length: float) -> float:
+    """BM25 of the resume for the JD terms, relative to the JD scored against itself"""
+    best = _bm25(query, query, idf, avg_length)
+    return min(1.0, _bm25(query, document, idf, avg_length) / best) if best else 0.0
+
+
+def _top_terms(counts: Counter, idf: Dict[str, float], limit: int) -> List[str]:
+    ranked = sorted(counts, key=lambda term: (counts[term] * idf.get(term, 0.0), term), reverse=True)
+    return [term for term in ranked if not term.isdigit() and len(term) > 2][:limit]
+
+
+def analyze_match(job_description: str, resume_text: str) -> Dict[str, Any]:
+    """Compute all component scores for a resume against a job description"""
+    jd_terms, jd_skills, jd_chunks = _analyze(job_description)
+    resume_terms, resume_skills, resume_chunks = _analyze(resume_text)
+
+    idf = _idf(list(jd_chunks + resume_chunks))
+    avg_length = (sum(jd_terms.values()) + sum(resume_terms.values())) / 2
+
+    skill_coverage = len(jd_skills & resume_skills) / len(jd_skills) if jd_skills else 0.0
+    components = {
+        "skillCoverage": skill_coverage,
+        "keywordCoverage": _bm25_coverage(jd_terms, resume_terms, idf, avg_length),
+        "tfidfCosine": _cosine(jd_terms, resume_terms, idf),
+    }
+    # Without recognizable skills, spread the skill weight over the other components
+    weights = dict(SCORE_WEIGHTS)
+    if not jd_skills:
+        spare = weights.pop("skillCoverage")
+        weights = {name: weight + spare / len(weights) for name, weight in weights.items()}
+    score = sum(components[name] * weight for name, weight in weights.items()) * 100
+
+    # Terms already reported as part of a skill are not repeated as loose keywords
+    skill_words = {word for skill in jd_skills for word in tokenize(skill)}
+    top_terms = _top_terms(jd_terms, idf, 40)
+    missing_terms = [term for term in top_terms if term not in resume_terms and term not in skill_words]
+
+    # Where in the resume the job description is covered, so users can see which sections to work on
+    sections = [
+        {
+            "name": name,
+            "matchedSkills": sorted(jd_skills & section_skills),
+            "matchedTerms": sum(1 for term in top_terms if term in section_terms),
+        }
+        for name, section_terms, section_skills, _ in _analyze_sections(resume_text)
+    ]
+
+    return {
+        "score": round(score, 1),
+        "components": {name: round(value, 4) for name, value in components.items()},
+        "matchedSkills": sorted(jd_skills & resume_skills),
+        "missingSkills": sorted(jd_skills - resume_skills),
+        "missingTerms": missing_terms[:15],
+        "sections": sections,
+        "version": SCORER_VERSION,
+    }
+
+
+def score_resume(job_description: str, resume_text: str) -> Dict[str, Any]:
+    """Local similarity score in the same shape as the LLM response"""
+    match = analyze_match(job_description, resume_text)
+
+    explanation = f"Matched {len(match['matchedSkills'])} of {len(match['matchedSkills']) + len(match['missingSkills'])} skills from the job description."
+    if match["missingSkills"]:
+        explanation += f" Missing skills: {', '.join(match['missingSkills'])}."
+    if match["missingTerms"]:
+        explanation += f" Frequent job description terms not found in the resume: {', '.join(match['missingTerms'][:8])}."
+
+    return {
+        "similarityScore": f"{round(match['score'])}%",
+        "similarityExplanation": explanation,
+        "scoreBreakdown": match,
+    }
+
+
+def find_missing_keywords(job_description: str, resume_text: str) -> Dict[str, Any]:
+    """Local keyword gap analysis in the same shape as the LLM response"""
+    match = analyze_match(job_description, resume_text)
+    keywords = match["missingSkills"] + match["missingTerms"]
+
+    suggestions = [f"Add {skill} to your skills section and mention where you have used it." for skill in match["missingSkills"]]
+    suggestions += [f"Work \"{term}\" into a relevant experience bullet if it reflects your background." for term in match["missingTerms"][:5]]
+
+    return {
+        "missingKeywords": keywords,
+        "optimizationSuggestions": "\n".join(suggestions),
+    }
+
+
+def build_job_profile(job_description: str) -> Dict[str, Any]:
+    """Rough JD profile without an LLM call, in the same shape as the LLM job profile"""
+    lines = job_description.split("\n")
+    preferred = extract_skills("\n".join(line for line in lines if _PREFERRED_RE.search(line)))
+    required = extract_skills("\n".join(line for line in lines if not _PREFERRED_RE.search(line)))
+
+    jd_terms, jd_skills, jd_chunks = _analyze(job_description)
+    skill_words = {word for skill in jd_skills for word in tokenize(skill)}
+    keywords = [term for term in _top_terms(jd_terms, _idf(list(jd_chunks)), 30) if term not in skill_words]
+
+    title = next((line.strip() for line in lines if line.strip()), "")
+    seniority = next((level for level, pattern in _SENIORITY_PATTERNS if pattern.search(job_description)), "")
+    return {
+        "title": title if len(title) <= 80 else "",
+        "seniority": seniority,
+        "requiredSkills": sorted(required),
+        "preferredSkills": sorted(preferred - required),
+        "responsibilities": [],
+        "keywords": keywords[:15],
+    }
+
+
+def _chunk_cache_samples():
+    info = _analyze_chunk.cache_info()
+    yield {"cache": "ats_chunks", "result": "hit"}, info.hits
+    yield {"cache": "ats_chunks", "result": "miss"}, info.misses
+
+
+registry.callback("ats_chunk_cache_requests_total", "Local scorer bullet and sentence analysis cache lookups by result",
+                  "counter", _chunk_cache_samples)
@@ -0,0 +1,254 @@
+import asyncio
+import io
+import re
+import time
+import uuid
+import zipfile
+from typing import Any, Dict, List, Optional
+
+from cachetools import TTLCache
+
+from app.core.config import settings
+from app.services.ai_service import get_similarity_score, get_missing_keywords
+from app.services.ats_scorer import analyze_match, find_missing_keywords
+from app.services.document_store import document_id, document_store
+from app.services.llm_client import LLMUnavailableError
+from app.services.model_routing import route_layer
+from app.services.request_context import request_scope
+from app.services.pdf_processor import read_resume_file_async
+from app.services.storage import SqliteStore
+from app.services.uploads import UploadTooLargeError
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.txt', '.rtf', '.docx')
+# How many times a resume waits out an overloaded upstream before it is marked failed
+LLM_UNAVAILABLE_RETRIES = 2
+# A running job's progress is written to the shared store at most this often
+SAVE_INTERVAL_SECONDS = 1.0
+
+# Finished jobs stay pollable until they expire
+_jobs = TTLCache(maxsize=settings.BATCH_MAX_JOBS, ttl=settings.BATCH_JOB_TTL_SECONDS)
+# With shared state, any worker process can answer status and result polls for a job
+_disk = SqliteStore(settings.SHARED_STATE_PATH, "batch_jobs") if settings.SHARED_STATE_PATH else None
+_last_saved: Dict[str, float] = {}
+# Keep references to running jobs so they are not garbage collected mid-flight
+_running_tasks = set()
+
+
+class _RequestPacer:
+    """Spaces out LLM calls so all batch jobs together stay under the per-minute quota"""
+
+    def __init__(self, requests_per_minute: int):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_slot = 0.0
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+
+        now = time.monotonic()
+        delay = self._next_slot - now
+        self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_pacer = _RequestPacer(settings.BATCH_REQUESTS_PER_MINUTE)
+
+
+async def _save(job: Dict[str, Any], throttle: bool = False) -> None:
+    """Publish the job to the shared store; throttled saves skip writes closer together than SAVE_INTERVAL_SECONDS"""
+    _jobs[job["id"]] = job
+    if _disk is None:
+        return
+    now = time.monotonic()
+    if throttle and now - _last_saved.get(job["id"], 0.0) < SAVE_INTERVAL_SECONDS:
+        return
+    _last_saved[job["id"]] = now
+    await asyncio.to_thread(_disk.set, job["id"], job, settings.BATCH_JOB_TTL_SECONDS)
+
+
+def extract_zip_resumes(archive: bytes, max_resumes: int = settings.BATCH_MAX_RESUMES) -> List[Dict[str, Any]]:
+    """Pull every supported resume file out of a zip archive
+
+    Sizes are checked against each entry's declared size before it is decompressed (zipfile never
+    returns more than that), so a zip bomb is refused without being expanded.
+    """
+    resumes = []
+    total_bytes = 0
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        for info in zf.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith('__MACOSX/') or not name.lower().endswith(SUPPORTED_EXTENSIONS):
+                continue
+            if len(resumes) >= max_resumes:
+                raise ValueError(f"A batch can contain at most {max_resumes} resumes")
+            if settings.MAX_UPLOAD_BYTES and info.file_size > settings.MAX_UPLOAD_BYTES:
+                raise UploadTooLargeError(f"{name} is larger than the "
+                                          f"{settings.MAX_UPLOAD_BYTES / (1024 * 1024):.1f} MB limit")
+            total_bytes += info.file_size
+            if settings.MAX_REQUEST_BYTES and total_bytes > settings.MAX_REQUEST_BYTES:
+                raise UploadTooLargeError(f"Archive expands to more than "
+                                          f"{settings.MAX_REQUEST_BYTES / (1024 * 1024):.1f} MB")
+            resumes.append({"name": name.rsplit('/', 1)[-1], "content": zf.read(info)})
+    return resumes
+
+
+def _score_value(similarity_score: Any) -> float:
+    """Turn an LLM score such as '85%' into a number for ranking"""
+    match = re.search(r'\d+(\.\d+)?', str(similarity_score))
+    return float(match.group(0)) if match else 0.0
+
+
+def _ranked(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Best score first; resumes skipped by the local pre-filter rank by their local score"""
+    return sorted(
+        results,
+        key=lambda r: (r.get("score") is not None, r.get("score") or 0.0, r.get("localScore") or 0.0),
+        reverse=True,
+    )
+
+
+async def _screen_resume(job: Dict[str, Any], item: Dict[str, Any], include_keywords: bool,
+                         semaphore: asyncio.Semaphore) -> None:
+    """Parse one resume and score it against the job description"""
+    result = {"name": item["name"], "documentId": item.get("documentId"), "score": None}
+    try:
+        resume_text = item.get("text")
+        if resume_text is None:
+            # Keep the parsed text under the result's documentId, so it can be fetched or re-analyzed later
+            content = item.pop("content")
+            document = await document_store.get(item["documentId"])
+            if document is None:
+                text = await read_resume_file_async(content, item["name"])
+                document = await document_store.put(item["documentId"], item["name"], text)
+            resume_text = document["content"]
+        job["parsed"] += 1
+
+        # Cheap local score first, so weak matches never cost an LLM call
+        local_match = analyze_match(job["jobDescription"], resume_text)
+        result["localScore"] = local_match["score"]
+
+        if job["mode"] == "fast":
+            result["score"] = local_match["score"]
+            if include_keywords:
+                result.update(find_missing_keywords(job["jobDescription"], resume_text))
+        elif job["minLocalScore"] is not None and local_match["score"] < job["minLocalScore"]:
+            result["skipped"] = True
+        else:
+            await _screen_with_llm(job, resume_text, include_keywords, semaphore, result)
+
+        job["completed"] += 1
+    except Exception as e:
+        print(f"Error screening {item['name']}: {e}")
+        result["error"] = str(e)
+        job["failed"] += 1
+
+    job["results"].append(result)
+    await _save(job, throttle=True)
+
+
+async def _screen_with_llm(job: Dict[str, Any], resume_text: str, include_keywords: bool,
+                           semaphore: asyncio.Semaphore, result: Dict[str, Any]) -> None:
+    """Score one parsed resume with the LLM, filling in result"""
+    for attempt in range(LLM_UNAVAILABLE_RETRIES + 1):
+        try:
+            async with semaphore:
+                await _pacer.wait()
+                similarity = await get_similarity_score(job["jobDescription"], resume_text)
+                result.update(similarity)
+                result["score"] = _score_value(similarity.get("similarityScore"))
+
+                if include_keywords:
+                    await _pacer.wait()
+                    result.update(await get_missing_keywords(job["jobDescription"], resume_text))
+            return
+        except LLMUnavailableError as e:
+            # Back off outside the semaphore so other resumes are not held up
+            if attempt == LLM_UNAVAILABLE_RETRIES:
+                raise
+            await asyncio.sleep(e.retry_after)
+
+
+async def _run_job(job: Dict[str, Any], resumes: List[Dict[str, Any]], include_keywords: bool) -> None:
+    job["status"] = "running"
+    await _save(job)
+    semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+    try:
+        # Screening calls run on the "batch" model route and queue behind interactive calls;
+        # the tasks below inherit both, and the submitting client, from this context
+        with route_layer("batch"), request_scope(priority="batch"):
+            await asyncio.gather(*(_screen_resume(job, item, include_keywords, semaphore) for item in resumes))
+        job["status"] = "completed"
+    except Exception as e:
+        print(f"Error running batch job {job['id']}: {e}")
+        job["status"] = "failed"
+        job["error"] = str(e)
+    finally:
+        job["finishedAt"] = time.time()
+        await _save(job)
+        _last_saved.pop(job["id"], None)
+
+
+async def create_batch_job(job_description: str, resumes: List[Dict[str, Any]], include_keywords: bool = False,
+                     mode: str = "llm", min_local_score: Optional[float] = None) -> Dict[str, Any]:
+    """Register a screening job and start it in the background
+
+    Each resume is a dict with a "name" and either raw file "content" or already parsed "text".
+    In "fast" mode only the local scorer runs; otherwise resumes whose local score is below
+    min_local_score are skipped before any LLM call.
+    """
+    if len(resumes) > settings.BATCH_MAX_RESUMES:
+        raise ValueError(f"A batch can contain at most {settings.BATCH_MAX_RESUMES} resumes")
+
+    for item in resumes:
+        if "content" in item:
+            item.setdefault("documentId", document_id(item["content"]))
+
+    job = {
+        "id": uuid.uuid4().hex,
+        "status": "queued",
+        "jobDescription": job_description,
+        "mode": mode,
+        "minLocalScore": min_local_score,
+        "total": len(resumes),
+        "parsed": 0,
+        "completed": 0,
+        "failed": 0,
+        "createdAt": time.time(),
+        "finishedAt": None,
+        "results": [],
+    }
+    await _save(job)
+
+    task = asyncio.create_task(_run_job(job, resumes, include_keywords))
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
+    return job_status(job)
+
+
+async def get_batch_job(job_id: str) -> Optional[Dict[str, Any]]:
+    job = _jobs.get(job_id)
+    if job is None and _disk is not None:
+        job = await asyncio.to_thread(_disk.get, job_id)
+    return job
+
+
+def job_status(job: Dict[str, Any], top: int = 10) -> Dict[str, Any]:
+    """Progress summary with the best-ranked results so far"""
+    done = job["completed"] + job["failed"]
+    return {
+        "id": job["id"],
+        "status": job["status"],
+        "total": job["total"],
+        "parsed": job["parsed"],
+        "completed": job["completed"],
+        "failed": job["failed"],
+        "progress": done / job["total"] if job["total"] else 1.0,
+        "createdAt": job["createdAt"],
+        "finishedAt": job["finishedAt"],
+        "top": _ranked(job["results"])[:top],
+    }
+
+
+def ranked_results(job: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return _ranked(job["results"])
@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import re
+import threading
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.storage import SqliteStore
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different inputs share a cache entry"""
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def make_cache_key(operation: str, model_name: str, prompt_version: str, *parts: str) -> str:
+    """Build a content-addressed key from the operation and its normalized inputs"""
+    digest = hashlib.sha256()
+    for field in (operation, model_name, prompt_version, *parts):
+        digest.update(normalize_text(field).encode("utf-8"))
+        digest.update(b"\x00")
+    return f"{operation}:{digest.hexdigest()}"
+
+
+class ResponseCache:
+    """In-process LRU+TTL cache with an optional SQLite tier that survives restarts"""
+
+    def __init__(self, maxsize: int, ttl: float, sqlite_path: Optional[str] = None, enabled: bool = True):
+        self.enabled = enabled
+        self.ttl = ttl
+        self._memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._disk = SqliteStore(sqlite_path, "llm_responses") if sqlite_path else None
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            value = self._memory.get(key)
+        if value is None and self._disk is not None:
+            # SQLite can wait on another worker's write lock, which must not stall the event loop
+            value = await asyncio.to_thread(self._disk.get, key)
+            if value is not None:
+                with self._lock:
+                    self._memory[key] = value
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._memory[key] = value
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.set, key, value, self.ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": self.hits / total if total else 0.0,
+            "entries": len(self._memory),
+        }
+
+
+response_cache = ResponseCache(
+    maxsize=settings.CACHE_MAX_ENTRIES,
+    ttl=settings.CACHE_TTL_SECONDS,
+    sqlite_path=settings.CACHE_SQLITE_PATH or settings.SHARED_STATE_PATH or None,
+    enabled=settings.CACHE_ENABLED,
+)
+
+
+def _cache_samples():
+    stats = response_cache.stats()
+    yield {"cache": "llm_response", "result": "hit"}, stats["hits"]
+    yield {"cache": "llm_response", "result": "miss"}, stats["misses"]
+
+
+registry.callback("cache_requests_total", "Cache lookups by result", "counter", _cache_samples)
+registry.callback("cache_hit_ratio", "Share of cache lookups that were hits", "gauge",
+                  lambda: [({"cache": "llm_response"}, response_cache.stats()["hitRatio"])])
@@ -0,0 +1,153 @@
+import asyncio
+import itertools
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from cachetools import TTLCache
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.ai_service import generate_cover_letter
+from app.services.llm_client import LLMUnavailableError
+from app.services.request_context import current_client, request_scope
+from app.services.storage import SqliteStore
+
+# Lower value runs first
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+# LLM scheduling class per job priority; only high priority jobs compete with interactive requests
+PRIORITY_CLASSES = {"high": "interactive", "normal": "batch", "low": "batch"}
+
+cover_letter_jobs = registry.counter("cover_letter_jobs_total", "Cover letter jobs by outcome", ("status",))
+
+
+class QueueFullError(Exception):
+    """The queue is at its maximum depth; the client should retry after retry_after seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CoverLetterQueue:
+    """Bounded priority queue of cover letter jobs, drained by a fixed pool of worker tasks"""
+
+    def __init__(self, workers: int, max_depth: int, max_jobs: int, ttl: float, sqlite_path: Optional[str] = None):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.ttl = ttl
+        self._jobs = TTLCache(maxsize=max_jobs, ttl=ttl)
+        # With shared state, any worker process can answer status polls for a job
+        self._disk = SqliteStore(sqlite_path, "cover_letter_jobs") if sqlite_path else None
+        # Created on first submit so they bind to the running event loop
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Keeps FIFO order within a priority
+        self._sequence = itertools.count()
+        # Moving average of generation time, used to estimate Retry-After
+        self._average_seconds = 10.0
+
+    def _start(self) -> asyncio.PriorityQueue:
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        return self._queue
+
+    async def _save(self, job: Dict[str, Any]) -> None:
+        self._jobs[job["id"]] = job
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.set, job["id"], job, self.ttl)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is None and self._disk is not None:
+            job = await asyncio.to_thread(self._disk.get, job_id)
+        return job
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def retry_after(self) -> float:
+        """Rough time for the workers to work through the current backlog"""
+        return max(1.0, self._average_seconds * self.depth() / max(1, self.workers))
+
+    async def submit(self, personal_info: Dict[str, str], company_info: Dict[str, str], job_description: str,
+               resume_text: str, priority: str = "normal") -> Dict[str, Any]:
+        """Queue a cover letter and return its job record immediately"""
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of: {', '.join(PRIORITIES)}")
+
+        queue = self._start()
+        if queue.qsize() >= self.max_depth:
+            cover_letter_jobs.inc(status="rejected")
+            raise QueueFullError("Too many cover letters are queued. Please try again shortly.",
+                                 retry_after=self.retry_after())
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "priority": priority,
+            "createdAt": time.time(),
+            "startedAt": None,
+            "finishedAt": None,
+            "result": None,
+            "error": None,
+        }
+        await self._save(job)
+        payload = (personal_info, company_info, job_description, resume_text)
+        # Workers outlive the request, so carry the submitting client along for fair queueing
+        queue.put_nowait((PRIORITIES[priority], next(self._sequence), job["id"], (current_client(), payload)))
+        cover_letter_jobs.inc(status="submitted")
+        return job
+
+    async def _run(self, job: Dict[str, Any], payload) -> None:
+        job["status"] = "running"
+        job["startedAt"] = time.time()
+        await self._save(job)
+        try:
+            letter_text = await generate_cover_letter(*payload)
+            job["status"] = "completed"
+            job["result"] = {"coverLetter": letter_text}
+        except LLMUnavailableError as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+            job["retryAfter"] = e.retry_after
+        except Exception as e:
+            print(f"Error generating queued cover letter {job['id']}: {e}")
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finishedAt"] = time.time()
+            self._average_seconds = 0.8 * self._average_seconds + 0.2 * (job["finishedAt"] - job["startedAt"])
+            cover_letter_jobs.inc(status=job["status"])
+            # Finished results expire ttl seconds from now
+            await self._save(job)
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job_id, (client, payload) = await self._queue.get()
+            try:
+                job = await self.get(job_id)
+                if job is not None:
+                    with request_scope(priority=PRIORITY_CLASSES[job["priority"]], client=client):
+                        await self._run(job, payload)
+            finally:
+                self._queue.task_done()
+
+    def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._queue = None
+
+
+cover_letter_queue = CoverLetterQueue(
+    workers=settings.COVER_LETTER_WORKERS,
+    max_depth=settings.COVER_LETTER_QUEUE_MAX_DEPTH,
+    max_jobs=settings.COVER_LETTER_MAX_JOBS,
+    ttl=settings.COVER_LETTER_JOB_TTL_SECONDS,
+    sqlite_path=settings.SHARED_STATE_PATH or None,
+)
+
+registry.callback("cover_letter_queue_depth", "Cover letter jobs waiting for a worker", "gauge",
+                  lambda: [({}, cover_letter_queue.depth())])
@@ -0,0 +1,63 @@
+import asyncio
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+from cachetools import LRUCache
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services.storage import SqliteStore
+
+
+def document_id(file_content: bytes) -> str:
+    """Content-hash ID, so re-uploading the same file maps to the same document"""
+    return hashlib.sha256(file_content).hexdigest()
+
+
+class DocumentStore:
+    """Parsed resume text kept in a bounded LRU, with an optional SQLite tier"""
+
+    def __init__(self, maxsize: int, ttl: float, sqlite_path: Optional[str] = None):
+        self.ttl = ttl
+        self._memory = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._disk = SqliteStore(sqlite_path, "documents") if sqlite_path else None
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            document = self._memory.get(doc_id)
+        if document is None and self._disk is not None:
+            document = await asyncio.to_thread(self._disk.get, doc_id)
+            if document is not None:
+                with self._lock:
+                    self._memory[doc_id] = document
+
+        if document is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return document
+
+    async def put(self, doc_id: str, filename: Optional[str], content: str) -> Dict[str, Any]:
+        document = {"id": doc_id, "filename": filename, "content": content}
+        with self._lock:
+            self._memory[doc_id] = document
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.set, doc_id, document, self.ttl)
+        return document
+
+
+document_store = DocumentStore(
+    maxsize=settings.DOCUMENT_STORE_MAX_ENTRIES,
+    ttl=settings.DOCUMENT_STORE_TTL_SECONDS,
+    sqlite_path=settings.DOCUMENT_STORE_SQLITE_PATH or settings.SHARED_STATE_PATH or None,
+)
+
+
+registry.callback(
+    "document_store_requests_total", "Parsed resume store lookups by result", "counter",
+    lambda: [({"result": "hit"}, document_store.hits), ({"result": "miss"}, document_store.misses)],
+)
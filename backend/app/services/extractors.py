@@ -0,0 +1,209 @@
+import io
+import re
+import zipfile
+from typing import Callable, Dict, Optional, Union
+from xml.etree import ElementTree
+
+PDF = "application/pdf"
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+RTF = "application/rtf"
+ZIP = "application/zip"
+TEXT = "text/plain"
+UNKNOWN = "application/octet-stream"
+
+# Leading bytes that identify the formats we can read, checked before trusting the filename
+_MAGIC_TYPES = (
+    (b"%PDF-", PDF),
+    (b"PK\x03\x04", ZIP),
+    (b"{\\rtf", RTF),
+)
+
+# A document.xml this large is a zip bomb or not a resume
+MAX_DOCX_XML_BYTES = 50 * 1024 * 1024
+
+Extractor = Callable[[Union[bytes, memoryview]], str]
+_extractors: Dict[str, Extractor] = {}
+
+
+def sniff_mime_type(head: bytes) -> str:
+    """MIME type from the first bytes of a file; zip containers are told apart by detect_mime_type"""
+    for magic, mime_type in _MAGIC_TYPES:
+        if head.startswith(magic):
+            return mime_type
+    # Anything else without NUL bytes is text: UTF-8, or a legacy encoding such as cp1252 or Latin-1
+    if b"\x00" in head[:64]:
+        return UNKNOWN
+    return TEXT
+
+
+def _as_file(content):
+    return io.BytesIO(content) if isinstance(content, (bytes, bytearray)) else content
+
+
+def detect_mime_type(content) -> str:
+    """MIME type of a whole file, looking inside zip containers for Word documents"""
+    mime_type = sniff_mime_type(content[:64])
+    if mime_type == ZIP:
+        try:
+            with zipfile.ZipFile(_as_file(content)) as archive:
+                if "word/document.xml" in archive.namelist():
+                    return DOCX
+        except zipfile.BadZipFile:
+            return UNKNOWN
+    return mime_type
+
+
+def register_extractor(mime_type: str, extractor: Optional[Extractor] = None):
+    """Register the text extractor for a MIME type; usable as a decorator"""
+    if extractor is not None:
+        _extractors[mime_type] = extractor
+        return extractor
+
+    def decorator(func: Extractor) -> Extractor:
+        _extractors[mime_type] = func
+        return func
+    return decorator
+
+
+def get_extractor(mime_type: str) -> Optional[Extractor]:
+    return _extractors.get(mime_type)
+
+
+def supported_mime_types():
+    return sorted(_extractors)
+
+
+@register_extractor(TEXT)
+def extract_plain_text(content) -> str:
+    try:
+        return str(content, "utf-8-sig")
+    except UnicodeDecodeError:
+        # Resumes exported from Windows tools are often cp1252, which also reads Latin-1 text correctly
+        return str(content, "cp1252", errors="replace")
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DOCX_BREAKS = {_W + "tab": "\t", _W + "br": "\n", _W + "cr": "\n"}
+
+
+@register_extractor(DOCX)
+def extract_docx_text(content) -> str:
+    """Text of a .docx, streamed paragraph by paragraph from word/document.xml"""
+    lines = []
+    with zipfile.ZipFile(_as_file(content)) as archive:
+        if archive.getinfo("word/document.xml").file_size > MAX_DOCX_XML_BYTES:
+            raise ValueError("Word document is too large to extract")
+        with archive.open("word/document.xml") as xml:
+            parts = []
+            for _, element in ElementTree.iterparse(xml, events=("end",)):
+                tag = element.tag
+                if tag == _W + "t":
+                    parts.append(element.text or "")
+                elif tag in _DOCX_BREAKS:
+                    parts.append(_DOCX_BREAKS[tag])
+                elif tag == _W + "p":
+                    lines.append("".join(parts))
+                    parts = []
+                    # Drop the finished paragraph so memory stays flat on long documents
+                    element.clear()
+    return "\n".join(lines)
+
+
+_RTF_TOKEN_RE = re.compile(
+    r"\\([a-zA-Z]{1,32})(-?\d{1,10})? ?"  # control word with optional numeric parameter
+    r"|\\'([0-9a-fA-F]{2})"               # hex-escaped byte in the document code page
+    r"|\\(.)"                             # control symbol
+    r"|([{}])"                            # group start or end
+    r"|[\r\n]+"                           # raw line breaks carry no meaning
+    r"|([^\\{}\r\n]+)",                   # plain text
+    re.DOTALL,
+)
+
+# Groups whose content is formatting, metadata or embedded objects rather than text
+_RTF_DESTINATIONS = frozenset("""
+author buptim colortbl comment company creatim datastore doccomm fldinst filetbl fonttbl footer footerf footerl
+footerr generator header headerf headerl headerr info keywords latentstyles listoverridetable listtable listtext
+object operator pict printim private revtbl revtim rsidtbl stylesheet subject template themedata title userprops
+xmlnstbl
+""".split())
+
+_RTF_SPECIAL = {
+    "par": "\n", "line": "\n", "row": "\n", "sect": "\n\n", "page": "\n\n", "tab": "\t", "cell": "\t",
+    "emdash": "\u2014", "endash": "\u2013", "bullet": "\u2022", "lquote": "\u2018", "rquote": "\u2019",
+    "ldblquote": "\u201c", "rdblquote": "\u201d", "emspace": " ", "enspace": " ", "qmspace": " ",
+}
+_RTF_SYMBOLS = {"~": "\u00a0", "_": "-", "-": "", "\n": "\n", "\r": "\n", "\\": "\\", "{": "{", "}": "}"}
+
+
+def rtf_to_text(rtf: str) -> str:
+    """Plain text of an RTF document, dropping control words and non-text groups"""
+    out = []
+    hex_bytes = bytearray()
+    codec = "cp1252"
+    stack = []
+    ignorable = False
+    # Characters to drop after a \u escape, which RTF follows with a fallback for old readers
+    uc_skip, skip = 1, 0
+
+    def flush_hex():
+        if hex_bytes:
+            try:
+                out.append(hex_bytes.decode(codec, errors="replace"))
+            except LookupError:
+                out.append(hex_bytes.decode("cp1252", errors="replace"))
+            hex_bytes.clear()
+
+    for match in _RTF_TOKEN_RE.finditer(rtf):
+        word, arg, hex_code, symbol, brace, text = match.groups()
+        if hex_code is None:
+            flush_hex()
+
+        if brace is not None:
+            skip = 0
+            if brace == "{":
+                stack.append((uc_skip, ignorable))
+            elif stack:
+                uc_skip, ignorable = stack.pop()
+        elif word is not None:
+            skip = 0
+            if word == "ansicpg" and arg:
+                codec = f"cp{arg}"
+            elif word in _RTF_DESTINATIONS:
+                ignorable = True
+            elif ignorable:
+                continue
+            elif word in _RTF_SPECIAL:
+                out.append(_RTF_SPECIAL[word])
+            elif word == "uc" and arg:
+                uc_skip = int(arg)
+            elif word == "u" and arg:
+                code = int(arg)
+                out.append(chr(code + 65536 if code < 0 else code))
+                skip = uc_skip
+        elif symbol is not None:
+            skip = 0
+            if symbol == "*":
+                ignorable = True
+            elif not ignorable and symbol in _RTF_SYMBOLS:
+                out.append(_RTF_SYMBOLS[symbol])
+        elif hex_code is not None:
+            if skip:
+                skip -= 1
+            elif not ignorable:
+                hex_bytes.append(int(hex_code, 16))
+        elif text is not None:
+            if skip:
+                dropped = min(skip, len(text))
+                text, skip = text[dropped:], skip - dropped
+            if not ignorable:
+                out.append(text)
+    flush_hex()
+
+    text = "".join(out)
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(line.rstrip() for line in text.split("\n"))).strip()
+
+
+@register_extractor(RTF)
+def extract_rtf_text(content) -> str:
+    # RTF is 7-bit; anything outside ASCII arrives as \' or \u escapes
+    return rtf_to_text(str(content, "latin-1"))
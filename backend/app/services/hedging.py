@@ -0,0 +1,87 @@
+import math
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from app.core.config import settings
+
+
+class LatencyWindow:
+    """Latencies of the most recent successful calls, for percentile lookups"""
+
+    def __init__(self, size: int):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile, or None before any samples"""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+class Hedger:
+    """Decides when a slow LLM call gets a duplicate, within a budget of extra calls"""
+
+    def __init__(self, percentile: float, budget_ratio: float, max_in_flight: int, min_samples: int,
+                 min_delay: float, window_size: int = 200):
+        self.percentile = percentile
+        self.budget_ratio = budget_ratio
+        self.max_in_flight = max_in_flight
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.window_size = window_size
+        self.in_flight = 0
+        # Every call earns budget_ratio of a hedge, so hedges stay a fixed share of traffic; bursts are capped
+        self._tokens = 0.0
+        self._windows: Dict[str, LatencyWindow] = {}
+
+    def _window(self, operation: str) -> LatencyWindow:
+        if operation not in self._windows:
+            self._windows[operation] = LatencyWindow(self.window_size)
+        return self._windows[operation]
+
+    def hedges(self, operation: str) -> bool:
+        """Whether calls for this operation may be hedged at all"""
+        return operation in settings.LLM_HEDGE_OPERATIONS and self.budget_ratio > 0
+
+    def record(self, operation: str, seconds: float) -> None:
+        """Remember a call's latency; only operations that can be hedged keep a window"""
+        if self.hedges(operation):
+            self._window(operation).add(seconds)
+
+    def _hedge_delay(self, window: LatencyWindow) -> Optional[float]:
+        if len(window) < self.min_samples:
+            return None
+        return max(self.min_delay, window.percentile(self.percentile))
+
+    def delay(self, operation: str) -> Optional[float]:
+        """How long to wait before hedging this call, or None if it should not be hedged"""
+        if not self.hedges(operation):
+            return None
+        self._tokens = min(self._tokens + self.budget_ratio, max(1.0, self.max_in_flight))
+        return self._hedge_delay(self._window(operation))
+
+    def try_start(self) -> bool:
+        """Claim budget for one hedge"""
+        if self._tokens < 1 or self.in_flight >= self.max_in_flight:
+            return False
+        self._tokens -= 1
+        self.in_flight += 1
+        return True
+
+    def finish(self) -> None:
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, object]:
+        delays = {}
+        for operation, window in self._windows.items():
+            delay = self._hedge_delay(window) if self.hedges(operation) else None
+            if delay is not None:
+                delays[operation] = delay
+        return {"inFlight": self.in_flight, "budget": round(self._tokens, 2), "delays": delays}
@@ -0,0 +1,595 @@
+import asyncio
+import heapq
+import itertools
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import llm_tokens, record_error, registry, stage_timer
+from app.services.hedging import Hedger
+from app.services.model_routing import ModelRoute, resolve_route, routed_models
+from app.services.request_context import current_client, current_priority
+from app.services.text_preprocessor import estimate_tokens
+
+
+# The Gemini SDK pulls in grpc and protobuf, which is most of the app's import time,
+# so it is only loaded when the model is first needed or warmed up at startup
+@lru_cache(maxsize=None)
+def retryable_errors() -> Tuple[type, ...]:
+    """Upstream errors worth retrying: quota, overload and transient server failures"""
+    from google.api_core import exceptions as google_exceptions
+
+    return (
+        google_exceptions.TooManyRequests,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+        google_exceptions.GatewayTimeout,
+        google_exceptions.DeadlineExceeded,
+        asyncio.TimeoutError,
+    )
+
+
+def create_gemini_model(name: str) -> Any:
+    """Configure the Gemini SDK and build the named model"""
+    import google.generativeai as genai
+
+    genai.configure(api_key=settings.GEMINI_API_KEY)
+    return genai.GenerativeModel(name)
+
+
+class LLMUnavailableError(Exception):
+    """Gemini cannot serve the request right now; callers should retry after retry_after seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMOverloadedError(LLMUnavailableError):
+    """Too many calls of this priority are already queued; the client should back off for retry_after seconds"""
+
+
+class TokenBucket:
+    """Async token bucket that paces requests to the configured quota"""
+
+    def __init__(self, rate_per_second: float, capacity: int):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def take(self) -> float:
+        """Take a token if one is free; otherwise return how long until one will be"""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.rate
+        self._tokens -= 1
+        return 0.0
+
+    async def try_acquire(self) -> bool:
+        """Take a token only if one is free right now"""
+        return not self.take()
+
+    async def acquire(self) -> float:
+        """Wait for a token and return how long the caller was held back"""
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return waited
+            delay = (1 - self._tokens) / self.rate
+            waited += delay
+            await asyncio.sleep(delay)
+
+
+class SharedTokenBucket(TokenBucket):
+    """Token bucket kept in SQLite so every worker process draws from one request quota"""
+
+    def __init__(self, rate_per_second: float, capacity: int, path: str, name: str = "gemini"):
+        super().__init__(rate_per_second, capacity)
+        self.name = name
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits "
+                "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _tokens_at(self, now: float):
+        row = self._conn.execute("SELECT tokens, updated FROM rate_limits WHERE name = ?", (self.name,)).fetchone()
+        if row is None:
+            return float(self.capacity)
+        return min(self.capacity, row[0] + max(0.0, now - row[1]) * self.rate)
+
+    def _take(self) -> float:
+        """Take a token if one is free; otherwise return how long until one will be"""
+        with self._lock:
+            # BEGIN IMMEDIATE holds the write lock across the read-modify-write, across processes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                tokens = self._tokens_at(now)
+                delay = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+                if not delay:
+                    tokens -= 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits (name, tokens, updated) VALUES (?, ?, ?)",
+                    (self.name, tokens, now),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return delay
+
+    def available(self) -> float:
+        with self._lock:
+            return self._tokens_at(time.time())
+
+    async def try_acquire(self) -> bool:
+        if self.rate <= 0:
+            return True
+        return not await asyncio.to_thread(self._take)
+
+    async def acquire(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            delay = await asyncio.to_thread(self._take)
+            if not delay:
+                return waited
+            waited += delay
+            await asyncio.sleep(delay)
+
+
+def _make_bucket() -> TokenBucket:
+    rate = settings.LLM_REQUESTS_PER_MINUTE / 60.0
+    if settings.SHARED_STATE_PATH:
+        return SharedTokenBucket(rate, settings.LLM_BURST, settings.SHARED_STATE_PATH)
+    return TokenBucket(rate, settings.LLM_BURST)
+
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures, then lets a single probe through"""
+
+    def __init__(self, failure_threshold: int, recovery_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.recovery_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == "open" and self.retry_after() <= 0:
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+        return self.state == "closed"
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """The probe ended without telling us anything about upstream health"""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+
+class FairScheduler:
+    """LLM call slots shared by weighted fair queueing across (priority class, client) flows
+
+    Each waiting call gets a virtual finish time of max(now, its flow's last finish) + 1 / weight, and freed slots
+    go to the earliest finish time. A busy client only delays its own later calls, and interactive calls overtake
+    batch calls in proportion to the class weights.
+    """
+
+    def __init__(self, capacity: int, weights: Dict[str, float], max_depth: Dict[str, int]):
+        self.capacity = capacity
+        self.weights = weights
+        self.max_depth = max_depth
+        self.active = 0
+        self.waiting = Counter()
+        self._heap: List[Tuple[float, int, float, asyncio.Future]] = []
+        self._finish: Dict[Tuple[str, str], float] = {}
+        self._virtual_time = 0.0
+        self._sequence = itertools.count()
+        # Moving average of how long a call holds its slot, used to estimate Retry-After
+        self._average_hold = 1.0
+
+    def retry_after(self, priority: str) -> float:
+        """Rough time for the calls already queued ahead in this class to get a slot"""
+        return max(1.0, self.waiting[priority] * self._average_hold / max(1, self.capacity))
+
+    def _tag(self, priority: str, client: str) -> Tuple[float, float]:
+        flow = (priority, client)
+        start = max(self._virtual_time, self._finish.get(flow, 0.0))
+        finish = start + 1.0 / self.weights.get(priority, 1.0)
+        self._finish[flow] = finish
+        if len(self._finish) > 10000:
+            # Flows that have fallen behind the virtual clock start from it anyway
+            self._finish = {key: value for key, value in self._finish.items() if value > self._virtual_time}
+        return start, finish
+
+    async def acquire(self, priority: str, client: str) -> None:
+        # Cancelled waiters stay in the heap until popped, so count live waiters instead
+        if self.active < self.capacity and not any(self.waiting.values()):
+            start, _ = self._tag(priority, client)
+            self.active += 1
+            self._virtual_time = max(self._virtual_time, start)
+            return
+
+        max_depth = self.max_depth.get(priority, 0)
+        if max_depth and self.waiting[priority] >= max_depth:
+            raise LLMOverloadedError("Too many requests are waiting for the AI service. Please try again shortly.",
+                                     retry_after=self.retry_after(priority))
+
+        start, finish = self._tag(priority, client)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (finish, next(self._sequence), start, future))
+        self.waiting[priority] += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been handed over just as the caller gave up
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        finally:
+            self.waiting[priority] -= 1
+
+    def release(self, held: Optional[float] = None) -> None:
+        if held is not None:
+            self._average_hold = 0.9 * self._average_hold + 0.1 * held
+        while self._heap:
+            _, _, start, future = heapq.heappop(self._heap)
+            if not future.done():
+                self._virtual_time = max(self._virtual_time, start)
+                future.set_result(None)
+                return
+        self.active -= 1
+
+
+class LLMClient:
+    """Shared Gemini client with concurrency limits, rate limiting, retries and a circuit breaker per model"""
+
+    def __init__(self, model_factory: Callable[[str], Any]):
+        self._models: Dict[str, Any] = {}
+        self._model_factory = model_factory
+        self._model_lock = threading.Lock()
+        self.bucket = _make_bucket()
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.counters = Counter()
+        self.in_flight = 0
+        self.waiting = 0
+        self.scheduler = FairScheduler(settings.LLM_MAX_CONCURRENCY, settings.LLM_PRIORITY_WEIGHTS,
+                                       settings.LLM_QUEUE_MAX_DEPTH)
+        self.hedger = Hedger(settings.LLM_HEDGE_PERCENTILE, settings.LLM_HEDGE_BUDGET, settings.LLM_HEDGE_MAX_IN_FLIGHT,
+                             settings.LLM_HEDGE_MIN_SAMPLES, settings.LLM_HEDGE_MIN_DELAY_SECONDS)
+        # Semaphores are created on first use so they bind to the running event loop
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        # Fallback pool for models that only expose the blocking generate_content
+        self._executor = ThreadPoolExecutor(max_workers=settings.LLM_EXECUTOR_WORKERS, thread_name_prefix="gemini")
+
+    def get_model(self, name: str) -> Any:
+        """The named Gemini model, created on first use"""
+        model = self._models.get(name)
+        if model is None:
+            with self._model_lock:
+                if name not in self._models:
+                    self._models[name] = self._model_factory(name)
+                model = self._models[name]
+        return model
+
+    @property
+    def model(self) -> Any:
+        return self.get_model(settings.GEMINI_MODEL)
+
+    @model.setter
+    def model(self, model: Any) -> None:
+        """Serve every routed model name from this one model, as the benchmarks do with a fake"""
+        with self._model_lock:
+            self._model_factory = lambda name: model
+            self._models = {}
+
+    def breaker(self, model_name: str) -> CircuitBreaker:
+        if model_name not in self.breakers:
+            self.breakers[model_name] = CircuitBreaker(settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RECOVERY_SECONDS)
+        return self.breakers[model_name]
+
+    async def warm_up(self, send_request: bool = False) -> None:
+        """Load the SDK and every routed model off the event loop, optionally opening the connection with a one-token request"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, lambda: ([self.get_model(name) for name in routed_models()], retryable_errors()))
+        if not send_request:
+            return
+        try:
+            await self._send("Reply with OK.", settings.GEMINI_MODEL, settings.LLM_TIMEOUT_SECONDS,
+                             generation_config={"max_output_tokens": 1})
+        except Exception as e:
+            print(f"Error warming up the Gemini connection: {e}")
+            record_error("llm", e)
+
+    def _semaphore(self, name: str, limit: int) -> asyncio.Semaphore:
+        if name not in self._semaphores:
+            self._semaphores[name] = asyncio.Semaphore(limit)
+        return self._semaphores[name]
+
+    def _operation_slot(self, operation: str) -> Optional[asyncio.Semaphore]:
+        operation_limit = settings.LLM_OPERATION_CONCURRENCY.get(operation)
+        return self._semaphore(operation, operation_limit) if operation_limit else None
+
+    def _count(self, event: str, operation: str, amount: float = 1) -> None:
+        """Track an event both in total and per operation"""
+        self.counters[event] += amount
+        self.counters[f"{event}:{operation}"] += amount
+
+    def _pick_model(self, route: ModelRoute, operation: str) -> str:
+        """The route's model, or its fallback while the model's circuit is open or too many calls are waiting"""
+        fallback = route.fallback_model if route.fallback_model != route.model else None
+        overloaded = settings.LLM_FALLBACK_QUEUE_DEPTH > 0 and self.waiting >= settings.LLM_FALLBACK_QUEUE_DEPTH
+        if fallback and overloaded and self.breaker(fallback).allow():
+            self._count("fallbacks", operation)
+            return fallback
+        if self.breaker(route.model).allow():
+            return route.model
+        if fallback and self.breaker(fallback).allow():
+            self._count("fallbacks", operation)
+            return fallback
+
+        self._count("circuit_rejections", operation)
+        raise LLMUnavailableError("The AI service is temporarily unavailable. Please try again shortly.",
+                                  retry_after=self.breaker(route.model).retry_after() or settings.CIRCUIT_RECOVERY_SECONDS)
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * 2 ** attempt))
+
+    async def _call(self, prompt: str, operation: str, model_name: str, timeout: float, **kwargs):
+        llm_tokens.inc(estimate_tokens(prompt), operation=operation, direction="input")
+        with stage_timer("llm_call", operation):
+            return await self._send(prompt, model_name, timeout, **kwargs)
+
+    async def _hedged_call(self, prompt: str, operation: str, model_name: str, timeout: float, **kwargs):
+        """Send the call, and a duplicate if it is slower than usual; the first successful answer wins"""
+        if kwargs.get("stream"):
+            # Streams return at the first chunk, which says nothing about how long a whole answer takes
+            return await self._call(prompt, operation, model_name, timeout, **kwargs)
+
+        start = time.monotonic()
+        response = await self._race(prompt, operation, model_name, timeout, **kwargs)
+        # Once per logical call, end to end, so hedged calls count as slow as the caller saw them
+        self.hedger.record(operation, time.monotonic() - start)
+        return response
+
+    async def _race(self, prompt: str, operation: str, model_name: str, timeout: float, **kwargs):
+        delay = self.hedger.delay(operation)
+        if delay is None or delay >= timeout:
+            return await self._call(prompt, operation, model_name, timeout, **kwargs)
+
+        primary = asyncio.ensure_future(self._call(prompt, operation, model_name, timeout, **kwargs))
+        tasks = [primary]
+        hedging = False
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+            if not self.hedger.try_start():
+                self._count("hedges_skipped", operation)
+                return await primary
+            hedging = True
+            if not await self.bucket.try_acquire():
+                # Hedges never wait for quota; the primary keeps its place
+                self._count("hedges_skipped", operation)
+                return await primary
+
+            self._count("hedges", operation)
+            hedge = asyncio.ensure_future(self._call(prompt, operation, model_name, timeout - delay, **kwargs))
+            tasks.append(hedge)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._count("hedge_wins" if task is hedge else "hedge_losses", operation)
+                        return task.result()
+            # Both failed; surface the original call's error to the retry loop
+            return primary.result()
+        finally:
+            if hedging:
+                self.hedger.finish()
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
+
+    async def _send(self, prompt: str, model_name: str, timeout: float, **kwargs):
+        model = self.get_model(model_name)
+        if hasattr(model, "generate_content_async"):
+            call = model.generate_content_async(prompt, **kwargs)
+        else:
+            loop = asyncio.get_running_loop()
+            call = loop.run_in_executor(self._executor, lambda: model.generate_content(prompt, **kwargs))
+        return await asyncio.wait_for(call, timeout=timeout)
+
+    async def _call_with_retries(self, prompt: str, operation: str, timeout: Optional[float], **kwargs):
+        """Issue one logical request, retrying transient failures with jittered backoff; returns the response and model"""
+        route = resolve_route(operation)
+        timeout = timeout or route.timeout or settings.LLM_TIMEOUT_SECONDS
+        # The route's output cap and temperature, overridden by anything the caller asked for such as JSON mode
+        generation_config = {**route.generation_config(), **kwargs.pop("generation_config", {})}
+        if generation_config:
+            kwargs["generation_config"] = generation_config
+
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            model_name = self._pick_model(route, operation)
+            breaker = self.breaker(model_name)
+
+            try:
+                # Inside the try: a cancelled quota wait or a failing shared bucket must still release the probe
+                waited = await self.bucket.acquire()
+                if waited:
+                    self._count("rate_limited", operation)
+                    self._count("rate_limited_seconds", operation, waited)
+
+                self._count("requests", operation)
+                response = await self._hedged_call(prompt, operation, model_name, timeout, **kwargs)
+                breaker.record_success()
+                return response, model_name
+            except retryable_errors() as e:
+                breaker.record_failure()
+                self._count(f"errors.{type(e).__name__}", operation)
+                record_error("llm", e)
+                if attempt == settings.LLM_MAX_RETRIES:
+                    self._count("retries_exhausted", operation)
+                    raise LLMUnavailableError(f"The AI service did not respond successfully: {type(e).__name__}",
+                                              retry_after=settings.LLM_RETRY_MAX_DELAY) from e
+                self._count("retries", operation)
+                await asyncio.sleep(self._backoff(attempt))
+            except BaseException:
+                # Non-retryable errors and cancellation must not leave a half-open probe stuck
+                breaker.release_probe()
+                raise
+
+    async def _acquire(self, slot) -> None:
+        """Wait for a slot, counting the wait so routing can tell when calls are backing up"""
+        self.waiting += 1
+        try:
+            await slot
+        finally:
+            self.waiting -= 1
+
+    async def _acquire_slots(self, operation: str) -> Optional[asyncio.Semaphore]:
+        """Take the operation's own slot, then a fair-share slot for the caller's priority and client"""
+        # The operation slot comes first so calls queued behind a per-operation limit don't sit on shared slots
+        operation_slot = self._operation_slot(operation)
+        if operation_slot is not None:
+            await self._acquire(operation_slot.acquire())
+
+        priority = current_priority()
+        try:
+            await self._acquire(self.scheduler.acquire(priority, current_client()))
+        except BaseException as e:
+            if operation_slot is not None:
+                operation_slot.release()
+            if isinstance(e, LLMOverloadedError):
+                self._count("queue_rejections", operation)
+            raise
+        self._count(f"scheduled.{priority}", operation)
+        return operation_slot
+
+    async def generate(self, prompt: str, operation: str, timeout: Optional[float] = None, **kwargs):
+        """Generate a full response for one operation; kwargs such as generation_config go to the model"""
+        operation_slot = await self._acquire_slots(operation)
+        started = time.monotonic()
+        self.in_flight += 1
+        try:
+            response, _ = await self._call_with_retries(prompt, operation, timeout, **kwargs)
+            if response.parts:
+                llm_tokens.inc(estimate_tokens(response.text), operation=operation, direction="output")
+            return response
+        finally:
+            self.in_flight -= 1
+            if operation_slot is not None:
+                operation_slot.release()
+            self.scheduler.release(time.monotonic() - started)
+
+    async def stream(self, prompt: str, operation: str, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Yield response text chunks; only the initial request is retried"""
+        if not hasattr(self.model, "generate_content_async"):
+            response = await self.generate(prompt, operation, timeout)
+            yield response.text
+            return
+
+        operation_slot = await self._acquire_slots(operation)
+        started = time.monotonic()
+        self.in_flight += 1
+        try:
+            response, model_name = await self._call_with_retries(prompt, operation, timeout, stream=True)
+            try:
+                async for chunk in response:
+                    if chunk.parts:
+                        llm_tokens.inc(estimate_tokens(chunk.text), operation=operation, direction="output")
+                        yield chunk.text
+            except retryable_errors():
+                self.breaker(model_name).record_failure()
+                raise
+        finally:
+            self.in_flight -= 1
+            if operation_slot is not None:
+                operation_slot.release()
+            self.scheduler.release(time.monotonic() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inFlight": self.in_flight,
+            "waiting": self.waiting,
+            "queued": {priority: count for priority, count in self.scheduler.waiting.items() if count},
+            "circuitState": self.breaker(settings.GEMINI_MODEL).state,
+            "circuits": {name: breaker.state for name, breaker in self.breakers.items()},
+            "hedging": self.hedger.stats(),
+            "rateLimitTokens": round(self.bucket.available(), 2),
+            "counters": dict(self.counters),
+        }
+
+
+llm_client = LLMClient(create_gemini_model)
+
+
+_CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _event_samples():
+    # Per-operation keys look like "event:operation"; plain keys are the totals
+    for key, value in list(llm_client.counters.items()):
+        event, _, operation = key.partition(":")
+        if operation:
+            yield {"event": event, "operation": operation}, value
+
+
+registry.callback("llm_client_events_total", "LLM client requests, retries, rate limiting and circuit rejections", "counter", _event_samples)
+registry.callback("llm_hedge_delay_seconds", "Latency after which a call is hedged, per operation", "gauge",
+                  lambda: [({"operation": operation}, delay) for operation, delay in llm_client.hedger.stats()["delays"].items()])
+registry.callback("llm_in_flight", "LLM calls currently in flight", "gauge", lambda: [({}, llm_client.in_flight)])
+registry.callback("llm_circuit_state", "Circuit breaker state per model (0 closed, 1 half open, 2 open)", "gauge",
+                  lambda: [({"model": name}, _CIRCUIT_STATES[breaker.state]) for name, breaker in list(llm_client.breakers.items())])
@@ -0,0 +1,51 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+# Set while a batch job runs, so its calls pick up the "batch" route on top of their operation's route
+_route_layer: ContextVar[Optional[str]] = ContextVar("llm_route_layer", default=None)
+
+
+class ModelRoute(BaseModel):
+    """Model, output cap, sampling and timeout for one operation; unset fields use the global settings"""
+    model: str = ""
+    max_output_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    timeout: Optional[float] = None
+    fallback_model: Optional[str] = None
+
+    def generation_config(self) -> Dict[str, Any]:
+        config = {"max_output_tokens": self.max_output_tokens, "temperature": self.temperature}
+        return {key: value for key, value in config.items() if value is not None}
+
+
+def resolve_route(operation: str) -> ModelRoute:
+    """The route for an operation, with the active layer (such as "batch") applied over it"""
+    fields = {"model": settings.GEMINI_MODEL, "fallback_model": settings.LLM_FALLBACK_MODEL or None}
+    fields.update(settings.LLM_ROUTES.get(operation, {}))
+    layer = _route_layer.get()
+    if layer:
+        fields.update(settings.LLM_ROUTES.get(layer, {}))
+    return ModelRoute(**fields)
+
+
+@contextmanager
+def route_layer(name: str) -> Iterator[None]:
+    """Route every LLM call made inside the block through the named layer of LLM_ROUTES"""
+    token = _route_layer.set(name)
+    try:
+        yield
+    finally:
+        _route_layer.reset(token)
+
+
+def routed_models() -> List[str]:
+    """Every model the routing table can send a request to"""
+    models = {settings.GEMINI_MODEL, settings.LLM_FALLBACK_MODEL}
+    for route in settings.LLM_ROUTES.values():
+        models.update((route.get("model"), route.get("fallback_model")))
+    return sorted(model for model in models if model)
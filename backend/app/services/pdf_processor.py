@@ -1,47 +1,107 @@
+import asyncio
 import io
+import mmap
+import multiprocessing
+import os
 import PyPDF2
-from typing import Union
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import BinaryIO, Iterator, Optional, Union
 
-def extract_text_from_pdf(file_content: Union[bytes, io.BytesIO]) -> str:
+from app.core.config import settings
+from app.services.extractors import PDF, TEXT, detect_mime_type, get_extractor, register_extractor, sniff_mime_type
+
+class ExtractionError(ValueError):
+    """No text could be extracted from an uploaded file"""
+
+class UnsupportedFileError(ExtractionError):
+    """The file is not of a type any extractor reads"""
+
+# Parsing is CPU-bound, so it runs in worker processes rather than on the event loop
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """Create the PDF worker pool on first use"""
+    global _process_pool
+    if _process_pool is None and settings.PDF_WORKERS > 0:
+        # spawn avoids forking a parent that already holds gRPC threads
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.PDF_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+def _ready() -> bool:
+    return True
+
+def warm_process_pool() -> None:
+    """Start every PDF worker now, so the first uploads do not pay for spawning and importing"""
+    pool = _get_process_pool()
+    if pool is not None:
+        for future in [pool.submit(_ready) for _ in range(settings.PDF_WORKERS)]:
+            future.result()
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+def iter_pdf_pages(file_content: Union[bytes, BinaryIO, mmap.mmap], max_pages: Optional[int] = None) -> Iterator[str]:
+    """Yield the text of each PDF page in turn, up to max_pages"""
+    # Create a PDF reader object; files and mmaps are read in place rather than copied
+    if isinstance(file_content, (bytes, bytearray)):
+        pdf_file = io.BytesIO(file_content)
+    else:
+        pdf_file = file_content
+
+    pdf_reader = PyPDF2.PdfReader(pdf_file)
+    for page in islice(pdf_reader.pages, max_pages):
+        yield page.extract_text() or ""
+
+def extract_text_from_pdf(file_content: Union[bytes, BinaryIO, mmap.mmap], max_pages: Optional[int] = None) -> str:
     """Extract text from a PDF file"""
     try:
-        # Create a PDF reader object
-        if isinstance(file_content, bytes):
-            pdf_file = io.BytesIO(file_content)
-        else:
-            pdf_file = file_content
-            
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-
-        # Extract text from all pages
-        text = ""
-        for page_num in range(len(pdf_reader.pages)):
-            page = pdf_reader.pages[page_num]
-            text += page.extract_text() + "\n"
-
-        return text
+        max_pages = max_pages or settings.PDF_MAX_PAGES
+        # Pages are separated by form feeds so prompt compaction can spot repeated headers and footers
+        return "\f".join(iter_pdf_pages(file_content, max_pages)) + "\n"
     except Exception as e:
         print(f"Error extracting text from PDF: {e}")
-        return "Error extracting text from PDF."
+        raise ExtractionError("Error extracting text from PDF.") from e
 
-def read_resume_file(file_content: bytes, filename: str) -> str:
-    """Read and extract content from various file types"""
+register_extractor(PDF, extract_text_from_pdf)
+
+def read_resume_file(file_content: Union[bytes, mmap.mmap], filename: str) -> str:
+    """Read and extract content from various file types; raises ExtractionError when no text can be read"""
+    # Detect the type from the content and hand it to the extractor registered for it
+    extractor = get_extractor(detect_mime_type(file_content))
+    if extractor is None:
+        raise UnsupportedFileError("Unsupported file type. Please use PDF, DOCX, RTF, TXT, or paste text directly.")
     try:
-        filename = filename.lower()
-
-        # Detect file type
-        if filename.endswith('.pdf'):
-            # PDF file
-            return extract_text_from_pdf(file_content)
-        elif filename.endswith('.docx'):
-            # DOCX file - you may need python-docx for better handling
-            return "DOCX files are not fully supported yet. Please convert to PDF or paste text directly."
-        elif filename.endswith('.txt') or filename.endswith('.rtf'):
-            # Text file
-            return file_content.decode('utf-8', errors='ignore')
-        else:
-            # Unknown file type
-            return "Unsupported file type. Please use PDF, TXT, or paste text directly."
+        return extractor(file_content)
+    except ExtractionError:
+        raise
     except Exception as e:
         print(f"Error reading file: {e}")
-        return f"Error reading file: {str(e)}"
\ No newline at end of file
+        raise ExtractionError(f"Error reading file: {str(e)}") from e
+
+def read_resume_path(path: str, filename: str) -> str:
+    """Read a resume spooled to disk through a read-only mmap, without loading it into a bytes object"""
+    if os.path.getsize(path) == 0:
+        return read_resume_file(b"", filename)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        return read_resume_file(view, filename)
+
+async def read_resume_file_async(file_content: bytes, filename: str) -> str:
+    """Read a resume without blocking the event loop"""
+    # Plain text decodes faster than it can be shipped to another process
+    if sniff_mime_type(file_content[:64]) == TEXT:
+        return read_resume_file(file_content, filename)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_process_pool(), read_resume_file, file_content, filename)
+
+async def read_resume_path_async(path: str, filename: str) -> str:
+    """Read a spooled resume in a worker process, which opens the file itself instead of receiving its bytes"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_process_pool(), read_resume_path, path, filename)
@@ -0,0 +1,36 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# Who an LLM call is made for and its scheduling class (see LLM_PRIORITY_WEIGHTS); tasks started
+# from a request inherit both
+_priority: ContextVar[str] = ContextVar("llm_priority", default="interactive")
+_client: ContextVar[str] = ContextVar("llm_client_id", default="anonymous")
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def current_client() -> str:
+    return _client.get()
+
+
+@contextmanager
+def request_scope(priority: Optional[str] = None, client: Optional[str] = None) -> Iterator[None]:
+    """Run the block's LLM calls under this priority class and/or client"""
+    tokens = []
+    if priority is not None:
+        tokens.append((_priority, _priority.set(priority)))
+    if client is not None:
+        tokens.append((_client, _client.set(client)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def set_client(client: str) -> None:
+    """Tag the rest of the current request with its client"""
+    _client.set(client)
@@ -0,0 +1,52 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from app.core.metrics import registry
+
+coalesced_calls = registry.counter(
+    "llm_coalesced_total", "Calls that joined an identical request already in flight instead of calling Gemini", ("operation",))
+
+
+class SingleFlight:
+    """Lets concurrent calls with the same key share one in-flight upstream request"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+            self._waiters.pop(key, None)
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]], operation: str = "") -> Any:
+        """Run call(), or wait for the identical call already running; results and errors reach every caller"""
+        if not self.enabled:
+            return await call()
+
+        task = self._tasks.get(key)
+        if task is None:
+            # The call runs as its own task so one caller going away does not cancel it for the others
+            task = asyncio.ensure_future(call())
+            self._tasks[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            coalesced_calls.inc(operation=operation)
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Only cancel the upstream request once nobody is waiting for it
+            if self._tasks.get(key) is task:
+                self._waiters[key] -= 1
+                if self._waiters[key] == 0:
+                    # Forget it now, so a new caller starts a fresh call instead of joining the cancelled one
+                    self._forget(key, task)
+                    task.cancel()
+            raise
+
+    def in_flight(self) -> int:
+        return len(self._tasks)
@@ -0,0 +1,70 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+# Expired rows are only skipped on read, so writes sweep them out at most this often
+PURGE_INTERVAL_SECONDS = 300.0
+
+
+class SqliteStore:
+    """Key/value table in a local SQLite file, safe to share between threads and worker processes"""
+
+    def __init__(self, path: str, table: str):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        # The first write also clears out rows that expired while the service was down
+        self._next_purge = 0.0
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the stored value, or None when missing or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            self.delete(key)
+            return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a JSON-serializable value, optionally expiring after ttl seconds"""
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+            self._conn.commit()
+        if time.time() >= self._next_purge:
+            self.purge_expired()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Drop expired rows and return how many were removed"""
+        with self._lock:
+            self._next_purge = time.time() + PURGE_INTERVAL_SECONDS
+            cursor = self._conn.execute(
+                f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at < ?",
+                (time.time(),),
+            )
+            self._conn.commit()
+        return cursor.rowcount
@@ -0,0 +1,76 @@
+import inspect
+import json
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+
+from app.core.metrics import registry
+
+Model = TypeVar("Model", bound=BaseModel)
+
+structured_outputs = registry.counter(
+    "llm_structured_output_total", "Structured LLM responses by parse outcome: valid, repaired or invalid", ("operation", "outcome"))
+
+_decoder = json.JSONDecoder()
+
+
+@lru_cache(maxsize=None)
+def supports_json_mode() -> bool:
+    """JSON response mode only exists in newer google-generativeai releases; older ones rely on the prompt alone"""
+    from google.generativeai.types import GenerationConfig
+
+    return "response_mime_type" in inspect.signature(GenerationConfig).parameters
+
+
+def json_output_config() -> Dict[str, Any]:
+    """Extra generate() arguments asking Gemini for a bare JSON response"""
+    if not supports_json_mode():
+        return {}
+    # A plain dict, so the client can merge it with the operation's output cap and temperature
+    return {"generation_config": {"response_mime_type": "application/json"}}
+
+
+def _decode(text: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """Strict parse, then one repair pass; returns the object and whether it needed repair"""
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return data, False
+    except ValueError:
+        pass
+
+    # Repair: skip code fences or prose before the first object and ignore anything after it
+    start = text.find("{")
+    if start < 0:
+        return None, True
+    try:
+        data, _ = _decoder.raw_decode(text, start)
+    except ValueError:
+        return None, True
+    return (data, True) if isinstance(data, dict) else (None, True)
+
+
+def parse_json_object(text: str, operation: str, build: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Any:
+    """Decode the JSON object in a model response, or None if it cannot be recovered
+
+    With build, the decoded object is validated through it and its result returned; a response the build
+    rejects is invalid. Either way exactly one outcome is recorded per response.
+    """
+    data, repaired = _decode(text or "")
+    result = data
+    if data is not None and build is not None:
+        try:
+            result = build(data)
+        except ValueError as e:
+            # pydantic's ValidationError is a ValueError
+            print(f"Error validating {operation} response: {e}")
+            result = None
+    outcome = "invalid" if result is None else "repaired" if repaired else "valid"
+    structured_outputs.inc(operation=operation, outcome=outcome)
+    return result
+
+
+def parse_structured(text: str, model: Type[Model], operation: str) -> Optional[Model]:
+    """Decode and validate a model response into a response schema"""
+    return parse_json_object(text, operation, model.parse_obj)
@@ -0,0 +1,134 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, Tuple
+
+from app.core.config import settings
+from app.core.metrics import registry, stage_timer
+
+# Lines that only carry page furniture: "3", "- 3 -", "Page 3", "Page 3 of 4", "3/4"
+_PAGE_NUMBER_RE = re.compile(r"^\s*(?:-\s*)?(?:page\s*)?\d{1,3}(?:\s*(?:of|/)\s*\d{1,3})?(?:\s*-)?\s*$", re.IGNORECASE)
+
+# Whole lines of job-posting boilerplate that never change how a resume should be scored
+_BOILERPLATE_RE = re.compile(
+    r"(?:[\w&.,'() -]{0,80}\b(?:is|are) (?:an? |proud to be an? )?)?equal (?:employment )?opportunity employer\b.*"
+    r"|all qualified applicants will receive consideration for employment without regard to\b.*"
+    r"|if you (?:are an? .{0,40} and )?(?:need|require) (?:an? )?(?:reasonable )?accommodation\b.*"
+    r"|(?:this (?:company|employer) )?participates in e-verify\b.*|e-verify"
+    r"|apply now|apply for this job|easy apply|share this job|save (?:this )?job|click (?:here|apply)(?: to apply)?"
+    r"|(?:we|this (?:site|website)) uses? cookies\b.*|(?:accept|manage|reject) (?:all )?cookies"
+    r"|privacy policy|terms of (?:use|service)|(?:\u00a9|\(c\)|copyright)\s.*all rights reserved[.!]?",
+    re.IGNORECASE,
+)
+
+# Header and footer lines are looked for among the first and last few lines of each page
+_PAGE_EDGE_LINES = 2
+_MAX_HEADER_CHARS = 80
+
+# Running totals of how much prompt text compaction removed, per operation
+token_savings = Counter()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count without calling the tokenizer API"""
+    return math.ceil(len(text) / settings.CHARS_PER_TOKEN)
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse runs of spaces and blank lines left behind by PDF extraction"""
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\f", "\n").replace("\u00a0", " ")
+    lines = (re.sub(r"[ \t\f\v]+", " ", line).strip() for line in text.split("\n"))
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def _line_key(line: str) -> str:
+    return " ".join(line.split()).lower()
+
+
+def _page_edges(page: str) -> set:
+    """Keys of the short lines at the top and bottom of a page"""
+    lines = [key for key in map(_line_key, page.split("\n")) if key and not _PAGE_NUMBER_RE.match(key)]
+    edges = lines[:_PAGE_EDGE_LINES] + lines[-_PAGE_EDGE_LINES:]
+    return {key for key in edges if len(key) <= _MAX_HEADER_CHARS}
+
+
+def dedupe_lines(text: str) -> str:
+    """Keep only the first copy of headers and footers repeated on each page; pages are split by form feeds"""
+    pages = text.split("\f")
+    if len(pages) < 2:
+        return text
+
+    edges = [_page_edges(page) for page in pages]
+    page_counts = Counter(key for page_edges in edges for key in page_edges)
+    repeated = {key for key, count in page_counts.items() if count > 1}
+
+    kept_pages = [pages[0]]
+    for page, page_edges in zip(pages[1:], edges[1:]):
+        furniture = repeated & page_edges
+        kept_pages.append("\n".join(line for line in page.split("\n") if _line_key(line) not in furniture))
+    return "\f".join(kept_pages)
+
+
+def strip_page_numbers(text: str) -> str:
+    """Drop lines that only carry a page number"""
+    return "\n".join(line for line in text.split("\n") if not _PAGE_NUMBER_RE.match(line))
+
+
+def strip_boilerplate(text: str) -> str:
+    """Drop whole lines of legal or navigation boilerplate from a job posting"""
+    return "\n".join(line for line in text.split("\n") if not _BOILERPLATE_RE.fullmatch(line.strip()))
+
+
+def trim_to_budget(text: str, max_tokens: int) -> str:
+    """Cut the text at a line boundary so it fits within max_tokens"""
+    if max_tokens <= 0 or estimate_tokens(text) <= max_tokens:
+        return text
+
+    max_chars = max_tokens * settings.CHARS_PER_TOKEN
+    cut = text.rfind("\n", 0, max_chars)
+    if cut < max_chars // 2:
+        cut = max_chars
+    return text[:cut].rstrip() + "\n[...]"
+
+
+def compact_text(text: str, max_tokens: int, job_posting: bool = False) -> Tuple[str, Dict[str, int]]:
+    """Dedupe page furniture, normalize, strip boilerplate from job postings and trim; returns the text and token stats"""
+    original_tokens = estimate_tokens(text or "")
+    compacted = strip_page_numbers(normalize_whitespace(dedupe_lines(text or "")))
+    if job_posting:
+        compacted = strip_boilerplate(compacted)
+    compacted = trim_to_budget(re.sub(r"\n{3,}", "\n\n", compacted).strip(), max_tokens)
+
+    compact_tokens = estimate_tokens(compacted)
+    return compacted, {
+        "originalTokens": original_tokens,
+        "compactTokens": compact_tokens,
+        "tokensSaved": original_tokens - compact_tokens,
+    }
+
+
+def compact_inputs(operation: str, job_description: str, resume_text: str) -> Tuple[str, str]:
+    """Compact the JD and resume to their budgets and record the savings for this call"""
+    if not settings.PROMPT_COMPACTION_ENABLED:
+        return job_description, resume_text
+
+    with stage_timer("prompt_build", operation):
+        job_description, jd_stats = compact_text(job_description, settings.JD_TOKEN_BUDGET, job_posting=True)
+        resume_text, resume_stats = compact_text(resume_text, settings.RESUME_TOKEN_BUDGET)
+
+    token_savings["calls"] += 1
+    token_savings[f"calls:{operation}"] += 1
+    for stats in (jd_stats, resume_stats):
+        token_savings["originalTokens"] += stats["originalTokens"]
+        token_savings["compactTokens"] += stats["compactTokens"]
+        token_savings[f"tokensSaved:{operation}"] += stats["tokensSaved"]
+    return job_description, resume_text
+
+
+def _savings_samples():
+    for key, value in list(token_savings.items()):
+        if key.startswith("tokensSaved:"):
+            yield {"operation": key.split(":", 1)[1]}, value
+
+
+registry.callback("prompt_tokens_saved_total", "Estimated prompt tokens removed by compaction", "counter", _savings_samples)
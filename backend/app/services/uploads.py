@@ -0,0 +1,94 @@
+import hashlib
+import os
+import tempfile
+from typing import Optional
+
+from fastapi import UploadFile
+
+from app.core.config import settings
+
+CHUNK_SIZE = 256 * 1024
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+class SpooledUpload:
+    """An upload read in chunks: kept in memory when small, otherwise in a named temp file workers can open"""
+
+    def __init__(self, filename: Optional[str], size: int, digest: str, content: Optional[bytes] = None, path: Optional[str] = None):
+        self.filename = filename
+        self.size = size
+        self.digest = digest
+        self.content = content
+        self.path = path
+
+    def read_bytes(self) -> bytes:
+        if self.content is not None:
+            return self.content
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def close(self) -> None:
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+async def spool_upload(file: UploadFile, max_bytes: Optional[int] = None,
+                       memory_bytes: Optional[int] = None) -> SpooledUpload:
+    """Copy an upload out of the request, hashing it on the way and failing as soon as it passes max_bytes"""
+    max_bytes = settings.MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    memory_bytes = settings.UPLOAD_MEMORY_BYTES if memory_bytes is None else memory_bytes
+    # Starlette records the size while parsing the form, so oversized files usually fail without being read
+    if max_bytes and file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError(f"File is larger than the {max_bytes / (1024 * 1024):.1f} MB limit")
+
+    digest = hashlib.sha256()
+    buffer = bytearray()
+    spool = None
+    size = 0
+    try:
+        while True:
+            chunk = await file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_bytes and size > max_bytes:
+                raise UploadTooLargeError(f"File is larger than the {max_bytes / (1024 * 1024):.1f} MB limit")
+            digest.update(chunk)
+
+            if spool is None and size > memory_bytes:
+                spool = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+                spool.write(buffer)
+                buffer = None
+            if spool is None:
+                buffer += chunk
+            else:
+                spool.write(chunk)
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            os.unlink(spool.name)
+        raise
+
+    if spool is None:
+        return SpooledUpload(file.filename, size, digest.hexdigest(), content=bytes(buffer))
+    spool.close()
+    return SpooledUpload(file.filename, size, digest.hexdigest(), path=spool.name)
+
+
+async def read_upload_bytes(file: UploadFile, max_bytes: Optional[int] = None) -> bytes:
+    """Whole upload as bytes, still enforcing the size limit while reading"""
+    with await spool_upload(file, max_bytes, memory_bytes=max_bytes or settings.MAX_UPLOAD_BYTES) as upload:
+        return upload.read_bytes()
@@ -0,0 +1,142 @@
+"""Synthetic resumes, job descriptions and PDFs of configurable size"""
+import argparse
+import io
+import os
+import random
+import zipfile
+from typing import List
+from xml.sax.saxutils import escape
+
+SKILLS = [
+    "Python", "SQL", "Java", "C++", "TypeScript", "React", "Docker", "Kubernetes", "AWS", "GCP", "Spark",
+    "Airflow", "TensorFlow", "PyTorch", "scikit-learn", "Tableau", "Power BI", "MATLAB", "Verilog", "FPGA",
+    "PCB design", "signal processing", "machine learning", "statistics", "ETL", "data pipelines", "REST API",
+]
+VERBS = ["Built", "Designed", "Led", "Optimized", "Automated", "Deployed", "Analyzed", "Migrated", "Maintained"]
+OBJECTS = ["data pipelines", "dashboards", "microservices", "forecasting models", "test benches",
+           "CI/CD workflows", "recommendation systems", "embedded firmware", "reporting tools"]
+
+# Resume sizes by number of roles and bullets per role
+SIZES = {"small": (2, 3), "medium": (4, 5), "large": (8, 8), "xlarge": (20, 10)}
+
+
+def make_resume(size: str = "medium", seed: int = 0) -> str:
+    rng = random.Random(seed)
+    roles, bullets = SIZES[size]
+    lines = ["Jane Doe", "jane.doe@example.com | (555) 123-4567", "", "SUMMARY",
+             f"Engineer with {rng.randint(2, 15)} years of experience in {', '.join(rng.sample(SKILLS, 3))}.", "",
+             "EXPERIENCE"]
+    for role in range(roles):
+        lines.append(f"Senior Engineer, Company {role + 1} ({2024 - 2 * role - 2} - {2024 - 2 * role})")
+        for _ in range(bullets):
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {', '.join(rng.sample(SKILLS, 2))}, "
+                         f"improving throughput by {rng.randint(5, 80)}%")
+        lines.append("")
+    lines += ["SKILLS", ", ".join(rng.sample(SKILLS, 12)), "", "EDUCATION", "B.S. Computer Engineering"]
+    return "\n".join(lines)
+
+
+def make_job_description(seed: int = 0, paragraphs: int = 3) -> str:
+    rng = random.Random(seed)
+    lines = ["Senior Data Engineer", "", "About the role"]
+    for _ in range(paragraphs):
+        lines.append(f"You will {rng.choice(VERBS).lower()} {rng.choice(OBJECTS)} with {', '.join(rng.sample(SKILLS, 3))}.")
+    lines += ["", "Requirements"] + [f"- Experience with {skill}" for skill in rng.sample(SKILLS, 8)]
+    lines += ["", "We are an equal opportunity employer."]
+    return "\n".join(lines)
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(text: str, lines_per_page: int = 45) -> bytes:
+    """Minimal multi-page PDF with a text layer PyPDF2 can extract"""
+    lines = text.splitlines() or [""]
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)]
+    page_count = len(pages)
+    font_id = 3 + 2 * page_count
+
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(page_count))}] /Count {page_count} >>",
+    ]
+    for index, page_lines in enumerate(pages):
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * index} 0 R >>")
+        content = "BT /F1 10 Tf 14 TL 50 760 Td " + " ".join(f"({_pdf_escape(line)}) Tj T*" for line in page_lines) + " ET"
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    output += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(output)
+
+
+def make_docx(text: str) -> bytes:
+    """Minimal Word document with one paragraph per line"""
+    paragraphs = "".join(f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(line)}</w:t></w:r></w:p>" for line in text.splitlines())
+    document = ('<?xml version="1.0" encoding="UTF-8"?>'
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                f"<w:body>{paragraphs}</w:body></w:document>")
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", '<?xml version="1.0"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types"/>')
+        archive.writestr("word/document.xml", document)
+    return output.getvalue()
+
+
+def make_rtf(text: str) -> bytes:
+    """RTF document with a font table and formatting, as word processors write it"""
+    def escape_rtf(line: str) -> str:
+        line = line.replace("\\", "\\\\").replace("{", "\\{").replace("}", "\\}")
+        return "".join(ch if ord(ch) < 128 else f"\\u{ord(ch)}?" for ch in line)
+
+    body = "".join(f"\\pard\\f0\\fs22 {escape_rtf(line)}\\par\n" for line in text.splitlines())
+    return ("{\\rtf1\\ansi\\ansicpg1252\\deff0{\\fonttbl{\\f0\\fswiss Helvetica;}}"
+            "{\\colortbl;\\red0\\green0\\blue0;}\\uc1\n" + body + "}").encode("ascii")
+
+
+def build_corpus(count: int, sizes: List[str]) -> List[dict]:
+    return [
+        {"name": f"resume_{size}_{i}", "size": size, "text": make_resume(size, seed=i)}
+        for size in sizes for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic resume corpus to disk")
+    parser.add_argument("output_dir")
+    parser.add_argument("--count", type=int, default=10, help="resumes per size")
+    parser.add_argument("--sizes", default=",".join(SIZES))
+    parser.add_argument("--pdf", action="store_true", help="also write each resume as a PDF")
+    parser.add_argument("--docx", action="store_true", help="also write each resume as a Word document")
+    parser.add_argument("--rtf", action="store_true", help="also write each resume as RTF")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for item in build_corpus(args.count, args.sizes.split(",")):
+        with open(os.path.join(args.output_dir, f"{item['name']}.txt"), "w") as f:
+            f.write(item["text"])
+        if args.pdf:
+            with open(os.path.join(args.output_dir, f"{item['name']}.pdf"), "wb") as f:
+                f.write(make_pdf(item["text"]))
+        if args.docx:
+            with open(os.path.join(args.output_dir, f"{item['name']}.docx"), "wb") as f:
+                f.write(make_docx(item["text"]))
+        if args.rtf:
+            with open(os.path.join(args.output_dir, f"{item['name']}.rtf"), "wb") as f:
+                f.write(make_rtf(item["text"]))
+    with open(os.path.join(args.output_dir, "job_description.txt"), "w") as f:
+        f.write(make_job_description())
+
+
+if __name__ == "__main__":
+    main()
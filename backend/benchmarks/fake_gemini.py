@@ -0,0 +1,122 @@
+"""Local stand-in for google.generativeai.GenerativeModel with configurable latency and failures"""
+import asyncio
+import json
+import random
+import time
+from typing import List, Optional
+
+from google.api_core import exceptions as google_exceptions
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.parts = [text] if text else []
+
+
+class FakeStream:
+    """Async iterator of chunks, mimicking generate_content_async(..., stream=True)"""
+
+    def __init__(self, chunks: List[str], chunk_delay: float):
+        self._chunks = chunks
+        self._chunk_delay = chunk_delay
+
+    async def __aiter__(self):
+        for chunk in self._chunks:
+            await asyncio.sleep(self._chunk_delay)
+            yield FakeResponse(chunk)
+
+
+class FakeGenerativeModel:
+    """Answers every prompt in the format ai_service expects, after a simulated delay"""
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.2, error_rate: float = 0.0,
+                 chunk_delay: float = 0.02, fence_rate: float = 0.0, tail_rate: float = 0.0,
+                 tail_latency: float = 10.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        # Fraction of calls that stall for tail_latency instead, like the occasional stuck Gemini request
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.error_rate = error_rate
+        self.chunk_delay = chunk_delay
+        # Fraction of JSON answers wrapped in a markdown code fence, as Gemini does without JSON mode
+        self.fence_rate = fence_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    def _delay(self) -> float:
+        if self.tail_rate and self._random.random() < self.tail_rate:
+            return self.tail_latency
+        return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def _maybe_fail(self) -> None:
+        if self._random.random() < self.error_rate:
+            raise google_exceptions.ServiceUnavailable("Simulated upstream failure")
+
+    def _answer(self, prompt: str) -> str:
+        if "requiredSkills" in prompt:
+            return json.dumps({
+                "title": "Senior Data Engineer",
+                "seniority": "Senior",
+                "requiredSkills": ["python", "sql", "spark", "airflow", "aws"],
+                "preferredSkills": ["kubernetes", "terraform"],
+                "responsibilities": ["build batch and streaming pipelines", "own data quality"],
+                "keywords": ["data pipelines", "etl", "data modeling"],
+            })
+        if "- summary:" in prompt:
+            return json.dumps({
+                "summary": "Experienced engineer with a strong data background.",
+                "similarityScore": f"{self._random.randint(40, 95)}%",
+                "similarityExplanation": "Missing some cloud experience.",
+                "missingKeywords": ["kubernetes", "terraform"],
+                "optimizationSuggestions": "Mention Kubernetes in the infrastructure bullet.",
+            })
+        if "MISSING KEYWORDS" in prompt:
+            return ("MISSING KEYWORDS:\n- kubernetes\n- terraform\n- airflow\n\n"
+                    "SUGGESTIONS:\nMention Kubernetes in the deployment bullet.\nAdd Terraform to the skills section.")
+        if "missingKeywords" in prompt:
+            return json.dumps({
+                "missingKeywords": ["kubernetes", "terraform", "airflow"],
+                "optimizationSuggestions": "Mention Kubernetes in the deployment bullet.\nAdd Terraform to the skills section.",
+            })
+        if "similarityScore" in prompt:
+            return json.dumps({
+                "similarityScore": f"{self._random.randint(40, 95)}%",
+                "similarityExplanation": "Good overlap on core skills; missing cloud infrastructure experience.",
+            })
+        if "cover letter" in prompt:
+            return "Dear Hiring Manager,\n\n" + "I am excited to apply for this role. " * 40 + "\n\nSincerely,\nJane Doe"
+        return "Experienced engineer with a strong background in data and backend systems."
+
+    def _text(self, prompt: str) -> str:
+        text = self._answer(prompt)
+        if text.startswith("{") and self._random.random() < self.fence_rate:
+            text = f"Here is the analysis:\n```json\n{text}\n```"
+        return text
+
+    def generate_content(self, prompt: str, **kwargs) -> FakeResponse:
+        self.calls += 1
+        time.sleep(self._delay())
+        self._maybe_fail()
+        return FakeResponse(self._text(prompt))
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self._delay())
+        self._maybe_fail()
+        text = self._text(prompt)
+        if stream:
+            words = text.split(" ")
+            chunks = [" ".join(words[i:i + 8]) + " " for i in range(0, len(words), 8)]
+            return FakeStream(chunks, self.chunk_delay)
+        return FakeResponse(text)
+
+
+def install_fake_model(**kwargs) -> FakeGenerativeModel:
+    """Swap the shared Gemini model for a fake; returns the fake for inspection"""
+    from app.services.llm_client import llm_client
+
+    fake = FakeGenerativeModel(**kwargs)
+    llm_client.model = fake
+    return fake
@@ -0,0 +1,87 @@
+"""Import-time profile of the app, from python -X importtime, to track cold start and autoscaling spin-up"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List
+
+from benchmarks.report import summarize, write_results
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "import time:       self [us] |  cumulative | imported package", nesting shown by indentation
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+# Modules the app should only load on first use or during the startup warm-up
+LAZY_MODULES = ("google.generativeai", "google.api_core.exceptions", "grpc")
+
+
+def profile_import(module: str) -> Dict[str, Any]:
+    """Import the module in a fresh interpreter; returns the wall time and every import it triggered"""
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append({"module": name, "depth": len(indent) // 2, "selfUs": int(self_us), "cumulativeUs": int(cumulative_us)})
+    return {"wall": wall, "imports": imports}
+
+
+def breakdown(imports: List[Dict[str, Any]], top: int) -> Dict[str, Any]:
+    """Slowest modules by cumulative time and total self time per top-level package"""
+    packages = Counter()
+    for entry in imports:
+        packages[entry["module"].split(".")[0]] += entry["selfUs"]
+
+    loaded = {entry["module"] for entry in imports}
+    slowest = sorted(imports, key=lambda entry: entry["cumulativeUs"], reverse=True)[:top]
+    return {
+        "totalMs": round(sum(packages.values()) / 1000, 1),
+        "modules": len(imports),
+        "lazyModulesLoaded": [name for name in LAZY_MODULES if name in loaded],
+        "slowest": [
+            {"module": entry["module"], "cumulativeMs": round(entry["cumulativeUs"] / 1000, 1),
+             "selfMs": round(entry["selfUs"] / 1000, 1)}
+            for entry in slowest
+        ],
+        "packages": {name: round(us / 1000, 1) for name, us in packages.most_common(top)},
+    }
+
+
+def run(modules: List[str], repeat: int, top: int) -> Dict[str, Any]:
+    results = {}
+    for module in modules:
+        runs = [profile_import(module) for _ in range(repeat)]
+        # The fastest run has the least noise from the disk cache and other processes
+        fastest = min(runs, key=lambda profile: profile["wall"])
+        results[module] = {"interpreterStart": summarize([profile["wall"] for profile in runs]),
+                           **breakdown(fastest["imports"], top)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time of the app modules")
+    parser.add_argument("--modules", default="app.main,app.services.pdf_processor",
+                        help="comma-separated modules; pdf_processor is what each PDF worker process imports")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    modules = [name.strip() for name in args.modules.split(",") if name.strip()]
+    results = run(modules, args.repeat, args.top)
+    write_results("import_time", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""End-to-end load driver: concurrent requests against the API, in-process with a fake Gemini or against a live server"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from benchmarks.corpus import make_job_description, make_pdf, make_resume
+from benchmarks.report import summarize, write_results
+
+API = settings.API_V1_STR
+
+
+def _scenario_request(scenario: str, index: int, job_description: str, unique: bool, size: str):
+    """Build (path, form data, files) for one request; unique inputs defeat the response cache"""
+    resume = make_resume(size, seed=index if unique else 0)
+    data = {"job_description": job_description, "resume": resume}
+    if scenario == "summary":
+        return f"{API}/analysis/summary", {"resume": resume}, None
+    if scenario == "similarity":
+        return f"{API}/analysis/similarity", data, None
+    if scenario == "similarity_fast":
+        return f"{API}/analysis/similarity", {**data, "mode": "fast"}, None
+    if scenario == "keywords":
+        return f"{API}/analysis/keywords", data, None
+    if scenario == "full":
+        return f"{API}/analysis/full", data, None
+    if scenario == "full_combined":
+        return f"{API}/analysis/full", {**data, "combined": "true"}, None
+    if scenario == "pdf_similarity":
+        files = {"resume_file": (f"resume_{index}.pdf", make_pdf(resume), "application/pdf")}
+        return f"{API}/analysis/similarity", {"job_description": job_description, "mode": "fast"}, files
+    if scenario == "cover_letter":
+        return f"{API}/generate/cover-letter", {**data, "company_name": "Acme", "full_name": "Jane Doe"}, None
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+SCENARIOS = ("summary", "similarity", "similarity_fast", "keywords", "full", "full_combined", "pdf_similarity", "cover_letter")
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: str, requests: int, concurrency: int,
+                       unique: bool, size: str) -> Dict[str, object]:
+    job_description = make_job_description()
+    latencies: List[float] = []
+    statuses: Dict[int, int] = defaultdict(int)
+    errors: Dict[str, int] = defaultdict(int)
+    queue = iter(range(requests))
+
+    async def worker():
+        for index in queue:
+            path, data, files = _scenario_request(scenario, index, job_description, unique, size)
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, data=data, files=files)
+                statuses[response.status_code] += 1
+            except Exception as e:
+                errors[type(e).__name__] += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsedSeconds": round(elapsed, 3),
+        "throughputRps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "latency": summarize(latencies),
+        "statuses": dict(statuses),
+        "errors": dict(errors),
+    }
+
+
+def _install_fake(args) -> Optional[object]:
+    from app.services.admission import client_limiter
+    from app.services.cache import response_cache
+    from app.services.llm_client import llm_client
+    from benchmarks.fake_gemini import install_fake_model
+
+    fake = install_fake_model(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                              fence_rate=args.fence_rate, tail_rate=args.tail_rate, tail_latency=args.tail_latency,
+                              seed=args.seed)
+    response_cache.enabled = not args.no_cache
+    if args.llm_rpm is not None:
+        llm_client.bucket.rate = args.llm_rpm / 60.0
+    # Every in-process request comes from one client, so its rate limit is off unless asked for
+    client_limiter.rate = args.client_rpm / 60.0
+    return fake
+
+
+async def run(args) -> Dict[str, object]:
+    results = {}
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        from app.main import app
+
+        fake = _install_fake(args)
+        client = httpx.AsyncClient(app=app, base_url="http://bench", timeout=args.timeout)
+
+    async with client:
+        for scenario in args.scenarios.split(","):
+            results[scenario] = await run_scenario(client, scenario, args.requests, args.concurrency,
+                                                   not args.repeat_inputs, args.size)
+
+    if not args.url:
+        from app.services.llm_client import llm_client
+        from app.services.pdf_processor import shutdown_process_pool
+
+        results["llmClient"] = {"fakeCalls": fake.calls, **llm_client.stats()}
+        shutdown_process_pool()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API with a configurable request mix")
+    parser.add_argument("--url", help="base URL of a running server; defaults to the app in-process with a fake Gemini")
+    parser.add_argument("--scenarios", default="similarity,keywords,full,similarity_fast", help=f"comma-separated: {', '.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--size", default="medium", help="resume size: small, medium, large, xlarge")
+    parser.add_argument("--repeat-inputs", action="store_true", help="send the same resume every time to measure cache hits")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    # Fake Gemini settings, only used in-process
+    parser.add_argument("--latency", type=float, default=0.5, help="fake model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of fake calls failing with 503")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="fraction of fake calls that stall for --tail-latency")
+    parser.add_argument("--tail-latency", type=float, default=10.0)
+    parser.add_argument("--fence-rate", type=float, default=0.0, help="fraction of fake JSON answers wrapped in code fences")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-cache", action="store_true", help="disable the response cache")
+    parser.add_argument("--llm-rpm", type=float, help="override LLM_REQUESTS_PER_MINUTE; 0 disables rate limiting")
+    parser.add_argument("--client-rpm", type=float, default=0, help="per-client request limit in-process; 0 disables it")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    write_results("load_test", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Microbenchmarks for the CPU-bound hot paths: PDF extraction, prompt compaction, response parsing and local scoring"""
+import argparse
+import time
+from typing import Callable, Dict
+
+from benchmarks.corpus import SIZES, make_docx, make_job_description, make_pdf, make_resume, make_rtf
+from benchmarks.fake_gemini import FakeGenerativeModel
+from benchmarks.report import summarize, write_results
+
+
+def _time(fn: Callable[[], object], iterations: int, warmup: int = 2) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def _clear_scorer_caches(ats_scorer) -> None:
+    ats_scorer._analyze.cache_clear()
+    ats_scorer._analyze_sections.cache_clear()
+    ats_scorer._analyze_chunk.cache_clear()
+
+
+def run(iterations: int, sizes) -> Dict[str, Dict[str, float]]:
+    from app.services import ats_scorer
+    from app.schemas.analysis import SimilarityResponse
+    from app.services.ai_service import parse_missing_keywords
+    from app.services.extractors import extract_docx_text, extract_rtf_text
+    from app.services.pdf_processor import extract_text_from_pdf, read_resume_file
+    from app.services.structured_output import parse_structured
+    from app.services.text_preprocessor import compact_text
+
+    fake = FakeGenerativeModel(latency=0, jitter=0, seed=0)
+    keywords_text = fake._answer("MISSING KEYWORDS")
+    similarity_text = fake._answer("similarityScore")
+    fenced_similarity_text = f"Here is the analysis:\n```json\n{similarity_text}\n```"
+    job_description = make_job_description()
+
+    results = {}
+    for size in sizes:
+        resume = make_resume(size, seed=1)
+        pdf = make_pdf(resume)
+        results[f"extract_text_from_pdf[{size}]"] = _time(lambda: extract_text_from_pdf(pdf), iterations)
+        docx = make_docx(resume)
+        rtf = make_rtf(resume)
+        results[f"extract_docx_text[{size}]"] = _time(lambda: extract_docx_text(docx), iterations)
+        results[f"extract_rtf_text[{size}]"] = _time(lambda: extract_rtf_text(rtf), iterations)
+        results[f"read_resume_file_txt[{size}]"] = _time(lambda: read_resume_file(resume.encode(), "resume.txt"), iterations)
+        results[f"compact_text[{size}]"] = _time(lambda: compact_text(resume, 3000), iterations)
+        # Clear the analysis caches so every iteration measures a cold analysis
+        results[f"ats_analyze_match[{size}]"] = _time(
+            lambda: (_clear_scorer_caches(ats_scorer), ats_scorer.analyze_match(job_description, resume)), iterations)
+        # Re-score after editing one bullet: only the edited bullet is analyzed again
+        edits = iter(range(10 ** 9))
+        results[f"ats_analyze_match_one_edit[{size}]"] = _time(
+            lambda: ats_scorer.analyze_match(job_description, f"{resume}\n- Edited bullet {next(edits)}"), iterations)
+
+    results["parse_missing_keywords"] = _time(lambda: parse_missing_keywords(keywords_text), iterations)
+    results["parse_similarity_json"] = _time(
+        lambda: parse_structured(similarity_text, SimilarityResponse, "similarity"), iterations)
+    results["parse_similarity_json_repaired"] = _time(
+        lambda: parse_structured(fenced_similarity_text, SimilarityResponse, "similarity"), iterations)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run CPU microbenchmarks")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--sizes", default=",".join(SIZES))
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    config = {"iterations": args.iterations, "sizes": args.sizes.split(",")}
+    write_results("microbench", config, run(args.iterations, config["sizes"]), args.output)
+
+
+if __name__ == "__main__":
+    main()
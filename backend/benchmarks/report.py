@@ -0,0 +1,56 @@
+"""Shared timing statistics and JSON result output for the benchmark scripts"""
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    if not samples:
+        return {"count": 0}
+    return {
+        "count": len(samples),
+        "meanMs": round(sum(samples) / len(samples) * 1000, 3),
+        "p50Ms": round(percentile(samples, 50) * 1000, 3),
+        "p95Ms": round(percentile(samples, 95) * 1000, 3),
+        "p99Ms": round(percentile(samples, 99) * 1000, 3),
+        "maxMs": round(max(samples) * 1000, 3),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def write_results(name: str, config: Dict[str, Any], results: Any, output: Optional[str]) -> None:
+    """Print the results and optionally save them as JSON for comparison across commits"""
+    document = {"benchmark": name, "environment": environment(), "config": config, "results": results}
+    text = json.dumps(document, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
@@ -0,0 +1,76 @@
+import json
+import os
+import subprocess
+import sys
+
+from app.services.ats_scorer import analyze_match, find_missing_keywords, score_resume
+
+JOB_DESCRIPTION = """Senior Backend Engineer
+
+Requirements:
+- 5+ years of Python and FastAPI
+- AWS, Docker and Kubernetes in production
+- PostgreSQL and Redis
+
+Nice to have: Terraform, Kafka
+"""
+
+STRONG_RESUME = """Jane Doe
+Experience
+Senior Software Engineer, Acme (2018-2024)
+- Built FastAPI services in Python deployed with Docker on Kubernetes in AWS
+- Tuned PostgreSQL queries and added a Redis cache
+Skills
+Python, FastAPI, AWS, Docker, Kubernetes, PostgreSQL, Redis, Terraform
+"""
+
+WEAK_RESUME = """John Roe
+Experience
+Graphic Designer, Studio (2019-2024)
+- Designed brand identities in Illustrator and Photoshop
+Skills
+Illustrator, Photoshop, Figma
+"""
+
+
+def test_same_inputs_give_the_same_result():
+    assert analyze_match(JOB_DESCRIPTION, STRONG_RESUME) == analyze_match(JOB_DESCRIPTION, STRONG_RESUME)
+
+
+def test_score_is_the_same_in_every_process():
+    # Set iteration order changes with the hash seed; the score must not
+    script = (
+        "import json, sys; from app.services.ats_scorer import analyze_match; "
+        "print(json.dumps(analyze_match(sys.argv[1], sys.argv[2]), sort_keys=True))"
+    )
+    outputs = set()
+    for seed in ("1", "2", "3"):
+        env = {**os.environ, "PYTHONHASHSEED": seed}
+        result = subprocess.run([sys.executable, "-c", script, JOB_DESCRIPTION, STRONG_RESUME],
+                                capture_output=True, text=True, check=True, env=env,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        outputs.add(result.stdout)
+    assert len(outputs) == 1
+    assert json.loads(outputs.pop())["score"] == analyze_match(JOB_DESCRIPTION, STRONG_RESUME)["score"]
+
+
+def test_score_ignores_whitespace_and_line_endings():
+    reformatted = STRONG_RESUME.replace("\n", "\r\n").replace(", ", ",   ")
+    assert analyze_match(JOB_DESCRIPTION, reformatted)["score"] == analyze_match(JOB_DESCRIPTION, STRONG_RESUME)["score"]
+
+
+def test_better_match_scores_higher():
+    strong = analyze_match(JOB_DESCRIPTION, STRONG_RESUME)
+    weak = analyze_match(JOB_DESCRIPTION, WEAK_RESUME)
+    assert 0 <= weak["score"] < strong["score"] <= 100
+    assert set(strong["missingSkills"]) < set(weak["missingSkills"])
+
+
+def test_llm_shaped_responses():
+    similarity = score_resume(JOB_DESCRIPTION, STRONG_RESUME)
+    assert similarity["similarityScore"].endswith("%")
+    assert similarity["scoreBreakdown"]["version"]
+
+    keywords = find_missing_keywords(JOB_DESCRIPTION, WEAK_RESUME)
+    assert "python" in [keyword.lower() for keyword in keywords["missingKeywords"]]
+    assert keywords["optimizationSuggestions"]
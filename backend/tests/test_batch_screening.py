@@ -0,0 +1,76 @@
+import asyncio
+import io
+import zipfile
+
+import pytest
+
+from app.core.config import settings
+from app.services import batch_screening
+from app.services.batch_screening import create_batch_job, extract_zip_resumes
+from app.services.document_store import document_store
+from app.services.uploads import UploadTooLargeError
+
+
+def make_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    return buffer.getvalue()
+
+
+def test_zip_resumes_skip_folders_and_unsupported_files():
+    archive = make_zip({
+        "cvs/alice.txt": "Alice, Python developer",
+        "cvs/bob.pdf": b"%PDF-1.4 not really",
+        "__MACOSX/cvs/._alice.txt": "resource fork",
+        "cvs/notes.xlsx": "spreadsheet",
+    })
+
+    resumes = extract_zip_resumes(archive)
+
+    assert [r["name"] for r in resumes] == ["alice.txt", "bob.pdf"]
+    assert resumes[0]["content"] == b"Alice, Python developer"
+
+
+def test_zip_with_too_many_resumes_is_refused():
+    archive = make_zip({f"cv{n}.txt": f"resume {n}" for n in range(4)})
+
+    with pytest.raises(ValueError, match="at most 3 resumes"):
+        extract_zip_resumes(archive, max_resumes=3)
+
+
+def test_oversized_zip_entries_are_refused_before_decompressing(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 1024)
+    # Compresses to a few bytes, but declares its real size
+    archive = make_zip({"bomb.txt": "a" * 100_000})
+    assert len(archive) < 1024
+
+    with pytest.raises(UploadTooLargeError):
+        extract_zip_resumes(archive)
+
+
+def test_zip_expanding_past_the_request_limit_is_refused(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 1024)
+    monkeypatch.setattr(settings, "MAX_REQUEST_BYTES", 2048)
+    archive = make_zip({f"cv{n}.txt": "a" * 1000 for n in range(3)})
+
+    with pytest.raises(UploadTooLargeError):
+        extract_zip_resumes(archive)
+
+
+def test_batch_results_link_to_stored_documents():
+    content = b"Carol Smith\nPython, SQL and Airflow engineer with five years of data pipelines"
+
+    async def scenario():
+        job = await create_batch_job("Python data engineer with SQL", [{"name": "carol.txt", "content": content}],
+                                     mode="fast")
+        await asyncio.gather(*batch_screening._running_tasks)
+        result = (await batch_screening.get_batch_job(job["id"]))["results"][0]
+        return result, await document_store.get(result["documentId"])
+
+    result, document = asyncio.run(scenario())
+
+    assert result["score"] is not None
+    assert document["filename"] == "carol.txt"
+    assert "Airflow engineer" in document["content"]
@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+from app.services import storage
+from app.services.cache import ResponseCache
+from app.services.storage import SqliteStore
+
+
+def test_sqlite_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+
+    async def scenario():
+        await ResponseCache(maxsize=8, ttl=60, sqlite_path=path).set("key", {"summary": "Engineer"})
+        # A fresh cache, as after a restart or in another worker, reads through to SQLite and then keeps it in memory
+        restarted = ResponseCache(maxsize=8, ttl=60, sqlite_path=path)
+        first = await restarted.get("key")
+        restarted._disk = None
+        return first, await restarted.get("key"), restarted.stats()
+
+    first, second, stats = asyncio.run(scenario())
+
+    assert first == second == {"summary": "Engineer"}
+    assert stats["hits"] == 2
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = ResponseCache(maxsize=8, ttl=60, sqlite_path=str(tmp_path / "cache.db"), enabled=False)
+
+    async def scenario():
+        await cache.set("key", "value")
+        return await cache.get("key")
+
+    assert asyncio.run(scenario()) is None
+    assert SqliteStore(str(tmp_path / "cache.db"), "llm_responses").get("key") is None
+
+
+def test_expired_rows_are_not_returned(tmp_path):
+    store = SqliteStore(str(tmp_path / "store.db"), "items")
+    store.set("old", "value", ttl=60)
+    store.set("forever", "value")
+
+    store._conn.execute("UPDATE items SET expires_at = ? WHERE key = 'old'", (time.time() - 1,))
+    store._conn.commit()
+
+    assert store.get("old") is None
+    assert store.get("forever") == "value"
+
+
+def test_writes_purge_expired_rows_periodically(tmp_path, monkeypatch):
+    store = SqliteStore(str(tmp_path / "store.db"), "items")
+    store.set("a", 1, ttl=60)
+    store._conn.execute("UPDATE items SET expires_at = ?", (time.time() - 1,))
+    store._conn.commit()
+
+    # Within the purge interval the expired row stays on disk
+    store.set("b", 2, ttl=60)
+    assert store._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 2
+
+    monkeypatch.setattr(storage, "PURGE_INTERVAL_SECONDS", 0.0)
+    store._next_purge = 0.0
+    store.set("c", 3, ttl=60)
+    assert store._conn.execute("SELECT key FROM items ORDER BY key").fetchall() == [("b",), ("c",)]
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from app.services import cover_letter_queue as queue_module
+from app.services.cover_letter_queue import CoverLetterQueue, QueueFullError
+from app.services.llm_client import LLMUnavailableError
+from app.services.request_context import current_client, current_priority, request_scope
+
+
+def make_queue(**overrides):
+    options = dict(workers=1, max_depth=10, max_jobs=100, ttl=60)
+    options.update(overrides)
+    return CoverLetterQueue(**options)
+
+
+def submit(queue, name, priority="normal"):
+    return queue.submit({"name": name}, {"companyName": "Acme"}, "Job description", "Resume", priority)
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    """Stand-in for the LLM call, recording who asked and under which scheduling class and client"""
+    calls = []
+
+    async def generate_cover_letter(personal_info, company_info, job_description, resume_text):
+        calls.append((personal_info["name"], current_priority(), current_client()))
+        if personal_info["name"] == "unavailable":
+            raise LLMUnavailableError("Gemini is down", retry_after=7)
+        return f"Dear {company_info['companyName']}, from {personal_info['name']}"
+
+    monkeypatch.setattr(queue_module, "generate_cover_letter", generate_cover_letter)
+    return calls
+
+
+def test_jobs_run_by_priority_and_keep_their_client(generated):
+    queue = make_queue()
+
+    async def scenario():
+        with request_scope(client="alice"):
+            jobs = [await submit(queue, name, priority) for name, priority in
+                    [("low", "low"), ("normal", "normal"), ("high", "high"), ("normal2", "normal")]]
+        await queue._queue.join()
+        results = [await queue.get(job["id"]) for job in jobs]
+        queue.shutdown()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert generated == [("high", "interactive", "alice"), ("normal", "batch", "alice"),
+                         ("normal2", "batch", "alice"), ("low", "batch", "alice")]
+    assert all(job["status"] == "completed" for job in results)
+    assert results[0]["result"] == {"coverLetter": "Dear Acme, from low"}
+
+
+def test_full_queue_is_refused(generated):
+    queue = make_queue(max_depth=2)
+
+    async def scenario():
+        await submit(queue, "first")
+        await submit(queue, "second")
+        with pytest.raises(QueueFullError) as refused:
+            await submit(queue, "third")
+        queue.shutdown()
+        return refused.value
+
+    assert asyncio.run(scenario()).retry_after >= 1
+
+
+def test_unknown_priority_is_refused():
+    with pytest.raises(ValueError):
+        asyncio.run(submit(make_queue(), "someone", priority="urgent"))
+
+
+def test_unavailable_llm_fails_the_job_with_a_retry_hint(generated):
+    queue = make_queue()
+
+    async def scenario():
+        job = await submit(queue, "unavailable")
+        await queue._queue.join()
+        queue.shutdown()
+        return await queue.get(job["id"])
+
+    job = asyncio.run(scenario())
+
+    assert job["status"] == "failed"
+    assert job["retryAfter"] == 7
+    assert job["finishedAt"] >= job["startedAt"]
+
+
+def test_jobs_can_be_read_from_shared_state(generated, tmp_path):
+    path = str(tmp_path / "state.db")
+    queue = make_queue(sqlite_path=path)
+
+    async def scenario():
+        job = await submit(queue, "shared")
+        await queue._queue.join()
+        queue.shutdown()
+        # Another worker process has none of the jobs in memory
+        return await make_queue(sqlite_path=path).get(job["id"])
+
+    assert asyncio.run(scenario())["status"] == "completed"
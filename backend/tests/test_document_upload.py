@@ -0,0 +1,49 @@
+import asyncio
+import hashlib
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.main import app
+from app.services.document_store import document_store
+
+UPLOAD_URL = f"{settings.API_V1_STR}/documents/upload"
+
+
+@pytest.fixture(autouse=True)
+def parse_in_threads(monkeypatch):
+    monkeypatch.setattr(settings, "PDF_WORKERS", 0)
+
+
+def upload(filename: str, content: bytes):
+    async def send():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post(UPLOAD_URL, files={"file": (filename, content)})
+            return response, await document_store.get(hashlib.sha256(content).hexdigest())
+
+    return asyncio.run(send())
+
+
+def test_text_upload_is_stored():
+    response, stored = upload("resume.txt", b"Dana Lee\nData engineer, Python and Spark")
+
+    assert response.status_code == 200
+    assert response.json()["content"] == "Dana Lee\nData engineer, Python and Spark"
+    assert stored["id"] == response.json()["id"]
+
+
+def test_unsupported_file_is_refused_and_not_stored():
+    response, stored = upload("resume.bin", b"\x00\x01\x02binary\x00" * 16)
+
+    assert response.status_code == 415
+    assert "Unsupported file type" in response.json()["detail"]
+    assert stored is None
+
+
+def test_unreadable_pdf_is_refused_and_not_stored():
+    response, stored = upload("resume.pdf", b"%PDF-1.4\nthis is not really a pdf")
+
+    assert response.status_code == 400
+    assert "Error extracting text from PDF" in response.json()["detail"]
+    assert stored is None
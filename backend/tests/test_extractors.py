@@ -0,0 +1,59 @@
+import io
+import zipfile
+
+from app.services.extractors import DOCX, PDF, RTF, TEXT, UNKNOWN, ZIP, detect_mime_type, get_extractor, sniff_mime_type
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def make_docx(*paragraphs: str) -> bytes:
+    body = "".join(f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>" for text in paragraphs)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+        archive.writestr("word/document.xml", f'<w:document xmlns:w="{W_NS}"><w:body>{body}</w:body></w:document>')
+    return buffer.getvalue()
+
+
+def test_sniff_known_signatures():
+    assert sniff_mime_type(b"%PDF-1.7\n") == PDF
+    assert sniff_mime_type(b"{\\rtf1\\ansi") == RTF
+    assert sniff_mime_type(b"PK\x03\x04rest") == ZIP
+
+
+def test_sniff_text_in_any_single_byte_encoding():
+    assert sniff_mime_type("Jane Doe\nPython developer".encode("utf-8")) == TEXT
+    assert sniff_mime_type("Résumé – José".encode("cp1252")) == TEXT
+    assert sniff_mime_type(b"\x00\x01\x02binary") == UNKNOWN
+
+
+def test_detect_docx_inside_zip():
+    assert detect_mime_type(make_docx("Hello")) == DOCX
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("notes.txt", "not a word document")
+    assert detect_mime_type(buffer.getvalue()) == ZIP
+
+
+def test_plain_text_falls_back_to_cp1252():
+    extract = get_extractor(TEXT)
+    assert extract("Résumé – José".encode("cp1252")) == "Résumé – José"
+    assert extract("﻿Résumé".encode("utf-8")) == "Résumé"
+
+
+def test_docx_paragraphs_become_lines():
+    content = make_docx("Jane Doe", "Senior Python Engineer", "AWS &amp; Kubernetes")
+    assert get_extractor(DOCX)(content) == "Jane Doe\nSenior Python Engineer\nAWS & Kubernetes"
+
+
+def test_rtf_text_without_formatting_groups():
+    rtf = (
+        rb"{\rtf1\ansi\ansicpg1252{\fonttbl{\f0 Arial;}}{\info{\author Someone}}"
+        rb"\f0\fs24 Jos\'e9 Doe\par"
+        rb"{\b Skills:} Python\tab AWS\par}"
+    )
+    text = get_extractor(RTF)(rtf)
+    assert "José Doe" in text
+    assert "Skills: Python\tAWS" in text
+    assert "Arial" not in text and "Someone" not in text
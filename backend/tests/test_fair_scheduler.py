@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.llm_client import FairScheduler, LLMClient, LLMOverloadedError
+
+
+async def grant_order(scheduler, calls):
+    """Queue calls behind a held slot, then free one slot at a time and record who gets it"""
+    await scheduler.acquire("interactive", "holder")
+    order = []
+
+    async def call(priority, client):
+        await scheduler.acquire(priority, client)
+        order.append((priority, client))
+
+    tasks = [asyncio.create_task(call(priority, client)) for priority, client in calls]
+    await asyncio.sleep(0)
+    for _ in calls:
+        scheduler.release()
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_classes_share_slots_by_weight():
+    scheduler = FairScheduler(capacity=1, weights={"interactive": 4, "batch": 1}, max_depth={})
+    calls = [("batch", "screening")] * 10 + [("interactive", "user")] * 10
+
+    order = asyncio.run(grant_order(scheduler, calls))
+
+    # Batch calls were queued first, yet interactive calls get four slots for every batch slot
+    first_five = [priority for priority, _ in order[:5]]
+    assert first_five.count("interactive") == 4
+    assert len(order) == len(calls)
+
+
+def test_clients_in_a_class_take_turns():
+    scheduler = FairScheduler(capacity=1, weights={"interactive": 1}, max_depth={})
+    calls = [("interactive", "heavy")] * 8 + [("interactive", "light")] * 2
+
+    order = asyncio.run(grant_order(scheduler, calls))
+
+    # The light client does not wait behind all of the heavy client's calls
+    assert [client for _, client in order[:4]].count("light") == 2
+
+
+def test_full_class_is_refused_and_other_classes_still_queue():
+    async def scenario():
+        scheduler = FairScheduler(capacity=1, weights={"interactive": 8, "batch": 1},
+                                  max_depth={"interactive": 2, "batch": 0})
+        await scheduler.acquire("interactive", "holder")
+        queued = [asyncio.create_task(scheduler.acquire("interactive", f"c{i}")) for i in range(2)]
+        batch = [asyncio.create_task(scheduler.acquire("batch", "screening")) for _ in range(5)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(LLMOverloadedError) as refused:
+            await scheduler.acquire("interactive", "late")
+        waiting = dict(scheduler.waiting)
+
+        for task in queued + batch:
+            task.cancel()
+        await asyncio.gather(*queued, *batch, return_exceptions=True)
+        return refused.value, waiting, dict(scheduler.waiting)
+
+    refused, waiting, after_cancel = asyncio.run(scenario())
+    assert refused.retry_after >= 1
+    assert waiting == {"interactive": 2, "batch": 5}
+    assert after_cancel == {"interactive": 0, "batch": 0}
+
+
+def test_cancelled_waiters_do_not_swallow_slots():
+    async def scenario():
+        scheduler = FairScheduler(capacity=1, weights={"interactive": 1}, max_depth={})
+        await scheduler.acquire("interactive", "holder")
+        gone = asyncio.create_task(scheduler.acquire("interactive", "gone"))
+        kept = asyncio.create_task(scheduler.acquire("interactive", "kept"))
+        await asyncio.sleep(0)
+        gone.cancel()
+        await asyncio.gather(gone, return_exceptions=True)
+
+        scheduler.release()
+        await asyncio.wait_for(kept, timeout=1)
+        scheduler.release()
+        return scheduler.active
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_operation_limit_waiters_do_not_hold_shared_slots(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MAX_CONCURRENCY", 4)
+    monkeypatch.setattr(settings, "LLM_OPERATION_CONCURRENCY", {"cover_letter": 1})
+
+    async def scenario():
+        client = LLMClient(lambda name: None)
+        held = await client._acquire_slots("cover_letter")
+        queued = [asyncio.create_task(client._acquire_slots("cover_letter")) for _ in range(5)]
+        await asyncio.sleep(0)
+
+        # One letter is running; the queued ones leave the other shared slots to other operations
+        assert client.scheduler.active == 1
+        await asyncio.wait_for(client._acquire_slots("summary"), timeout=1)
+        assert client.scheduler.active == 2
+
+        for task in queued:
+            task.cancel()
+        await asyncio.gather(*queued, return_exceptions=True)
+        held.release()
+        client.scheduler.release()
+        client.scheduler.release()
+        assert client.scheduler.active == 0
+
+    asyncio.run(scenario())
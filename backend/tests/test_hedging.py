@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.hedging import Hedger, LatencyWindow
+from app.services.llm_client import LLMClient, TokenBucket
+
+
+@pytest.fixture(autouse=True)
+def hedged_operations(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_HEDGE_OPERATIONS", ["summary"])
+
+
+def make_hedger(**overrides):
+    options = dict(percentile=90, budget_ratio=1.0, max_in_flight=1, min_samples=5, min_delay=0.01)
+    options.update(overrides)
+    return Hedger(**options)
+
+
+def test_percentile_uses_nearest_rank():
+    window = LatencyWindow(10)
+    assert window.percentile(95) is None
+    for seconds in range(1, 11):
+        window.add(seconds)
+    assert window.percentile(90) == 9
+    assert window.percentile(100) == 10
+
+
+def test_no_hedging_before_enough_samples():
+    hedger = make_hedger()
+    for _ in range(4):
+        hedger.record("summary", 1.0)
+    assert hedger.delay("summary") is None
+    hedger.record("summary", 1.0)
+    assert hedger.delay("summary") == 1.0
+
+
+def test_only_hedged_operations_are_recorded_and_exported():
+    hedger = make_hedger()
+    for _ in range(10):
+        hedger.record("summary", 0.5)
+        hedger.record("cover_letter", 30.0)
+
+    assert hedger.delay("cover_letter") is None
+    assert hedger.stats()["delays"] == {"summary": 0.5}
+
+
+def test_hedges_are_limited_by_budget():
+    hedger = make_hedger(budget_ratio=0.5, max_in_flight=2)
+    for _ in range(5):
+        hedger.record("summary", 1.0)
+
+    hedger.delay("summary")
+    assert not hedger.try_start()
+    hedger.delay("summary")
+    assert hedger.try_start()
+    hedger.finish()
+    assert not hedger.try_start()
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+        self.parts = [text]
+
+
+class SlowFirstModel:
+    """The first call stalls; any later call answers at once"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            await asyncio.sleep(5)
+            return Response("primary")
+        return Response("hedge")
+
+
+def test_slow_call_is_hedged_and_the_first_answer_wins():
+    model = SlowFirstModel()
+    client = LLMClient(lambda name: model)
+    client.bucket = TokenBucket(0, 0)
+    client.hedger = make_hedger()
+    for _ in range(5):
+        client.hedger.record("summary", 0.01)
+
+    response = asyncio.run(client.generate("prompt", operation="summary"))
+
+    assert response.text == "hedge"
+    assert model.calls == 2
+    assert client.counters["hedge_wins:summary"] == 1
+    assert client.hedger.in_flight == 0
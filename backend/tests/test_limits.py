@@ -0,0 +1,59 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI, Form
+
+from app.core.limits import BodySizeLimitMiddleware
+
+MAX_BYTES = 1024
+
+app = FastAPI()
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=MAX_BYTES)
+
+
+@app.post("/echo")
+async def echo(text: str = Form(...)):
+    return {"length": len(text)}
+
+
+def post(**kwargs) -> httpx.Response:
+    async def send():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            return await client.post("/echo", **kwargs)
+
+    return asyncio.run(send())
+
+
+def multipart_chunks(size: int):
+    """A multipart form sent chunked, so the server only learns its size while reading it"""
+    async def chunks():
+        yield b'--boundary\r\nContent-Disposition: form-data; name="text"\r\n\r\n'
+        for _ in range(size // 256):
+            yield b"a" * 256
+        yield b"\r\n--boundary--\r\n"
+
+    return chunks()
+
+
+def test_small_body_passes():
+    response = post(data={"text": "hello"})
+    assert response.status_code == 200
+    assert response.json() == {"length": 5}
+
+
+def test_declared_length_over_the_limit_is_refused():
+    response = post(data={"text": "a" * (MAX_BYTES * 2)})
+    assert response.status_code == 413
+
+
+def test_streamed_body_over_the_limit_is_refused_with_413():
+    response = post(content=multipart_chunks(MAX_BYTES * 4),
+                    headers={"content-type": "multipart/form-data; boundary=boundary"})
+    assert response.status_code == 413
+    assert str(MAX_BYTES) in response.json()["detail"]
+
+
+def test_streamed_body_under_the_limit_passes():
+    response = post(content=multipart_chunks(512), headers={"content-type": "multipart/form-data; boundary=boundary"})
+    assert response.status_code == 200
+    assert response.json() == {"length": 512}
@@ -0,0 +1,144 @@
+import asyncio
+import time
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from app.core.config import settings
+from app.services.llm_client import CircuitBreaker, LLMClient, LLMUnavailableError, TokenBucket
+from app.services.model_routing import resolve_route
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+        self.parts = [text]
+
+
+class ScriptedModel:
+    """Answers with the scripted texts and raises the scripted errors, in order"""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.calls += 1
+        step = self.script.pop(0) if self.script else "ok"
+        if isinstance(step, BaseException):
+            raise step
+        return Response(step)
+
+
+class BlockedBucket(TokenBucket):
+    """A quota wait that never finishes, until it is cancelled"""
+
+    def __init__(self):
+        super().__init__(0, 0)
+        self.waiting = asyncio.Event()
+
+    async def acquire(self) -> float:
+        self.waiting.set()
+        await asyncio.Event().wait()
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY", 0.0)
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_DELAY", 0.0)
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 2)
+
+
+def make_client(model) -> LLMClient:
+    client = LLMClient(lambda name: model)
+    client.bucket = TokenBucket(0, 0)
+    return client
+
+
+def open_circuit(client: LLMClient, operation: str) -> CircuitBreaker:
+    """Trip the operation's circuit and let its recovery time pass, so the next call is the half-open probe"""
+    breaker = client.breaker(resolve_route(operation).model)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker._opened_at = time.monotonic() - breaker.recovery_seconds - 1
+    return breaker
+
+
+def test_breaker_opens_probes_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_seconds=60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    breaker._opened_at -= 61
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    # Only one probe at a time
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=5, recovery_seconds=60)
+    breaker.state, breaker._opened_at = "open", time.monotonic() - 61
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.retry_after() > 0
+
+
+def test_transient_errors_are_retried(fast_retries):
+    model = ScriptedModel(google_exceptions.ServiceUnavailable("busy"), asyncio.TimeoutError(), "answer")
+    client = make_client(model)
+
+    response = asyncio.run(client.generate("prompt", operation="summary"))
+
+    assert response.text == "answer"
+    assert model.calls == 3
+    assert client.counters["retries:summary"] == 2
+
+
+def test_exhausted_retries_raise_unavailable(fast_retries):
+    model = ScriptedModel(*[google_exceptions.TooManyRequests("quota")] * 3)
+    client = make_client(model)
+
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(client.generate("prompt", operation="summary"))
+    assert model.calls == 3
+    assert client.counters["retries_exhausted:summary"] == 1
+
+
+def test_non_retryable_error_releases_the_probe(fast_retries):
+    client = make_client(ScriptedModel(ValueError("bad request"), "answer"))
+    breaker = open_circuit(client, "summary")
+
+    with pytest.raises(ValueError):
+        asyncio.run(client.generate("prompt", operation="summary"))
+    assert breaker.state == "half_open"
+
+    assert asyncio.run(client.generate("prompt", operation="summary")).text == "answer"
+    assert breaker.state == "closed"
+
+
+def test_cancelled_quota_wait_releases_the_probe(fast_retries):
+    model = ScriptedModel("answer")
+    client = make_client(model)
+    breaker = open_circuit(client, "summary")
+
+    async def scenario():
+        blocked = client.bucket = BlockedBucket()
+        call = asyncio.create_task(client.generate("prompt", operation="summary"))
+        await blocked.waiting.wait()
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+        # The next call gets to probe instead of failing fast for good
+        client.bucket = TokenBucket(0, 0)
+        return await client.generate("prompt", operation="summary")
+
+    assert asyncio.run(scenario()).text == "answer"
+    assert breaker.state == "closed"
+    assert client.scheduler.active == 0
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.llm_client import LLMClient, LLMUnavailableError, TokenBucket
+from app.services.model_routing import resolve_route, route_layer, routed_models
+
+ROUTES = {
+    "summary": {"model": "small", "max_output_tokens": 256, "temperature": 0.2},
+    "cover_letter": {"model": "large", "timeout": 90},
+    "batch": {"model": "cheap", "fallback_model": "cheap-lite"},
+}
+
+
+@pytest.fixture(autouse=True)
+def routes(monkeypatch):
+    monkeypatch.setattr(settings, "GEMINI_MODEL", "default")
+    monkeypatch.setattr(settings, "LLM_FALLBACK_MODEL", "fallback")
+    monkeypatch.setattr(settings, "LLM_ROUTES", ROUTES)
+
+
+def test_operations_use_their_route_over_the_defaults():
+    summary = resolve_route("summary")
+    assert (summary.model, summary.fallback_model) == ("small", "fallback")
+    assert summary.generation_config() == {"max_output_tokens": 256, "temperature": 0.2}
+
+    assert resolve_route("cover_letter").timeout == 90
+    assert resolve_route("keywords").model == "default"
+    assert resolve_route("keywords").generation_config() == {}
+
+
+def test_batch_layer_applies_over_the_operation_route():
+    with route_layer("batch"):
+        route = resolve_route("summary")
+    assert (route.model, route.fallback_model, route.max_output_tokens) == ("cheap", "cheap-lite", 256)
+    assert resolve_route("summary").model == "small"
+
+
+def test_routed_models_lists_every_model():
+    assert routed_models() == ["cheap", "cheap-lite", "default", "fallback", "large", "small"]
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+        self.parts = [text]
+
+
+class NamedModel:
+    def __init__(self, name, calls):
+        self.name = name
+        self.calls = calls
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.calls.append((self.name, kwargs.get("generation_config")))
+        return Response(self.name)
+
+
+def make_client():
+    calls = []
+    client = LLMClient(lambda name: NamedModel(name, calls))
+    client.bucket = TokenBucket(0, 0)
+    return client, calls
+
+
+def test_calls_go_to_the_routed_model_with_its_config():
+    client, calls = make_client()
+
+    response = asyncio.run(client.generate("prompt", operation="summary",
+                                           generation_config={"response_mime_type": "application/json"}))
+
+    assert response.text == "small"
+    assert calls == [("small", {"max_output_tokens": 256, "temperature": 0.2,
+                                "response_mime_type": "application/json"})]
+
+
+def test_open_circuit_moves_calls_to_the_fallback():
+    client, calls = make_client()
+    breaker = client.breaker("small")
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+    assert asyncio.run(client.generate("prompt", operation="summary")).text == "fallback"
+    assert client.counters["fallbacks:summary"] == 1
+
+    fallback = client.breaker("fallback")
+    for _ in range(fallback.failure_threshold):
+        fallback.record_failure()
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(client.generate("prompt", operation="summary"))
+    assert client.counters["circuit_rejections:summary"] == 1
+
+
+def test_backed_up_calls_move_to_the_fallback(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_FALLBACK_QUEUE_DEPTH", 2)
+    client, _ = make_client()
+    client.waiting = 2
+
+    assert asyncio.run(client.generate("prompt", operation="summary")).text == "fallback"
@@ -0,0 +1,61 @@
+import asyncio
+
+import httpx
+
+from app.core.config import settings
+from app.main import app
+
+ADMIN_URL = f"{settings.API_V1_STR}/admin/profiling"
+TOKEN = "s3cret"
+
+
+def configure(monkeypatch, enabled=False, token="", slow_after=0.0):
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", enabled)
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", token)
+    monkeypatch.setattr(settings, "PROFILE_SLOW_REQUEST_SECONDS", slow_after)
+
+
+def request(method, url, token=None, **kwargs):
+    headers = kwargs.pop("headers", {})
+    if token is not None:
+        headers["X-Profile-Token"] = token
+
+    async def send():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            return await client.request(method, url, headers=headers, **kwargs)
+
+    return asyncio.run(send())
+
+
+def test_nothing_is_profiled_without_a_token(monkeypatch):
+    configure(monkeypatch, enabled=True, slow_after=1.0)
+
+    assert request("GET", ADMIN_URL).status_code == 404
+    assert request("GET", ADMIN_URL, token="").status_code == 404
+    assert "x-profile-id" not in request("GET", "/health", headers={"X-Profile": "1"}).headers
+
+
+def test_admin_routes_need_the_token(monkeypatch):
+    configure(monkeypatch, enabled=True, token=TOKEN)
+
+    assert request("GET", ADMIN_URL).status_code == 403
+    assert request("GET", ADMIN_URL, token="wrong").status_code == 403
+    assert request("GET", ADMIN_URL, token=TOKEN).status_code == 200
+
+
+def test_slow_request_profiles_can_be_read_without_profiling_enabled(monkeypatch):
+    configure(monkeypatch, token=TOKEN, slow_after=1.0)
+
+    assert request("GET", ADMIN_URL, token=TOKEN).status_code == 200
+    assert request("POST", f"{ADMIN_URL}/start", token=TOKEN).status_code == 404
+
+
+def test_requested_profile_can_be_downloaded(monkeypatch):
+    configure(monkeypatch, enabled=True, token=TOKEN)
+
+    response = request("GET", "/health", token=TOKEN, headers={"X-Profile": "1"})
+    profile_id = response.headers["x-profile-id"]
+
+    download = request("GET", f"{ADMIN_URL}/{profile_id}", token=TOKEN)
+    assert download.status_code == 200
+    assert "speedscope" in download.json()["$schema"]
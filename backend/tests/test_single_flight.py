@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+class Upstream:
+    """A slow call that counts how often it really ran"""
+
+    def __init__(self, result="ok", error=None, delay=0.05):
+        self.result = result
+        self.error = error
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flight, upstream = SingleFlight(), Upstream()
+        results = await asyncio.gather(*(flight.do("key", upstream) for _ in range(5)))
+        return results, upstream.calls, flight.in_flight()
+
+    results, calls, in_flight = asyncio.run(scenario())
+    assert results == ["ok"] * 5
+    assert calls == 1
+    assert in_flight == 0
+
+
+def test_error_reaches_every_caller():
+    async def scenario():
+        flight, upstream = SingleFlight(), Upstream(error=ValueError("upstream failed"))
+        results = await asyncio.gather(*(flight.do("key", upstream) for _ in range(3)), return_exceptions=True)
+        return results, upstream.calls
+
+    results, calls = asyncio.run(scenario())
+    assert calls == 1
+    assert all(isinstance(result, ValueError) and str(result) == "upstream failed" for result in results)
+
+
+def test_one_caller_cancelling_does_not_cancel_the_others():
+    async def scenario():
+        flight, upstream = SingleFlight(), Upstream()
+        leaving = asyncio.create_task(flight.do("key", upstream))
+        staying = asyncio.create_task(flight.do("key", upstream))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return await staying, upstream.cancelled
+
+    result, cancelled = asyncio.run(scenario())
+    assert result == "ok"
+    assert cancelled == 0
+
+
+def test_last_caller_cancelling_cancels_the_call_and_a_new_caller_starts_fresh():
+    async def scenario():
+        flight, upstream = SingleFlight(), Upstream()
+        first = asyncio.create_task(flight.do("key", upstream))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        # Joins straight after the cancel, before the cancelled call has finished unwinding
+        second = asyncio.create_task(flight.do("key", upstream))
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second, upstream.calls, upstream.cancelled
+
+    result, calls, cancelled = asyncio.run(scenario())
+    assert result == "ok"
+    assert calls == 2
+    assert cancelled == 1
+
+
+def test_disabled_runs_every_call():
+    async def scenario():
+        flight, upstream = SingleFlight(enabled=False), Upstream()
+        await asyncio.gather(*(flight.do("key", upstream) for _ in range(3)))
+        return upstream.calls
+
+    assert asyncio.run(scenario()) == 3
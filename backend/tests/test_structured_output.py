@@ -0,0 +1,63 @@
+import asyncio
+
+from app.schemas.analysis import SimilarityResponse
+from app.services import ai_service
+from app.services.structured_output import parse_json_object, parse_structured, structured_outputs
+
+
+def outcomes(operation):
+    return {labels["outcome"]: value for _, labels, value in structured_outputs.samples() if labels["operation"] == operation}
+
+
+def test_valid_json_is_parsed_as_is():
+    assert parse_json_object('{"summary": "ok"}', "test_valid") == {"summary": "ok"}
+    assert outcomes("test_valid") == {"valid": 1}
+
+
+def test_fenced_or_wrapped_json_is_repaired():
+    text = 'Here you go:\n```json\n{"similarityScore": 82, "similarityExplanation": "Close"}\n```\nAnything else?'
+
+    similarity = parse_structured(text, SimilarityResponse, "test_repaired")
+
+    assert similarity.similarityScore == "82%"
+    assert outcomes("test_repaired") == {"repaired": 1}
+
+
+def test_unrecoverable_or_invalid_responses_are_none():
+    assert parse_json_object("I cannot help with that.", "test_invalid") is None
+    assert parse_json_object('["not", "an", "object"]', "test_invalid") is None
+    assert parse_structured('{"similarityExplanation": "no score"}', SimilarityResponse, "test_invalid") is None
+    assert outcomes("test_invalid") == {"invalid": 3}
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+        self.parts = [text]
+
+
+def run_full_analysis(monkeypatch, reply, resume):
+    async def generate(prompt, operation, timeout=None, **kwargs):
+        return Response(reply)
+
+    monkeypatch.setattr(ai_service.llm_client, "generate", generate)
+    return asyncio.run(ai_service.get_full_analysis("Python developer with SQL", resume))
+
+
+def test_full_analysis_without_a_score_falls_back(monkeypatch):
+    reply = '{"summary": "Engineer", "missingKeywords": ["SQL"], "optimizationSuggestions": "Add SQL"}'
+
+    assert run_full_analysis(monkeypatch, reply, "Resume without a scored analysis") is None
+
+
+def test_full_analysis_is_built_from_one_response(monkeypatch):
+    reply = ('{"summary": "Engineer", "similarityScore": "75", "similarityExplanation": "No SQL",'
+             ' "missingKeywords": "SQL, Airflow", "optimizationSuggestions": ["Add SQL", "Add Airflow"]}')
+
+    analysis = run_full_analysis(monkeypatch, reply, "Resume with a complete analysis")
+
+    assert analysis == {
+        "summary": "Engineer",
+        "similarity": {"similarityScore": "75%", "similarityExplanation": "No SQL"},
+        "keywords": {"missingKeywords": ["SQL", "Airflow"], "optimizationSuggestions": "Add SQL\nAdd Airflow"},
+    }
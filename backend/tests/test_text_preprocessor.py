@@ -0,0 +1,61 @@
+from app.services.text_preprocessor import compact_text, dedupe_lines, strip_boilerplate, trim_to_budget
+
+HEADER = "Jane Doe | jane@example.com"
+
+
+def resume_pages(*bodies):
+    return "\f".join(f"{HEADER}\n{body}\nPage {n} of {len(bodies)}" for n, body in enumerate(bodies, 1))
+
+
+def test_repeated_page_headers_are_kept_once():
+    text = resume_pages("Experience\nBuilt things", "Education\nBSc Physics")
+
+    compacted, stats = compact_text(text, max_tokens=0)
+
+    assert compacted.count(HEADER) == 1
+    assert "Page 1 of 2" not in compacted and "Page 2 of 2" not in compacted
+    assert "Education\nBSc Physics" in compacted
+    assert stats["tokensSaved"] > 0
+
+
+def test_lines_repeated_in_the_body_are_kept():
+    jobs = "\n".join(f"Engineer at Company {n}\nResponsibilities:\n- Python\n- Led a team of five" for n in range(3))
+    assert dedupe_lines(jobs) == jobs
+    # Also across pages, when the repeats are content rather than page furniture
+    text = resume_pages("Summary\nIntro\nResponsibilities:\n- Python\nShipped the billing system\nCut costs by a third",
+                        "Roles\nFirst\nResponsibilities:\n- Python\nMentored two engineers\nRan the on-call rotation")
+    assert compact_text(text, max_tokens=0)[0].count("- Python") == 2
+
+
+def test_boilerplate_is_stripped_from_job_postings_only():
+    posting = "\n".join([
+        "Senior Backend Engineer",
+        "Build cookie-cutter-free APIs that millions rely on.",
+        "Acme Corp is an equal opportunity employer and values diversity.",
+        "Apply now",
+        "© 2024 Acme Corp. All rights reserved.",
+    ])
+
+    compacted, _ = compact_text(posting, max_tokens=0, job_posting=True)
+
+    assert compacted == "Senior Backend Engineer\nBuild cookie-cutter-free APIs that millions rely on."
+    assert compact_text(posting, max_tokens=0)[0] == posting
+
+
+def test_boilerplate_phrases_inside_content_are_kept():
+    lines = [
+        "Built the cookie consent service used across 40 sites",
+        "Grew signups 30% with an apply now call to action",
+        "Wrote our privacy policy tooling",
+    ]
+    assert strip_boilerplate("\n".join(lines)) == "\n".join(lines)
+
+
+def test_trim_cuts_at_a_line_boundary():
+    text = "\n".join(f"line {n:03d} " + "x" * 30 for n in range(100))
+
+    trimmed = trim_to_budget(text, max_tokens=100)
+
+    assert trimmed.endswith("\n[...]")
+    assert all(line.startswith("line ") for line in trimmed.split("\n")[:-1])
+    assert len(trimmed) <= 100 * 4 + 6
@@ -37,9 +37,7 @@ import CoverLetter from './components/generation/CoverLetter';
 
 // Services & Types
 import {
-  getResumeSummary,
-  getSimilarityScore,
-  getMissingKeywords,
+  getFullAnalysis,
   generateCoverLetter,
 } from './services/api';
 import {
@@ -117,32 +115,10 @@ const App = () => {
   // Track animation direction
   const [direction, setDirection] = useState<number>(0);
   
-  // Resume Summary mutation
-  const summaryMutation = useMutation({
+  // Combined analysis mutation (summary, similarity and keywords)
+  const analysisMutation = useMutation({
     mutationFn: () => 
-      getResumeSummary(resumeJobForm.resumeText, resumeJobForm.resumeFile),
-    onSuccess: (data) => {
-      setResults((prev) => ({
-        ...prev,
-        summary: data.summary,
-      }));
-    },
-    onError: (error) => {
-      console.error('Error getting resume summary:', error);
-      toast({
-        title: 'Error',
-        description: 'Failed to generate resume summary. Please try again.',
-        status: 'error',
-        duration: 5000,
-        isClosable: true,
-      });
-    },
-  });
-  
-  // Similarity Score mutation
-  const similarityMutation = useMutation({
-    mutationFn: () => 
-      getSimilarityScore(
+      getFullAnalysis(
         resumeJobForm.jobDescription,
         resumeJobForm.resumeText,
         resumeJobForm.resumeFile
@@ -150,40 +126,28 @@ const App = () => {
     onSuccess: (data) => {
       setResults((prev) => ({
         ...prev,
-        similarity: data,
-      }));
-    },
-    onError: (error) => {
-      console.error('Error getting similarity score:', error);
-      toast({
-        title: 'Error',
-        description: 'Failed to generate similarity score. Please try again.',
-        status: 'error',
-        duration: 5000,
-        isClosable: true,
-      });
-    },
-  });
-  
-  // Keywords mutation
-  const keywordsMutation = useMutation({
-    mutationFn: () => 
-      getMissingKeywords(
-        resumeJobForm.jobDescription,
-        resumeJobForm.resumeText,
-        resumeJobForm.resumeFile
-      ),
-    onSuccess: (data) => {
-      setResults((prev) => ({
-        ...prev,
-        keywords: data,
+        summary: data.summary ?? undefined,
+        similarity: data.similarity ?? undefined,
+        keywords: data.keywords ?? undefined,
       }));
+      
+      // Report any part of the analysis that failed
+      const failed = Object.keys(data.errors);
+      if (failed.length > 0) {
+        toast({
+          title: 'Partial results',
+          description: `Some analyses could not be completed: ${failed.join(', ')}.`,
+          status: 'warning',
+          duration: 5000,
+          isClosable: true,
+        });
+      }
     },
     onError: (error) => {
-      console.error('Error getting missing keywords:', error);
+      console.error('Error analyzing resume:', error);
       toast({
         title: 'Error',
-        description: 'Failed to analyze keywords. Please try again.',
+        description: 'Failed to analyze your resume. Please try again.',
         status: 'error',
         duration: 5000,
         isClosable: true,
@@ -233,20 +197,14 @@ const App = () => {
   
   // Check if any mutation is loading
   const isLoading =
-    summaryMutation.isLoading ||
-    similarityMutation.isLoading ||
-    keywordsMutation.isLoading ||
+    analysisMutation.isLoading ||
     coverLetterMutation.isLoading;
   
   // Handle Resume & Job form submission
   const handleResumeJobSubmit = async () => {
     try {
-      // Start all analysis mutations in parallel
-      await Promise.all([
-        summaryMutation.mutateAsync(),
-        similarityMutation.mutateAsync(),
-        keywordsMutation.mutateAsync(),
-      ]);
+      // Run all analyses with a single upload
+      await analysisMutation.mutateAsync();
       
       // Move to the next step
       setDirection(1);
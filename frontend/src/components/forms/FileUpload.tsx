@@ -32,7 +32,7 @@ interface FileUploadProps {
 const FileUpload: React.FC<FileUploadProps> = ({
   onFileContent,
   onFileSelected,
-  accept = '.pdf,.txt,.docx',
+  accept = '.pdf,.txt,.docx,.rtf',
   maxSize = 5 * 1024 * 1024, // 5MB
   label = 'Upload File',
   placeholder = 'Drag and drop a file here, or click to select a file',
@@ -75,6 +75,7 @@ const FileUpload: React.FC<FileUploadProps> = ({
       'application/pdf': ['.pdf'],
       'text/plain': ['.txt'],
       'application/vnd.openxmlformats-officedocument.wordprocessingml.document': ['.docx'],
+      'application/rtf': ['.rtf'],
     },
     maxSize,
     multiple: false,
@@ -138,7 +139,7 @@ const FileUpload: React.FC<FileUploadProps> = ({
             <Icon as={FiUpload} w={8} h={8} mb={2} />
             <Text textAlign="center">{placeholder}</Text>
             <Text fontSize="sm" color="gray.500" mt={2}>
-              Supported formats: PDF, TXT, DOCX (max {maxSize / 1024 / 1024}MB)
+              Supported formats: PDF, TXT, DOCX, RTF (max {maxSize / 1024 / 1024}MB)
             </Text>
           </Flex>
         )}
@@ -3,6 +3,7 @@ import {
   SummaryResponse, 
   SimilarityResponse, 
   KeywordsResponse, 
+  FullAnalysisResponse,
   CoverLetterResponse 
 } from './types';
 
@@ -81,6 +82,34 @@ export const getMissingKeywords = async (
   return response.data;
 };
 
+// Summary, similarity and keywords in one request
+export const getFullAnalysis = async (
+  jobDescription: string,
+  resumeText?: string,
+  resumeFile?: File
+): Promise<FullAnalysisResponse> => {
+  const formData = new FormData();
+  formData.append('job_description', jobDescription);
+  
+  if (resumeText) {
+    formData.append('resume', resumeText);
+  }
+  
+  if (resumeFile) {
+    formData.append('resume_file', resumeFile);
+  }
+  
+  const response = await api.post<FullAnalysisResponse>('analysis/full', formData);
+  
+  // Ensure similarityScore is a string
+  const similarity = response.data.similarity;
+  if (similarity && typeof similarity.similarityScore !== 'string') {
+    similarity.similarityScore = `${similarity.similarityScore}%`;
+  }
+  
+  return response.data;
+};
+
 // Cover letter generation
 export const generateCoverLetter = async (
   jobDescription: string,
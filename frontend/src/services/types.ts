@@ -13,6 +13,13 @@ export interface SummaryResponse {
     optimizationSuggestions: string;
   }
   
+  export interface FullAnalysisResponse {
+    summary: string | null;
+    similarity: SimilarityResponse | null;
+    keywords: KeywordsResponse | null;
+    errors: Record<string, string>;
+  }
+  
   export interface CoverLetterResponse {
     coverLetter: string;
   }